@@ -0,0 +1,127 @@
+"""
+Using datasets inside ZIP/TAR/GZ archives without extracting them.
+
+Archive members are addressed through GDAL's virtual file systems (/vsizip/, /vsitar/,
+/vsigzip/), so GDAL reads them straight out of the compressed file. Member listings are cached
+per archive (keyed by its size and mtime), and output names for archived members are built
+from the archive and member names rather than the /vsi path.
+"""
+import os
+import threading
+
+# Longest suffix first, so "x.tar.gz" is a tar archive and not a gzipped file
+ARCHIVE_SUFFIXES = (
+    (".tar.gz", "/vsitar/"),
+    (".tgz", "/vsitar/"),
+    (".tar", "/vsitar/"),
+    (".zip", "/vsizip/"),
+    (".gz", "/vsigzip/"),
+)
+VSI_PREFIXES = ("/vsizip/", "/vsitar/", "/vsigzip/")
+
+_listing_lock = threading.Lock()
+_listings = {}  # archive path -> (size, mtime_ns, member paths)
+
+def archive_prefix(path):
+    """The /vsi prefix for an archive file, or None if path is not an archive."""
+    lower = path.lower()
+    for suffix, prefix in ARCHIVE_SUFFIXES:
+        if lower.endswith(suffix):
+            return prefix
+    return None
+
+def is_archive(path):
+    return not path.startswith(VSI_PREFIXES) and archive_prefix(path) is not None
+
+def split_vsi_path(path):
+    """Splits a /vsi archive path into (prefix, archive, member); None for ordinary paths."""
+    for prefix in VSI_PREFIXES:
+        if path.startswith(prefix):
+            rest = path[len(prefix):]
+            if prefix == "/vsigzip/":
+                return prefix, rest, ""
+            lower = rest.lower()
+            for suffix, _ in ARCHIVE_SUFFIXES:
+                pos = lower.find(suffix + "/")
+                if pos >= 0:
+                    end = pos + len(suffix)
+                    return prefix, rest[:end], rest[end + 1:]
+            return prefix, rest, ""
+    return None
+
+def member_path(archive, member=""):
+    """The /vsi path of a member (or, for .gz, of the decompressed file)."""
+    prefix = archive_prefix(archive)
+    archive = archive.replace("\\", "/")
+    if prefix == "/vsigzip/" or not member:
+        return prefix + archive
+    return f"{prefix}{archive}/{member}"
+
+def list_members(archive):
+    """All file members of an archive as /vsi paths, cached until the archive changes."""
+    st = os.stat(archive)
+    key = os.path.abspath(archive)
+    with _listing_lock:
+        cached = _listings.get(key)
+        if cached is not None and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+    if archive_prefix(archive) == "/vsigzip/":
+        members = [member_path(archive)]
+    else:
+        from osgeo import gdal
+        names = gdal.ReadDirRecursive(member_path(archive)) or []
+        members = [member_path(archive, name) for name in sorted(names) if not name.endswith("/")]
+    with _listing_lock:
+        _listings[key] = (st.st_size, st.st_mtime_ns, members)
+    return members
+
+def dataset_members(archive, exts):
+    """Members of an archive whose (decompressed) extension is in exts."""
+    return [path for path in list_members(archive) if split_name(path)[1].lower() in exts]
+
+def expand_inputs(paths, exts):
+    """Replaces each archive in paths with its dataset members; other paths pass through."""
+    expanded = []
+    for path in paths:
+        expanded.extend(dataset_members(path, exts) if is_archive(path) else [path])
+    return expanded
+
+def split_name(path):
+    """
+    (stem, extension) of a dataset for naming outputs. Archived members are named after the
+    archive and the member, e.g. /vsizip/S2A_T33.zip/GRANULE/B04.tif -> ("S2A_T33_B04", ".tif"),
+    since one delivery after another tends to contain the same member names.
+    """
+    parts = split_vsi_path(path)
+    if parts is None:
+        return os.path.splitext(os.path.basename(path))
+    prefix, archive, member = parts
+    archive_name = os.path.basename(archive)
+    archive_stem = archive_name[:len(archive_name) - len(_archive_suffix(archive_name))]
+    if not member:
+        # A gzipped single file: "dem.tif.gz" -> ("dem", ".tif")
+        return os.path.splitext(archive_stem)
+    stem, ext = os.path.splitext(os.path.basename(member))
+    if archive_stem.lower() not in stem.lower():
+        stem = f"{archive_stem}_{stem}"
+    return stem, ext
+
+def display_name(path):
+    """Short label for a file list or title: "scene.zip/B04.tif" for archive members."""
+    parts = split_vsi_path(path)
+    if parts is None:
+        return os.path.basename(path)
+    _, archive, member = parts
+    return f"{os.path.basename(archive)}/{member}" if member else os.path.basename(archive)
+
+def local_path(path):
+    """The on-disk file behind a path: the archive for /vsi members, else path itself."""
+    parts = split_vsi_path(path)
+    return path if parts is None else parts[1]
+
+def _archive_suffix(name):
+    lower = name.lower()
+    for suffix, _ in ARCHIVE_SUFFIXES:
+        if lower.endswith(suffix):
+            return suffix
+    return ""
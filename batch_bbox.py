@@ -0,0 +1,110 @@
+"""
+Batch bounding-box generation from a table of centroids.
+
+Each table chunk is turned into boxes with the same steps as the KML Bounding Box tab
+(round centroid in UTM, get_bbox_from_centroid, convert corners to lat/lon), vectorized
+over the whole chunk, and streamed into a KML/KMZ/Shapefile/GeoPackage writer.
+"""
+import os
+
+import numpy as np
+
+from feature_writer import open_feature_writer
+from gis_utils import get_bbox_from_centroid, latlon_to_utm_array, round_to_nearest, utm_to_latlon_array
+from table_io import DEFAULT_CHUNK_ROWS, count_rows, iter_table_chunks, numeric_column, read_header
+
+BBOX_FIELDS = [('NAME', 'str'), ('UTM_ZONE', 'int'), ('HEMI', 'str'), ('EASTING', 'float'), ('NORTHING', 'float')]
+
+def utm_box_rings(easting, northing, zone, is_north, width, height):
+    """
+    Lat/lon rings, shape (n, 4, 2) as (lon, lat), for boxes centred on UTM centroids.
+    Corner order matches the KML tab: top-left, top-right, bottom-right, bottom-left.
+    """
+    bbox = get_bbox_from_centroid(easting, northing, width, height)
+    corner_e = np.stack([bbox['west'], bbox['east'], bbox['east'], bbox['west']], axis=-1)
+    corner_n = np.stack([bbox['north'], bbox['north'], bbox['south'], bbox['south']], axis=-1)
+    zone = np.broadcast_to(zone, corner_e.shape[:1])
+    is_north = np.broadcast_to(is_north, corner_e.shape[:1])
+    lat, lon = utm_to_latlon_array(corner_e, corner_n, np.repeat(zone, 4), np.repeat(is_north, 4))
+    return np.stack([lon, lat], axis=-1).reshape(-1, 4, 2)
+
+def _column_or_default(chunk, name, default, n):
+    if name and name in chunk:
+        values = numeric_column(chunk, name)
+        return np.where(np.isfinite(values), values, default)
+    return np.full(n, float(default))
+
+def write_bbox_table(in_path, out_path, coord_type='latlon', name_col='name', lat_col='lat', lon_col='lon',
+                     easting_col='easting', northing_col='northing', zone_col='utm_zone',
+                     hemisphere_col='hemisphere', width_col='width', height_col='height',
+                     width=1000, height=1000, round_to=10, hemisphere=None, chunk_rows=DEFAULT_CHUNK_ROWS,
+                     progress_callback=None, cancel_event=None):
+    """
+    Reads centroids from in_path (CSV/Parquet) and writes one box per row to out_path.
+      coord_type 'latlon': lat/lon columns, UTM zone detected per row.
+      coord_type 'utm': easting/northing/zone/hemisphere columns; hemisphere ('N'/'S') is used
+      when the table has no hemisphere column.
+    Raises ValueError naming the coordinate columns the table lacks.
+    width/height come from width_col/height_col when present, otherwise the given defaults.
+    Rows with missing coordinates are skipped. progress_callback(rows_done, total_rows_or_None)
+    is called after each chunk; setting cancel_event stops before the next chunk, keeping the
+    boxes written so far. Returns the number of boxes written.
+    """
+    from bulk_convert import parse_hemisphere
+    numeric = (lat_col, lon_col) if coord_type == 'latlon' else (easting_col, northing_col, zone_col)
+    numeric += tuple(c for c in (width_col, height_col) if c)
+    header = read_header(in_path)
+    required = list(numeric[:2 if coord_type == 'latlon' else 3])
+    if coord_type != 'latlon' and (hemisphere is None or hemisphere_col in header):
+        required.append(hemisphere_col)
+    missing = [c for c in required if c not in header]
+    if missing:
+        raise ValueError(f"{os.path.basename(in_path)} has no column(s): {', '.join(missing)}")
+    total = count_rows(in_path)
+    rows_done = 0
+    written = 0
+    with open_feature_writer(out_path, BBOX_FIELDS) as writer:
+        for chunk in iter_table_chunks(in_path, chunk_rows, numeric_columns=numeric):
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            n = len(next(iter(chunk.values())))
+            if coord_type == 'latlon':
+                lat = numeric_column(chunk, lat_col)
+                lon = numeric_column(chunk, lon_col)
+                valid = np.isfinite(lat) & np.isfinite(lon)
+                easting, northing, zone, is_north = latlon_to_utm_array(lat[valid], lon[valid])
+            else:
+                easting = numeric_column(chunk, easting_col)
+                northing = numeric_column(chunk, northing_col)
+                zone = numeric_column(chunk, zone_col)
+                valid = np.isfinite(easting) & np.isfinite(northing) & (zone >= 1) & (zone <= 60)
+                if hemisphere_col in chunk:
+                    col = chunk[hemisphere_col]
+                    is_north = parse_hemisphere(col.to_numpy(zero_copy_only=False) if hasattr(col, 'to_numpy') else col)[valid]
+                else:
+                    is_north = np.full(int(valid.sum()), parse_hemisphere([hemisphere])[0])
+                easting, northing, zone = easting[valid], northing[valid], zone[valid].astype(int)
+            widths = _column_or_default(chunk, width_col, width, n)[valid]
+            heights = _column_or_default(chunk, height_col, height, n)[valid]
+
+            easting = round_to_nearest(easting, round_to)
+            northing = round_to_nearest(northing, round_to)
+            rings = utm_box_rings(easting, northing, zone, is_north, widths, heights)
+
+            if name_col and name_col in chunk:
+                col = chunk[name_col]
+                names = np.asarray(col.to_numpy(zero_copy_only=False) if hasattr(col, 'to_numpy') else col)[valid]
+            else:
+                names = np.arange(rows_done, rows_done + n)[valid]
+            writer.write_polygons(rings, {
+                'NAME': names.astype(str),
+                'UTM_ZONE': zone,
+                'HEMI': np.where(is_north, 'N', 'S'),
+                'EASTING': easting,
+                'NORTHING': northing,
+            })
+            rows_done += n
+            written += len(rings)
+            if progress_callback:
+                progress_callback(rows_done, total)
+    return written
@@ -0,0 +1,199 @@
+"""
+Benchmark cases. Each case factory takes (params, fixtures, work_dir) and returns
+(fn, items, unit): fn() is the timed operation, items is how many units it processes per
+call (pixels, features, points, lookups) and is used for the throughput figure.
+"""
+import os
+
+import numpy as np
+
+from benchmarks.fixtures import raster_name, vector_name
+
+# Suites: rasters are (size, dtype, layout), vectors are feature counts, points/lookups are counts
+SUITES = {
+    "quick": {
+        "rasters": [(1024, "Byte", "tiled"), (1024, "UInt16", "striped"), (2048, "Float32", "tiled")],
+        "vectors": [10_000],
+        "points": 100_000,
+        "lookups": 10_000,
+    },
+    "standard": {
+        "rasters": [(4096, dtype, layout) for dtype in ("Byte", "UInt16", "Float32") for layout in ("tiled", "striped")],
+        "vectors": [10_000, 100_000, 1_000_000],
+        "points": 1_000_000,
+        "lookups": 100_000,
+    },
+    "full": {
+        "rasters": [(4096, dtype, layout) for dtype in ("Byte", "UInt16", "Float32") for layout in ("tiled", "striped")]
+                   + [(16384, "Byte", "striped"), (16384, "Float32", "tiled")],
+        "vectors": [10_000, 100_000, 1_000_000, 10_000_000],
+        "points": 10_000_000,
+        "lookups": 1_000_000,
+    },
+}
+
+def _cut_polygon(fixtures):
+    from cut_engine import get_cut_geometry_and_crs
+    return get_cut_geometry_and_crs(os.path.join(fixtures, "cut_polygon.geojson"))
+
+def _fresh(path):
+    # Outputs are removed before each run so every run does the full write
+    if os.path.isdir(path):
+        import shutil
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+    return path
+
+def cut_raster_case(params, fixtures, work_dir):
+    from cut_engine import cut_raster
+    size, dtype, layout = params["raster"]
+    src = os.path.join(fixtures, raster_name(size, dtype, layout))
+    out = os.path.join(work_dir, "cut.tif")
+    geom, crs = _cut_polygon(fixtures)
+    return (lambda: cut_raster(src, _fresh(out), geom, crs)), size * size, "px"
+
+def cut_raster_group_case(params, fixtures, work_dir):
+    # Several inputs on one grid, so the cut mask is rasterized once and reused
+    from cut_engine import cut_files
+    size, dtype, layout = params["raster"]
+    src = os.path.join(fixtures, raster_name(size, dtype, layout))
+    jobs = [(src, os.path.join(work_dir, f"cut_{i}.tif")) for i in range(params["files"])]
+    geom, crs = _cut_polygon(fixtures)
+
+    def run():
+        for _, out in jobs:
+            _fresh(out)
+        failed = cut_files(jobs, geom, crs)
+        if failed:
+            raise RuntimeError(failed[0][1])
+    return run, size * size * len(jobs), "px"
+
+def band_stats_case(params, fixtures, work_dir):
+    from raster_utils import inspect_bands
+    size, dtype, layout = params["raster"]
+    src = os.path.join(fixtures, raster_name(size, dtype, layout))
+    return (lambda: inspect_bands(src)), size * size, "px"
+
+def display_load_case(params, fixtures, work_dir):
+    from raster_utils import display_statistics, load_display_band
+    size, dtype, layout = params["raster"]
+    src = os.path.join(fixtures, raster_name(size, dtype, layout))
+
+    def load():
+        # Same work as the raster display tab minus the drawing
+        _, arr = load_display_band(src)
+        return display_statistics(src, arr)
+    return load, size * size, "px"
+
+def cut_vector_case(params, fixtures, work_dir):
+    from cut_engine import cut_vector
+    count = params["features"]
+    engine = params.get("engine", "python")
+    src = os.path.join(fixtures, vector_name(count))
+    out = os.path.join(work_dir, "cut.shp")
+    geom, crs = _cut_polygon(fixtures)
+
+    def run():
+        for ext in (".shp", ".shx", ".dbf", ".prj", ".cpg"):
+            _fresh(out[:-4] + ext)
+        cut_vector(src, out, geom, crs, engine=engine)
+    return run, count, "features"
+
+def sample_points_case(params, fixtures, work_dir):
+    from benchmarks.fixtures import EXTENT_M, ORIGIN_X, ORIGIN_Y
+    from dataset_pool import open_raster
+    from raster_sampling import RasterSampler
+    size, dtype, layout = params["raster"]
+    src = os.path.join(fixtures, raster_name(size, dtype, layout))
+    rng = np.random.default_rng(params["points"])
+    x = rng.uniform(ORIGIN_X, ORIGIN_X + EXTENT_M, params["points"])
+    y = rng.uniform(ORIGIN_Y - EXTENT_M, ORIGIN_Y, params["points"])
+    sampler = RasterSampler(open_raster(src), method=params.get("method", "nearest"))
+    return (lambda: sampler.sample(x, y)), params["points"], "points"
+
+def _random_lonlat(n):
+    west, south, east, north = -125.0, 25.0, -67.0, 49.0  # Continental US, several UTM zones
+    rng = np.random.default_rng(n)
+    return rng.uniform(south, north, n), rng.uniform(west, east, n)
+
+def latlon_to_utm_array_case(params, fixtures, work_dir):
+    from gis_utils import latlon_to_utm_array
+    lat, lon = _random_lonlat(params["points"])
+    return (lambda: latlon_to_utm_array(lat, lon)), params["points"], "points"
+
+def utm_to_latlon_array_case(params, fixtures, work_dir):
+    from gis_utils import latlon_to_utm_array, utm_to_latlon_array
+    lat, lon = _random_lonlat(params["points"])
+    easting, northing, zone, is_north = latlon_to_utm_array(lat, lon)
+    return (lambda: utm_to_latlon_array(easting, northing, zone, is_north)), params["points"], "points"
+
+def latlon_to_utm_scalar_case(params, fixtures, work_dir):
+    from gis_utils import latlon_to_utm
+    lat, lon = _random_lonlat(params["points"])
+    pairs = list(zip(lat.tolist(), lon.tolist()))
+
+    def run():
+        for la, lo in pairs:
+            latlon_to_utm(la, lo)
+    return run, len(pairs), "points"
+
+def city_lookup_case(params, fixtures, work_dir):
+    from resources.cities import get_nearest_city
+    lat, lon = _random_lonlat(params["lookups"])
+    pairs = list(zip(lat.tolist(), lon.tolist()))
+
+    def run():
+        for la, lo in pairs:
+            get_nearest_city((la, lo))
+    return run, len(pairs), "lookups"
+
+def city_lookup_bulk_case(params, fixtures, work_dir):
+    from resources.city_index import get_city_index
+    index = get_city_index()
+    lat, lon = _random_lonlat(params["lookups"])
+    return (lambda: index.query_many(lat, lon)), params["lookups"], "lookups"
+
+FACTORIES = {
+    "cut_raster": cut_raster_case,
+    "cut_raster_group": cut_raster_group_case,
+    "band_stats": band_stats_case,
+    "display_load": display_load_case,
+    "cut_vector": cut_vector_case,
+    "sample_points": sample_points_case,
+    "latlon_to_utm_array": latlon_to_utm_array_case,
+    "utm_to_latlon_array": utm_to_latlon_array_case,
+    "latlon_to_utm_scalar": latlon_to_utm_scalar_case,
+    "city_lookup": city_lookup_case,
+    "city_lookup_bulk": city_lookup_bulk_case,
+}
+# Cases that read fixtures need GDAL/OGR; the others only need pyproj/NumPy
+GDAL_CASES = {"cut_raster", "cut_raster_group", "band_stats", "display_load", "cut_vector", "sample_points"}
+
+def suite_cases(suite):
+    """Returns a list of (case name, factory name, params) for a suite."""
+    spec = SUITES[suite]
+    cases = []
+    for size, dtype, layout in spec["rasters"]:
+        for factory in ("cut_raster", "band_stats", "display_load"):
+            cases.append((f"{factory}[{size}px {dtype} {layout}]", factory, {"raster": (size, dtype, layout)}))
+    size, dtype, layout = spec["rasters"][0]
+    cases.append((f"cut_raster_group[4 x {size}px {dtype} {layout}]", "cut_raster_group",
+                  {"raster": (size, dtype, layout), "files": 4}))
+    for count in spec["vectors"]:
+        cases.append((f"cut_vector[{count:,} polygons]", "cut_vector", {"features": count}))
+        cases.append((f"cut_vector[{count:,} polygons, native OGR]", "cut_vector", {"features": count, "engine": "ogr"}))
+    points = spec["points"]
+    for size, dtype, layout in spec["rasters"][:2]:
+        for method in ("nearest", "bilinear"):
+            cases.append((f"sample_points[{points:,} points, {size}px {dtype} {layout}, {method}]", "sample_points",
+                          {"raster": (size, dtype, layout), "points": points, "method": method}))
+    cases.append((f"latlon_to_utm_array[{points:,} points]", "latlon_to_utm_array", {"points": points}))
+    cases.append((f"utm_to_latlon_array[{points:,} points]", "utm_to_latlon_array", {"points": points}))
+    scalar_points = min(points, 100_000)
+    cases.append((f"latlon_to_utm_scalar[{scalar_points:,} points]", "latlon_to_utm_scalar", {"points": scalar_points}))
+    lookups = spec["lookups"]
+    scalar_lookups = min(lookups, 100_000)
+    cases.append((f"city_lookup[{scalar_lookups:,} lookups]", "city_lookup", {"lookups": scalar_lookups}))
+    cases.append((f"city_lookup_bulk[{lookups:,} lookups]", "city_lookup_bulk", {"lookups": lookups}))
+    return cases
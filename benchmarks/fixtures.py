@@ -0,0 +1,151 @@
+"""
+Synthetic, deterministic benchmark fixtures generated locally with GDAL/OGR.
+
+Every raster covers the same ~41 km square in UTM zone 18N (around Washington, DC) whatever
+its size, so one cut polygon (a GeoJSON octagon in WGS84, which also exercises reprojection)
+works for all of them. Vector layers are small random squares over the same area in WGS84.
+Files are created once under the fixtures directory and reused by later runs.
+"""
+import math
+import os
+
+import numpy as np
+
+# Bump when the generated data changes, so stale fixtures are not reused
+FIXTURE_VERSION = 1
+FIXTURE_CRS = "EPSG:32618"
+ORIGIN_X, ORIGIN_Y = 300000.0, 4330000.0
+EXTENT_M = 40960.0
+NODATA = {"Byte": None, "UInt16": 0, "Float32": -9999.0}
+ROWS_PER_WRITE = 512
+FEATURES_PER_WRITE = 100_000
+
+def fixture_dir(root):
+    path = os.path.join(root, f"v{FIXTURE_VERSION}")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def raster_name(size, dtype, layout):
+    return f"raster_{size}_{dtype}_{layout}.tif"
+
+def vector_name(count):
+    return f"polygons_{count}.gpkg"
+
+def extent_lonlat():
+    from gis_utils import get_transformer
+    t = get_transformer(FIXTURE_CRS, "EPSG:4326")
+    xs = [ORIGIN_X, ORIGIN_X + EXTENT_M, ORIGIN_X + EXTENT_M, ORIGIN_X]
+    ys = [ORIGIN_Y, ORIGIN_Y, ORIGIN_Y - EXTENT_M, ORIGIN_Y - EXTENT_M]
+    lon, lat = t.transform(xs, ys)
+    return min(lon), min(lat), max(lon), max(lat)
+
+def _synthetic_rows(size, yoff, nrows, dtype):
+    # Smooth terrain-like surface plus seeded noise; depends only on (size, row), not on chunking
+    y = (np.arange(yoff, yoff + nrows, dtype=np.float64)[:, None] / size) * 2 * math.pi
+    x = (np.arange(size, dtype=np.float64)[None, :] / size) * 2 * math.pi
+    surface = (np.sin(3 * x) * np.cos(2 * y) + 0.5 * np.sin(7 * x + 5 * y) + 1.5) / 3.0
+    rng = np.random.default_rng(yoff)
+    surface = surface + rng.normal(0, 0.02, surface.shape)
+    if dtype == "Byte":
+        return np.clip(surface * 255, 0, 255).astype(np.uint8)
+    if dtype == "UInt16":
+        arr = np.clip(surface * 4000 + 100, 1, 65535).astype(np.uint16)
+        arr[rng.random(arr.shape) < 0.01] = NODATA["UInt16"]
+        return arr
+    arr = (surface * 800.0 - 50.0).astype(np.float32)
+    arr[rng.random(arr.shape) < 0.01] = NODATA["Float32"]
+    arr[rng.random(arr.shape) < 0.001] = np.nan
+    return arr
+
+def make_raster(path, size, dtype, layout):
+    from osgeo import gdal, osr
+    options = ["TILED=YES", "BLOCKXSIZE=256", "BLOCKYSIZE=256"] if layout == "tiled" else ["TILED=NO"]
+    tmp_path = path + ".part.tif"
+    ds = gdal.GetDriverByName("GTiff").Create(
+        tmp_path, size, size, 1, gdal.GetDataTypeByName(dtype), options + ["BIGTIFF=IF_SAFER"]
+    )
+    pixel = EXTENT_M / size
+    ds.SetGeoTransform((ORIGIN_X, pixel, 0, ORIGIN_Y, 0, -pixel))
+    srs = osr.SpatialReference()
+    srs.SetFromUserInput(FIXTURE_CRS)
+    ds.SetProjection(srs.ExportToWkt())
+    band = ds.GetRasterBand(1)
+    if NODATA[dtype] is not None:
+        band.SetNoDataValue(NODATA[dtype])
+    for yoff in range(0, size, ROWS_PER_WRITE):
+        nrows = min(ROWS_PER_WRITE, size - yoff)
+        band.WriteArray(_synthetic_rows(size, yoff, nrows, dtype), 0, yoff)
+    band = None
+    ds = None
+    os.replace(tmp_path, path)
+
+def make_cut_polygon(path):
+    # Irregular octagon around the centre, covering roughly half of the raster extent
+    from osgeo import ogr, osr
+    from gis_utils import get_transformer
+    cx, cy = ORIGIN_X + EXTENT_M / 2, ORIGIN_Y - EXTENT_M / 2
+    angles = np.linspace(0, 2 * math.pi, 9)[:-1] + 0.2
+    radii = EXTENT_M * np.array([0.42, 0.36, 0.40, 0.33, 0.41, 0.37, 0.39, 0.35])
+    lon, lat = get_transformer(FIXTURE_CRS, "EPSG:4326").transform(cx + radii * np.cos(angles), cy + radii * np.sin(angles))
+    ring = ogr.Geometry(ogr.wkbLinearRing)
+    for x, y in list(zip(lon, lat)) + [(lon[0], lat[0])]:
+        ring.AddPoint_2D(float(x), float(y))
+    poly = ogr.Geometry(ogr.wkbPolygon)
+    poly.AddGeometry(ring)
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(4326)
+    srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+    tmp_path = path + ".part"
+    ds = ogr.GetDriverByName("GeoJSON").CreateDataSource(tmp_path)
+    lyr = ds.CreateLayer("cut", srs, ogr.wkbPolygon)
+    feat = ogr.Feature(lyr.GetLayerDefn())
+    feat.SetGeometry(poly)
+    lyr.CreateFeature(feat)
+    feat = None
+    ds = None
+    os.replace(tmp_path, path)
+
+def make_vector(path, count):
+    from feature_writer import open_feature_writer
+    west, south, east, north = extent_lonlat()
+    rng = np.random.default_rng(count)
+    # Square side shrinks with density so features stay roughly non-overlapping
+    side = 0.5 * (east - west) / math.sqrt(count)
+    tmp_path = path[:-len(".gpkg")] + ".part.gpkg"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    with open_feature_writer(tmp_path, [("NAME", "str"), ("VALUE", "float")]) as writer:
+        for start in range(0, count, FEATURES_PER_WRITE):
+            n = min(FEATURES_PER_WRITE, count - start)
+            x = rng.uniform(west, east - side, n)
+            y = rng.uniform(south + side, north, n)
+            rings = np.stack([
+                np.stack([x, y], axis=-1), np.stack([x + side, y], axis=-1),
+                np.stack([x + side, y - side], axis=-1), np.stack([x, y - side], axis=-1),
+            ], axis=1)
+            writer.write_polygons(rings, {
+                "NAME": np.char.add("f", np.arange(start, start + n).astype(str)),
+                "VALUE": rng.random(n),
+            })
+    os.replace(tmp_path, path)
+
+def ensure_fixtures(root, rasters=(), vectors=(), log=print):
+    """
+    Creates any missing fixtures; rasters are (size, dtype, layout) tuples, vectors are feature
+    counts. Returns the fixture directory.
+    """
+    base = fixture_dir(root)
+    cut_path = os.path.join(base, "cut_polygon.geojson")
+    if not os.path.exists(cut_path):
+        make_cut_polygon(cut_path)
+    for size, dtype, layout in rasters:
+        path = os.path.join(base, raster_name(size, dtype, layout))
+        if not os.path.exists(path):
+            log(f"Generating {os.path.basename(path)}...")
+            make_raster(path, size, dtype, layout)
+    for count in vectors:
+        path = os.path.join(base, vector_name(count))
+        if not os.path.exists(path):
+            log(f"Generating {os.path.basename(path)}...")
+            make_vector(path, count)
+    return base
@@ -0,0 +1,206 @@
+"""
+Benchmark runner. From the repository root:
+
+    python -m benchmarks.run                         # quick suite, compare with benchmarks/baseline.json if present
+    python -m benchmarks.run --suite standard --save-baseline
+    python -m benchmarks.run --only cut_raster --repeat 5
+
+Each case runs in a fresh process, so peak memory (max RSS, which includes GDAL's native
+allocations) is measured per case. Results are written as JSON; when a baseline exists the
+run fails (exit code 1) if any case got slower or hungrier than the tolerances allow.
+"""
+import argparse
+import importlib.util
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.cases import FACTORIES, GDAL_CASES, SUITES, suite_cases
+from tracing import peak_rss_mb
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_FIXTURES = os.path.join(tempfile.gettempdir(), "gistoolbox_bench_fixtures")
+# A case regresses when it is this much slower/bigger than the baseline...
+TIME_TOLERANCE = 0.20
+MEMORY_TOLERANCE = 0.25
+# ...and the absolute difference is above the noise floor
+MIN_TIME_DELTA_S = 0.005
+MIN_MEMORY_DELTA_MB = 16.0
+
+def run_case(factory, params, fixtures, repeat, warmup):
+    """Runs in a child process. Returns the timings and memory of one case."""
+    try:
+        from osgeo import gdal
+        gdal.UseExceptions()
+    except ImportError:
+        pass
+    with tempfile.TemporaryDirectory(prefix="bench_") as work_dir:
+        fn, items, unit = FACTORIES[factory](params, fixtures, work_dir)
+        rss_before = peak_rss_mb()
+        for _ in range(warmup):
+            fn()
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        rss_after = peak_rss_mb()
+    median = statistics.median(times)
+    return {
+        "times_s": times,
+        "median_s": median,
+        "min_s": min(times),
+        "items": items,
+        "unit": unit,
+        "throughput_per_s": items / median if median > 0 else None,
+        "peak_rss_mb": rss_after,
+        "peak_rss_delta_mb": None if rss_after is None else rss_after - rss_before,
+    }
+
+def environment():
+    env = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+    for mod in ("numpy", "pyproj", "shapely", "scipy"):
+        try:
+            env[mod] = __import__(mod).__version__
+        except ImportError:
+            env[mod] = None
+    try:
+        from osgeo import gdal
+        env["gdal"] = gdal.__version__
+        env["gdal_cachemax_mb"] = gdal.GetCacheMax() / 2 ** 20
+    except ImportError:
+        env["gdal"] = None
+    try:
+        env["git_commit"] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        env["git_commit"] = None
+    return env
+
+def compare(results, baseline, time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    """Returns (report lines, number of failures) comparing results against a baseline run."""
+    lines = []
+    failures = 0
+    for name, base in baseline["cases"].items():
+        current = results["cases"].get(name)
+        if current is None:
+            continue
+        if "error" in current or "error" in base or "skipped" in current or "skipped" in base:
+            continue
+        ratio = current["median_s"] / base["median_s"] if base["median_s"] else 1.0
+        status = "ok"
+        if ratio > 1 + time_tolerance and current["median_s"] - base["median_s"] > MIN_TIME_DELTA_S:
+            status = "SLOWER"
+        elif ratio < 1 - time_tolerance:
+            status = "faster"
+        mem_note = ""
+        cur_mem, base_mem = current.get("peak_rss_delta_mb"), base.get("peak_rss_delta_mb")
+        if cur_mem is not None and base_mem is not None:
+            mem_note = f"  mem {base_mem:7.1f} -> {cur_mem:7.1f} MB"
+            if cur_mem > base_mem * (1 + memory_tolerance) and cur_mem - base_mem > MIN_MEMORY_DELTA_MB:
+                status = "MORE MEMORY" if status != "SLOWER" else "SLOWER, MORE MEMORY"
+        if status.isupper():
+            failures += 1
+        lines.append(f"{status:>20}  {name}: {base['median_s']:.4f}s -> {current['median_s']:.4f}s ({ratio:.2f}x){mem_note}")
+    failed = [name for name in baseline["cases"] if name in results["cases"] and "error" in results["cases"][name]]
+    for name in failed:
+        failures += 1
+        lines.append(f"{'FAILED':>20}  {name}: {results['cases'][name]['error']}")
+    return lines, failures
+
+def format_result(name, r):
+    if "skipped" in r:
+        return f"  {name}: skipped ({r['skipped']})"
+    if "error" in r:
+        return f"  {name}: ERROR {r['error']}"
+    throughput = r["throughput_per_s"]
+    rate = f"{throughput / 1e6:10.2f} M{r['unit']}/s" if throughput else ""
+    mem = f"  peak {r['peak_rss_mb']:7.1f} MB (+{r['peak_rss_delta_mb']:.1f})" if r["peak_rss_mb"] is not None else ""
+    return f"  {name}: {r['median_s']:.4f}s {rate}{mem}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the GIS toolbox benchmarks.")
+    parser.add_argument("--suite", choices=sorted(SUITES), default="quick")
+    parser.add_argument("--only", action="append", default=[], help="Run only cases whose name contains this text (repeatable)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case (the median is reported)")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed runs per case before timing")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES, help="Where synthetic fixtures are generated and cached")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write this run's results")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE)
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    cases = [c for c in suite_cases(args.suite) if not args.only or any(o in c[0] for o in args.only)]
+    has_gdal = importlib.util.find_spec("osgeo") is not None
+    if has_gdal:
+        from benchmarks.fixtures import ensure_fixtures
+        needed = [c for c in cases if c[1] in GDAL_CASES]
+        fixtures = ensure_fixtures(
+            args.fixtures,
+            rasters=sorted({p["raster"] for _, _, p in needed if "raster" in p}),
+            vectors=sorted({p["features"] for _, _, p in needed if "features" in p}),
+        )
+    else:
+        fixtures = None
+
+    results = {"suite": args.suite, "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "environment": environment(), "cases": {}}
+    ctx = multiprocessing.get_context("spawn")
+    print(f"Running {len(cases)} benchmark cases ({args.suite} suite, median of {args.repeat})")
+    for name, factory, params in cases:
+        if factory in GDAL_CASES and not has_gdal:
+            result = {"skipped": "GDAL (osgeo) not installed"}
+        else:
+            # Fresh process per case so peak RSS belongs to this case alone
+            try:
+                with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                    result = pool.submit(run_case, factory, params, fixtures, args.repeat, args.warmup).result()
+            except Exception as e:
+                result = {"error": str(e) or type(e).__name__}
+        result["factory"] = factory
+        result["params"] = params
+        results["cases"][name] = result
+        print(format_result(name, result), flush=True)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    failures = 0
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("environment", {}).get("platform") != results["environment"]["platform"]:
+            print("Warning: baseline was recorded on a different platform; timings may not be comparable.")
+        lines, failures = compare(results, baseline, args.time_tolerance, args.memory_tolerance)
+        print(f"\nComparison with {args.baseline}:")
+        print("\n".join(lines) if lines else "  (no cases in common)")
+    elif args.baseline != DEFAULT_BASELINE and not args.save_baseline:
+        print(f"Baseline {args.baseline} not found.")
+        return 2
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    if failures:
+        print(f"\n*** {failures} BENCHMARK REGRESSION(S) ***")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
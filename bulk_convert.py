@@ -0,0 +1,160 @@
+"""
+Bulk point coordinate conversion (lat/lon <-> UTM) for CSV/Parquet tables.
+
+Tables are streamed in chunks, each chunk's coordinates are converted in a worker process
+(one vectorized pyproj call per UTM zone/hemisphere group) and results are written
+incrementally in input order, so memory stays flat regardless of file size.
+
+Headless usage:
+    python bulk_convert.py points.csv points_utm.parquet --lat-col lat --lon-col lon
+    python bulk_convert.py utm.csv latlon.csv --to-latlon --zone 18 --hemisphere N
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from gis_utils import latlon_to_utm_array, utm_to_latlon_array
+from table_io import DEFAULT_CHUNK_ROWS, TableWriter, count_rows, iter_table_chunks, numeric_column
+
+def convert_to_utm(lat, lon, zone=None):
+    # Returns (easting, northing, zone, hemisphere) arrays; invalid input rows get NaN/zone 0
+    valid = np.isfinite(lat) & np.isfinite(lon)
+    easting = np.full(lat.shape, np.nan)
+    northing = np.full(lat.shape, np.nan)
+    zones = np.zeros(lat.shape, dtype=np.int32)
+    is_north = np.ones(lat.shape, dtype=bool)
+    if valid.any():
+        e, n, z, north = latlon_to_utm_array(lat[valid], lon[valid], zone)
+        easting[valid], northing[valid], zones[valid], is_north[valid] = e, n, z, north
+    hemisphere = np.where(valid, np.where(is_north, 'N', 'S'), '')
+    return easting, northing, zones, hemisphere
+
+def convert_to_latlon(easting, northing, zone, is_north):
+    valid = np.isfinite(easting) & np.isfinite(northing) & (zone >= 1) & (zone <= 60)
+    lat = np.full(easting.shape, np.nan)
+    lon = np.full(easting.shape, np.nan)
+    if valid.any():
+        lat[valid], lon[valid] = utm_to_latlon_array(easting[valid], northing[valid], zone[valid], is_north[valid])
+    return lat, lon
+
+def parse_hemisphere(values):
+    # 'N'/'North'/'S'/'South' (any case) -> bool array, North when blank
+    text = np.char.upper(np.asarray(values).astype(str))
+    return ~np.char.startswith(text, 'S')
+
+def _convert_job(to_utm, a, b, zone, is_north):
+    # Runs in a worker process; only coordinate arrays cross the process boundary
+    if to_utm:
+        return convert_to_utm(a, b, zone)
+    return convert_to_latlon(a, b, zone, is_north)
+
+def convert_file(in_path, out_path, to_utm=True, lat_col='lat', lon_col='lon',
+                 easting_col='easting', northing_col='northing', zone_col='utm_zone',
+                 hemisphere_col='hemisphere', zone=None, hemisphere=None,
+                 chunk_rows=DEFAULT_CHUNK_ROWS, workers=None, progress_callback=None, cancel_event=None):
+    """
+    Converts every row of in_path and writes all input columns plus the converted ones to
+    out_path (CSV or Parquet by extension).
+      to_utm: lat/lon -> easting/northing/zone/hemisphere, zone auto-detected per point unless given.
+      otherwise: easting/northing -> lat/lon, zone and hemisphere from columns unless given.
+    progress_callback(rows_done, total_rows_or_None) is called after each chunk is written.
+    Returns the number of rows written.
+    """
+    workers = workers or os.cpu_count() or 1
+    numeric = (lat_col, lon_col) if to_utm else (easting_col, northing_col, zone_col)
+    total = count_rows(in_path)
+
+    def job_args(chunk):
+        n = len(next(iter(chunk.values())))
+        if to_utm:
+            return numeric_column(chunk, lat_col), numeric_column(chunk, lon_col), zone, None
+        zones = np.full(n, zone, dtype=np.int32) if zone else np.nan_to_num(numeric_column(chunk, zone_col)).astype(np.int32)
+        if hemisphere:
+            norths = np.full(n, parse_hemisphere([hemisphere])[0])
+        else:
+            col = chunk[hemisphere_col]
+            norths = parse_hemisphere(col.to_numpy(zero_copy_only=False) if hasattr(col, 'to_numpy') else col)
+        return numeric_column(chunk, easting_col), numeric_column(chunk, northing_col), zones, norths
+
+    def attach(chunk, result):
+        out = dict(chunk)
+        if to_utm:
+            easting, northing, zones, hemi = result
+            out.update({easting_col: easting, northing_col: northing, zone_col: zones, hemisphere_col: hemi})
+        else:
+            lat, lon = result
+            out.update({lat_col: lat, lon_col: lon})
+        return out
+
+    chunks = iter_table_chunks(in_path, chunk_rows, numeric_columns=numeric)
+    with TableWriter(out_path) as writer:
+        if workers <= 1:
+            for chunk in chunks:
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                writer.write(attach(chunk, _convert_job(to_utm, *job_args(chunk))))
+                if progress_callback:
+                    progress_callback(writer.rows_written, total)
+            return writer.rows_written
+
+        # Spawned (not forked) workers: safe when called from a GUI thread
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+            pending = deque()
+            # At most 2 chunks per worker in flight, so memory is bounded by chunk size
+            for chunk in chunks:
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                pending.append((chunk, pool.submit(_convert_job, to_utm, *job_args(chunk))))
+                while len(pending) >= workers * 2:
+                    done_chunk, future = pending.popleft()
+                    writer.write(attach(done_chunk, future.result()))
+                    if progress_callback:
+                        progress_callback(writer.rows_written, total)
+            while pending:
+                done_chunk, future = pending.popleft()
+                if cancel_event is not None and cancel_event.is_set():
+                    future.cancel()
+                    continue
+                writer.write(attach(done_chunk, future.result()))
+                if progress_callback:
+                    progress_callback(writer.rows_written, total)
+        return writer.rows_written
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert point tables between lat/lon and UTM.")
+    parser.add_argument("input", help="Input CSV or Parquet file")
+    parser.add_argument("output", help="Output CSV or Parquet file")
+    parser.add_argument("--to-latlon", action="store_true", help="Convert UTM to lat/lon (default: lat/lon to UTM)")
+    parser.add_argument("--lat-col", default="lat")
+    parser.add_argument("--lon-col", default="lon")
+    parser.add_argument("--easting-col", default="easting")
+    parser.add_argument("--northing-col", default="northing")
+    parser.add_argument("--zone-col", default="utm_zone")
+    parser.add_argument("--hemisphere-col", default="hemisphere")
+    parser.add_argument("--zone", type=int, help="Force a UTM zone instead of detecting/reading it")
+    parser.add_argument("--hemisphere", choices=["N", "S"], help="Force a hemisphere (UTM to lat/lon)")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    def report(done, total):
+        suffix = f" / {total}" if total else ""
+        print(f"\r{done}{suffix} rows", end="", file=sys.stderr, flush=True)
+
+    rows = convert_file(
+        args.input, args.output, to_utm=not args.to_latlon,
+        lat_col=args.lat_col, lon_col=args.lon_col, easting_col=args.easting_col,
+        northing_col=args.northing_col, zone_col=args.zone_col, hemisphere_col=args.hemisphere_col,
+        zone=args.zone, hemisphere=args.hemisphere, chunk_rows=args.chunk_rows,
+        workers=args.workers, progress_callback=report
+    )
+    print(f"\nWrote {rows} rows to {args.output}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
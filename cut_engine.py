@@ -0,0 +1,782 @@
+"""
+Cutting rasters and vectors by the extent or geometry of another file.
+
+Qt-free core of the Batch Cut tab, also used by the benchmarks and anything else that
+needs to cut without the GUI.
+
+Rasters that share a pixel grid (bands of one scene, yearly rasters of one tile) share one
+rasterized cut mask: the cut geometry is burnt into a boolean mask once per grid signature,
+and each raster is then copied through a window read with the mask applied in NumPy.
+"""
+from collections import OrderedDict
+from functools import lru_cache
+import math
+import os
+import time
+
+import numpy as np
+from osgeo import gdal, gdal_array, ogr
+from pyproj import CRS
+from shapely.geometry import box, shape
+from shapely.ops import unary_union
+
+from archive_inputs import display_name, split_name
+from dataset_pool import open_raster, open_vector, release
+from gis_utils import get_transformer, transform_geometry
+from tracing import add_duration, is_enabled as tracing_enabled, merge_worker_spans, run_in_worker, span
+
+RASTER_EXTS = (".tif", ".tiff", ".img", ".vrt", ".asc", ".bil", ".nc")
+VECTOR_EXTS = (".shp", ".gpkg", ".geojson", ".json", ".kml", ".gml", ".fgb", ".tab", ".mif")
+# Largest cut window (pixels) rasterized into an in-memory mask; bigger cuts go through gdal.Warp
+MAX_MASK_PIXELS = 256 * 1024 * 1024
+# Total size of cached masks (one byte per pixel)
+MASK_CACHE_MAX_BYTES = 512 * 1024 * 1024
+# Drivers that can Create() but are no good as cut outputs
+MASKED_OUTPUT_EXCLUDED_DRIVERS = ("VRT", "MEM")
+# "ogr": gdal.VectorTranslate with clipSrc (C++); "python": per-feature shapely clipping (fallback)
+VECTOR_ENGINES = ("ogr", "python")
+RESAMPLING_METHODS = ("near", "bilinear", "cubic", "cubicspline", "lanczos", "average", "mode", "min", "max", "med")
+# Vector layers this big are clipped in parallel slices of at least MIN_PARTITION_FEATURES
+PARALLEL_VECTOR_MIN_FEATURES = 200_000
+MIN_PARTITION_FEATURES = 25_000
+# Parallel slices are merged by appending them to the output; these formats can't be appended
+# to (or only by rewriting the whole file), so they are always clipped in one process
+NO_APPEND_VECTOR_DRIVERS = ("FlatGeobuf", "GeoJSON", "GeoJSONSeq", "KML", "LIBKML", "GML")
+# Rasters this big (pixels) are warped in parallel chunks when workers are available
+TILED_WARP_MIN_PIXELS = 512 * 1024 * 1024
+# Automatic cut simplification tolerance, as a fraction of the output pixel size
+SIMPLIFY_PIXEL_FRACTION = 0.25
+# Simplified cuts are snapped to a precision grid this fraction of the tolerance
+PRECISION_GRID_FRACTION = 0.1
+# Max error (in pixels) of the approximate transformer gdal.Warp uses; 0 transforms every pixel exactly
+DEFAULT_ERROR_THRESHOLD = 0.125
+
+class TargetGrid:
+    """
+    Output grid for cut rasters: CRS (pyproj CRS or None to keep the input's), pixel size (or
+    None to keep the input's), alignment of the output extent to multiples of the pixel size
+    (so outputs mosaic without resampling), resampling method and warp error threshold.
+    The cut, reprojection and resampling are done in one gdal.Warp pass.
+    """
+
+    def __init__(self, crs=None, resolution=None, align=False, resampling="near", error_threshold=DEFAULT_ERROR_THRESHOLD):
+        if resampling not in RESAMPLING_METHODS:
+            raise ValueError(f"Unknown resampling method {resampling}")
+        if align and not resolution:
+            raise ValueError("Aligning pixels needs a target resolution")
+        self.crs = crs
+        self.resolution = resolution
+        self.align = align
+        self.resampling = resampling
+        self.error_threshold = error_threshold
+
+    def changes_grid(self):
+        return self.crs is not None or bool(self.resolution)
+
+    def output_bounds(self, bounds):
+        # Snapped outward to whole pixels from the origin, like gdalwarp -tap
+        if not self.align:
+            return bounds
+        res = self.resolution
+        minx, miny, maxx, maxy = bounds
+        return (math.floor(minx / res) * res, math.floor(miny / res) * res,
+                math.ceil(maxx / res) * res, math.ceil(maxy / res) * res)
+
+def simplify_geometry(geom, tolerance):
+    """Topology-preserving simplification, snapped to a precision grid of tolerance * PRECISION_GRID_FRACTION."""
+    import shapely
+    with span("simplify cut geometry", vertices=int(shapely.get_num_coordinates(geom))) as s:
+        simplified = shapely.simplify(geom, tolerance, preserve_topology=True)
+        simplified = shapely.set_precision(simplified, tolerance * PRECISION_GRID_FRACTION)
+        s.set(vertices_after=int(shapely.get_num_coordinates(simplified)))
+    return geom if simplified.is_empty else simplified
+
+class CutSimplification:
+    """
+    Simplifies a detailed cut geometry before cutting, which shrinks the cutline gdal.Warp
+    parses and speeds up rasterizing and clipping.
+
+    With a tolerance (in the cut file's CRS units) the cut is simplified once; vector clips
+    still use the original unless exact_vectors is False. Without one, each raster gets a
+    cut simplified to SIMPLIFY_PIXEL_FRACTION of its output pixel size, which doesn't
+    visibly change the result, and vectors always use the original.
+    """
+
+    def __init__(self, tolerance=None, exact_vectors=True):
+        self.tolerance = tolerance
+        self.exact_vectors = exact_vectors
+        self._source = None
+        self._simplified = None
+        self._per_grid = {}
+
+    def raster_geometry(self, cut_geom):
+        """The cut for rasters, in the cut CRS. Per-grid results are remembered until the cut changes."""
+        if self._source is not cut_geom:
+            self._source = cut_geom
+            self._simplified = simplify_geometry(cut_geom, self.tolerance) if self.tolerance else cut_geom
+            self._per_grid.clear()
+        return self._simplified
+
+    def vector_geometry(self, cut_geom):
+        return cut_geom if self.exact_vectors else self.raster_geometry(cut_geom)
+
+    def for_pixel_size(self, geom, pixel_size, crs_key=None):
+        """
+        Simplification of the current cut (see raster_geometry), already transformed to the
+        output CRS identified by crs_key, for a pixel size. No-op with a fixed tolerance.
+        """
+        if self.tolerance or not pixel_size:
+            return geom
+        key = (crs_key, pixel_size)
+        if key not in self._per_grid:
+            self._per_grid[key] = simplify_geometry(geom, pixel_size * SIMPLIFY_PIXEL_FRACTION)
+        return self._per_grid[key]
+
+def output_path(in_file, out_dir, postfix):
+    # Archive members (/vsizip/... paths) are named after the archive and member
+    base, ext = split_name(in_file)
+    return os.path.join(out_dir, f"{base}{postfix}{ext}")
+
+def is_raster(filename):
+    ext = split_name(filename)[1].lower()
+    if ext in RASTER_EXTS:
+        return True
+    # Pooled, so the probe's handle is the one the cut then uses
+    return open_raster(filename) is not None
+
+def get_cut_geometry_and_crs(cut_file):
+    """Returns (shapely geometry, pyproj CRS) of a raster's extent or a vector's union, or (None, None)."""
+    with span("read cut geometry", file=cut_file):
+        return _read_cut_geometry_and_crs(cut_file)
+
+def _read_cut_geometry_and_crs(cut_file):
+    # Try raster first
+    ds = open_raster(cut_file)
+    if ds:
+        gt = ds.GetGeoTransform()
+        width = ds.RasterXSize
+        height = ds.RasterYSize
+        proj = ds.GetProjection()
+        # Four corners
+        x0, y0 = gt[0], gt[3]
+        x1, y1 = gt[0] + width * gt[1], gt[3] + width * gt[4]
+        x2, y2 = gt[0] + width * gt[1] + height * gt[2], gt[3] + width * gt[4] + height * gt[5]
+        x3, y3 = gt[0] + height * gt[2], gt[3] + height * gt[5]
+        geom = box(min(x0, x1, x2, x3), min(y0, y1, y2, y3), max(x0, x1, x2, x3), max(y0, y1, y2, y3))
+        crs = CRS.from_wkt(proj) if proj else None
+        return geom, crs
+
+    # Try vector
+    ds = open_vector(cut_file)
+    if ds:
+        lyr = ds.GetLayer(0)
+        srs = lyr.GetSpatialRef()
+        crs = CRS.from_wkt(srs.ExportToWkt()) if srs else None
+        geoms = []
+        for feat in lyr:
+            geom = shape(feat.GetGeometryRef().__geo_interface__)
+            geoms.append(geom)
+        if geoms:
+            union = unary_union(geoms)
+            return union, crs
+    return None, None
+
+def grid_signature(ds):
+    # Rasters with equal signatures get the same cut mask
+    return tuple(ds.GetGeoTransform()), ds.RasterXSize, ds.RasterYSize, ds.GetProjection()
+
+class CutMask:
+    """
+    The cut geometry burnt into a grid: window is (xoff, yoff, xsize, ysize) in source pixel
+    coordinates (it may extend past the raster), mask is a boolean (ysize, xsize) array.
+    """
+
+    def __init__(self, window, mask):
+        self.window = window
+        self.mask = mask
+
+def build_cut_mask(ds, cut_geom, cut_crs, simplification=None):
+    """Rasterizes cut_geom on the grid of ds. Returns a CutMask, or None when the grid isn't supported."""
+    gt = ds.GetGeoTransform()
+    if gt[2] or gt[4]:
+        return None  # Rotated grids go through gdal.Warp
+    proj = ds.GetProjection()
+    in_crs = CRS.from_wkt(proj) if proj else None
+    if in_crs and cut_crs and in_crs != cut_crs:
+        with span("reproject cut geometry"):
+            cut_geom = transform_geometry(cut_geom, get_transformer(cut_crs, in_crs))
+    if simplification is not None:
+        cut_geom = simplification.for_pixel_size(cut_geom, min(abs(gt[1]), abs(gt[5])), proj)
+    minx, miny, maxx, maxy = cut_geom.bounds
+    # Pixel window of the cut bounds, snapped outwards to whole pixels
+    xs = sorted(((minx - gt[0]) / gt[1], (maxx - gt[0]) / gt[1]))
+    ys = sorted(((miny - gt[3]) / gt[5], (maxy - gt[3]) / gt[5]))
+    x0, y0 = math.floor(xs[0]), math.floor(ys[0])
+    xsize, ysize = math.ceil(xs[1]) - x0, math.ceil(ys[1]) - y0
+    if xsize <= 0 or ysize <= 0 or xsize * ysize > MAX_MASK_PIXELS:
+        return None
+
+    with span("rasterize cut mask", size=f"{xsize}x{ysize}"):
+        mem = gdal.GetDriverByName("MEM").Create("", xsize, ysize, 1, gdal.GDT_Byte)
+        mem.SetGeoTransform((gt[0] + x0 * gt[1], gt[1], 0.0, gt[3] + y0 * gt[5], 0.0, gt[5]))
+        vec = ogr.GetDriverByName("Memory").CreateDataSource("")
+        lyr = vec.CreateLayer("cut")
+        feat = ogr.Feature(lyr.GetLayerDefn())
+        feat.SetGeometry(ogr.CreateGeometryFromWkb(cut_geom.wkb))
+        lyr.CreateFeature(feat)
+        # Pixel-centre rule, like gdal.Warp's cutline
+        gdal.RasterizeLayer(mem, [1], lyr, burn_values=[1])
+        mask = mem.GetRasterBand(1).ReadAsArray().astype(bool)
+    return CutMask((x0, y0, xsize, ysize), mask)
+
+class CutMaskCache:
+    """Cut masks keyed by grid signature, so rasters that share a grid rasterize the cut only once."""
+
+    def __init__(self, cut_geom, cut_crs, max_bytes=MASK_CACHE_MAX_BYTES, simplification=None):
+        self.cut_geom = cut_geom
+        self.cut_crs = cut_crs
+        self.simplification = simplification
+        self.max_bytes = max_bytes
+        self._masks = OrderedDict()
+
+    def get(self, ds):
+        key = grid_signature(ds)
+        if key in self._masks:
+            self._masks.move_to_end(key)
+            return self._masks[key]
+        cut_mask = build_cut_mask(ds, self.cut_geom, self.cut_crs, self.simplification)
+        self._masks[key] = cut_mask
+        # Evict least recently used masks, but always keep the newest
+        while len(self._masks) > 1 and sum(m.mask.nbytes for m in self._masks.values() if m) > self.max_bytes:
+            self._masks.popitem(last=False)
+        return cut_mask
+
+@lru_cache(maxsize=None)
+def driver_for_ext(ext, capability, excluded=()):
+    """
+    Short name of the first driver with capability ("DCAP_RASTER" or "DCAP_VECTOR") that can
+    create files with this extension (without the dot), skipping excluded drivers; None if none can.
+    """
+    for i in range(gdal.GetDriverCount()):
+        driver = gdal.GetDriver(i)
+        md = driver.GetMetadata() or {}
+        if (md.get(capability) == "YES" and md.get("DCAP_CREATE") == "YES"
+                and driver.ShortName not in excluded
+                and ext in (md.get("DMD_EXTENSIONS") or "").split()):
+            return driver.ShortName
+    return None
+
+def vector_output_driver(out_file):
+    # Shapefile for extensions no vector driver claims
+    return driver_for_ext(os.path.splitext(out_file)[1].lower().lstrip("."), "DCAP_VECTOR") or "ESRI Shapefile"
+
+def _fits_dtype(value, dtype):
+    # Whether a nodata value can be stored in arrays of dtype without wrapping or overflowing
+    if np.issubdtype(dtype, np.integer):
+        info = np.iinfo(dtype)
+        return float(value).is_integer() and info.min <= value <= info.max
+    if np.issubdtype(dtype, np.floating):
+        return not np.isfinite(value) or abs(value) <= float(np.finfo(dtype).max)
+    return True
+
+def _source_creation_options(ds, driver):
+    """
+    Creation options that keep the layout of ds (block tiling, compression, predictor,
+    interleave), limited to the ones the output driver accepts.
+    """
+    structure = ds.GetMetadata("IMAGE_STRUCTURE") or {}
+    candidates = {}
+    compression = structure.get("COMPRESSION")
+    if compression == "YCbCr JPEG":
+        candidates.update(COMPRESS="JPEG", PHOTOMETRIC="YCBCR")
+    elif compression:
+        candidates["COMPRESS"] = compression
+    for name in ("PREDICTOR", "INTERLEAVE"):
+        if structure.get(name):
+            candidates[name] = structure[name]
+    block_x, block_y = ds.GetRasterBand(1).GetBlockSize()
+    if block_x < ds.RasterXSize:
+        candidates.update(TILED="YES", BLOCKXSIZE=str(block_x), BLOCKYSIZE=str(block_y))
+    accepted = driver.GetMetadataItem("DMD_CREATIONOPTIONLIST") or ""
+    return [f"{name}={value}" for name, value in candidates.items() if f"name='{name}'" in accepted]
+
+def cut_raster_masked(ds, out_file, cut_mask):
+    """
+    Writes the cut window of ds with pixels outside the mask set to nodata (0 when the raster
+    has none), the same fill gdal.Warp uses. The output stays on the input's pixel grid and,
+    like gdal.Warp's, keeps the input's metadata; it also keeps its tiling and compression.
+    Returns False if no driver can create out_file or a nodata value doesn't fit the data
+    type, so the caller can fall back to gdal.Warp.
+    """
+    from raster_utils import rows_per_chunk
+    driver_name = driver_for_ext(os.path.splitext(out_file)[1].lower().lstrip("."), "DCAP_RASTER",
+                                 MASKED_OUTPUT_EXCLUDED_DRIVERS)
+    if driver_name is None:
+        return False
+    gt = ds.GetGeoTransform()
+    x0, y0, xsize, ysize = cut_mask.window
+    first = ds.GetRasterBand(1)
+    dtype = gdal_array.GDALTypeCodeToNumericTypeCode(first.DataType)
+    nodata_values = [ds.GetRasterBand(b).GetNoDataValue() for b in range(1, ds.RasterCount + 1)]
+    if any(v is not None and not _fits_dtype(v, dtype) for v in nodata_values):
+        return False  # e.g. -9999 on a Byte raster: the fill would wrap around
+    driver = gdal.GetDriverByName(driver_name)
+    with span("create output", driver=driver_name):
+        out = driver.Create(out_file, xsize, ysize, ds.RasterCount, first.DataType,
+                            options=_source_creation_options(ds, driver))
+        if out is None:
+            return False
+        out.SetGeoTransform((gt[0] + x0 * gt[1], gt[1], 0.0, gt[3] + y0 * gt[5], 0.0, gt[5]))
+        out.SetProjection(ds.GetProjection())
+        out.SetMetadata(ds.GetMetadata() or {})
+
+    # Part of the window that lies on the raster
+    rx0, rx1 = max(x0, 0), min(x0 + xsize, ds.RasterXSize)
+    ry0, ry1 = max(y0, 0), min(y0 + ysize, ds.RasterYSize)
+    step = rows_per_chunk(first, xsize)
+    bands = []
+    for b, nodata in enumerate(nodata_values, start=1):
+        band = ds.GetRasterBand(b)
+        out_band = out.GetRasterBand(b)
+        if nodata is not None:
+            out_band.SetNoDataValue(nodata)
+        if band.GetColorTable() is not None:
+            out_band.SetColorTable(band.GetColorTable())
+        out_band.SetColorInterpretation(band.GetColorInterpretation())
+        out_band.SetMetadata(band.GetMetadata() or {})
+        if band.GetDescription():
+            out_band.SetDescription(band.GetDescription())
+        if band.GetScale() not in (None, 1) or band.GetOffset() not in (None, 0):
+            out_band.SetScale(band.GetScale() or 1)
+            out_band.SetOffset(band.GetOffset() or 0)
+        if band.GetUnitType():
+            out_band.SetUnitType(band.GetUnitType())
+        bands.append((band, out_band, nodata if nodata is not None else 0))
+
+    # One strip buffer, reused for every band and strip
+    buf = np.empty((step, xsize), dtype=dtype)
+    for yy in range(0, ysize, step):
+        n = min(step, ysize - yy)
+        strip = buf[:n]
+        outside = ~cut_mask.mask[yy:yy + n]
+        sy0, sy1 = max(y0 + yy, ry0), min(y0 + yy + n, ry1)
+        for b, (band, out_band, fill) in enumerate(bands, start=1):
+            strip.fill(fill)
+            if sy1 > sy0 and rx1 > rx0:
+                with span("read window", band=b, rows=sy1 - sy0):
+                    strip[sy0 - y0 - yy:sy1 - y0 - yy, rx0 - x0:rx1 - x0] = band.ReadAsArray(rx0, sy0, rx1 - rx0, sy1 - sy0)
+            with span("apply mask + write", band=b, rows=n):
+                strip[outside] = fill
+                out_band.WriteArray(strip, 0, yy)
+    with span("flush output"):
+        out.FlushCache()
+        out = None
+    return True
+
+def output_pixel_size(ds, in_crs, out_crs, target=None):
+    """Pixel size of a cut's output grid (approximate when reprojecting without a target resolution)."""
+    if target is not None and target.resolution:
+        return target.resolution
+    gt = ds.GetGeoTransform()
+    if not (in_crs and out_crs) or in_crs == out_crs:
+        return min(abs(gt[1]), abs(gt[5]))
+    # Raster extent in the output CRS, divided by the larger raster dimension
+    width, height = ds.RasterXSize, ds.RasterYSize
+    xs = (gt[0], gt[0] + width * gt[1])
+    ys = (gt[3], gt[3] + height * gt[5])
+    extent = transform_geometry(box(min(xs), min(ys), max(xs), max(ys)), get_transformer(in_crs, out_crs))
+    minx, miny, maxx, maxy = extent.bounds
+    return max((maxx - minx) / width, (maxy - miny) / height)
+
+def warp_settings(ds, cut_geom, cut_crs, target=None, simplification=None):
+    """
+    Returns (gdal.WarpOptions keyword arguments, cut geometry in the output CRS) for cutting ds,
+    reprojected and resampled to a TargetGrid if one is given, with the cut simplified to the
+    output pixel size if a CutSimplification says so.
+    """
+    with span("parse CRS"):
+        proj = ds.GetProjection()
+        in_crs = CRS.from_wkt(proj) if proj else None
+
+    # Transform cut_geom to the output CRS (the raster's unless a target CRS is set) if needed
+    out_crs = target.crs if target is not None and target.crs is not None else in_crs
+    if out_crs and cut_crs and out_crs != cut_crs:
+        with span("reproject cut geometry"):
+            cut_geom = transform_geometry(cut_geom, get_transformer(cut_crs, out_crs))
+    if simplification is not None:
+        pixel_size = output_pixel_size(ds, in_crs, out_crs, target)
+        cut_geom = simplification.for_pixel_size(cut_geom, pixel_size, out_crs.to_wkt() if out_crs else None)
+
+    if target is None:
+        # Use gdal.Warp for cropping
+        return dict(
+            outputBounds=cut_geom.bounds,
+            cropToCutline=True,
+            cutlineDSName=None,
+            cutlineLayer=None,
+            cutlineWkt=cut_geom.wkt
+        ), cut_geom
+    # Cut, reproject and resample in one pass; the cutline is given in the output CRS
+    return dict(
+        dstSRS=out_crs.to_wkt() if out_crs else None,
+        xRes=target.resolution or None,
+        yRes=target.resolution or None,
+        outputBounds=target.output_bounds(cut_geom.bounds),
+        resampleAlg=target.resampling,
+        errorThreshold=target.error_threshold,
+        cutlineWkt=cut_geom.wkt,
+        cutlineSRS=out_crs.to_wkt() if out_crs else None,
+    ), cut_geom
+
+def cut_raster(in_file, out_file, cut_geom, cut_crs, mask_cache=None, target=None, workers=1, simplification=None,
+               progress_callback=None, cancel_event=None):
+    """
+    Cuts a raster. With a CutMaskCache, the cut is applied through a (shared) rasterized mask
+    where possible; otherwise, and for grids the mask path doesn't handle, gdal.Warp is used.
+    With a TargetGrid that changes the grid, the output is cut, reprojected and resampled in
+    a single gdal.Warp pass. Rasters of at least TILED_WARP_MIN_PIXELS are warped in chunks
+    by up to `workers` processes (see tiled_warp), which report progress_callback(done, total)
+    per chunk and stop early when cancel_event is set.
+    """
+    if target is not None and not target.changes_grid():
+        target = None
+    # Open input raster
+    with span("gdal.Open", file=in_file):
+        ds = open_raster(in_file)
+    if ds is None:
+        raise Exception("Could not open raster.")
+    if mask_cache is not None and target is None:
+        cut_mask = mask_cache.get(ds)
+        if cut_mask is not None and cut_raster_masked(ds, out_file, cut_mask):
+            return
+    warp_kwargs, out_cut_geom = warp_settings(ds, cut_geom, cut_crs, target, simplification)
+    if workers > 1 and ds.RasterXSize * ds.RasterYSize >= TILED_WARP_MIN_PIXELS:
+        from tiled_warp import tiled_warp
+        with span("tiled warp", file=in_file, size=f"{ds.RasterXSize}x{ds.RasterYSize}x{ds.RasterCount}"):
+            tiled_warp(in_file, out_file, warp_kwargs, out_cut_geom, workers=workers,
+                       progress_callback=progress_callback, cancel_event=cancel_event)
+        return
+    with span("gdal.Warp", file=in_file, size=f"{ds.RasterXSize}x{ds.RasterYSize}x{ds.RasterCount}"):
+        result = gdal.Warp(out_file, ds, options=gdal.WarpOptions(**warp_kwargs))
+    if result is None:
+        raise Exception("gdal.Warp failed.")
+    with span("flush output"):
+        result.FlushCache()
+        result = None
+
+def _delete_vector_output(out_file, driver_name):
+    if os.path.exists(out_file):
+        ogr.GetDriverByName(driver_name).DeleteDataSource(out_file)
+
+def cut_vector(in_file, out_file, cut_geom, cut_crs, workers=1, engine="python", dst_crs=None):
+    """
+    Clips a vector layer to the cut geometry, written in the format of out_file's extension
+    and reprojected to dst_crs if given. engine "ogr" clips natively with gdal.VectorTranslate
+    and falls back to "python" (shapely) if that fails; with the python engine, layers of at
+    least PARALLEL_VECTOR_MIN_FEATURES features are clipped in up to `workers` processes.
+    Returns a warning message if the native clip fell back to python, else None.
+    """
+    # Open input vector
+    with span("ogr.Open", file=in_file):
+        ds = open_vector(in_file)
+    if ds is None:
+        raise Exception("Could not open vector.")
+    lyr = ds.GetLayer(0)
+    with span("parse CRS"):
+        srs = lyr.GetSpatialRef()
+        in_crs = CRS.from_wkt(srs.ExportToWkt()) if srs else None
+
+    # Transform cut_geom to vector CRS if needed
+    if in_crs and cut_crs and in_crs != cut_crs:
+        with span("reproject cut geometry"):
+            cut_geom = transform_geometry(cut_geom, get_transformer(cut_crs, in_crs))
+    if dst_crs is not None and (in_crs is None or dst_crs == in_crs):
+        dst_crs = None
+
+    warning = None
+    if engine == "ogr":
+        try:
+            with span("ogr clip", file=in_file):
+                _cut_vector_ogr(in_file, out_file, lyr, cut_geom, dst_crs)
+            return None
+        except RuntimeError as e:
+            # E.g. GDAL built without GEOS, which clipSrc needs
+            warning = f"native OGR clip failed ({str(e) or type(e).__name__}), clipped with Python instead"
+            add_duration("ogr clip failed, using python", 0.0, error=str(e))
+
+    partitions = None
+    out_driver = vector_output_driver(out_file)
+    if workers > 1 and out_driver not in NO_APPEND_VECTOR_DRIVERS:
+        partitions = vector_partitions(lyr, workers)
+    if partitions:
+        with span("parallel clip", partitions=len(partitions), workers=workers):
+            _cut_vector_parallel(in_file, out_file, lyr, cut_geom, partitions, workers, dst_crs)
+        return warning
+
+    out_ds, out_lyr = _create_vector_output(out_file, lyr, dst_crs)
+    transformer = get_transformer(in_crs, dst_crs) if dst_crs is not None else None
+    _clip_features(lyr, lyr.GetLayerDefn(), out_lyr, cut_geom, transformer)
+    with span("flush output"):
+        out_ds = None
+    return warning
+
+def _cut_vector_ogr(in_file, out_file, lyr, cut_geom, dst_crs=None):
+    # ogr2ogr -clipsrc: clipping, field copying and writing all stay in C++
+    driver_name = vector_output_driver(out_file)
+    _delete_vector_output(out_file, driver_name)
+    options = gdal.VectorTranslateOptions(
+        format=driver_name,
+        layers=[lyr.GetName()],
+        spatFilter=cut_geom.bounds,
+        clipSrc=cut_geom.wkt,
+        # Clipped parts may be multi-part, which single-type layers (e.g. FlatGeobuf) reject
+        geometryType="PROMOTE_TO_MULTI",
+        dstSRS=dst_crs.to_wkt() if dst_crs is not None else None,
+        reproject=dst_crs is not None,
+    )
+    result = gdal.VectorTranslate(out_file, in_file, options=options)
+    if result is None:
+        raise RuntimeError(gdal.GetLastErrorMsg() or "gdal.VectorTranslate failed")
+    with span("flush output"):
+        result = None
+
+def _clipped_geom_type(geom_type):
+    # Clipping can split a Polygon/LineString/Point into several parts, so single types become Multi*
+    if ogr.GT_Flatten(geom_type) in (ogr.wkbPoint, ogr.wkbLineString, ogr.wkbPolygon):
+        return ogr.GT_GetCollection(geom_type)
+    return geom_type
+
+def _conform_geometry(clipped, geom_type):
+    """
+    OGR geometry of a shapely clip result in the layer's geometry type: collections keep only
+    the parts of the layer's dimension (a polygon clip can touch the cut in a line or point).
+    Returns None if nothing of that dimension is left.
+    """
+    import shapely
+    dimension = {ogr.wkbMultiPoint: 0, ogr.wkbMultiLineString: 1, ogr.wkbMultiPolygon: 2}.get(ogr.GT_Flatten(geom_type))
+    if dimension is None:
+        return ogr.CreateGeometryFromWkb(clipped.wkb)
+    if clipped.geom_type == "GeometryCollection":
+        parts = shapely.get_parts(clipped)
+        parts = parts[shapely.get_dimensions(parts) == dimension]
+        if len(parts) == 0:
+            return None
+        clipped = shapely.geometrycollections(parts)
+    return ogr.ForceTo(ogr.CreateGeometryFromWkb(clipped.wkb), geom_type)
+
+def _create_vector_output(out_file, lyr, dst_crs=None):
+    # Driver from the output extension, with the input layer's (or dst_crs) CRS, geometry type and fields
+    driver_name = vector_output_driver(out_file)
+    _delete_vector_output(out_file, driver_name)
+    out_ds = ogr.GetDriverByName(driver_name).CreateDataSource(out_file)
+    srs = lyr.GetSpatialRef()
+    if dst_crs is not None:
+        from osgeo import osr
+        srs = osr.SpatialReference()
+        srs.ImportFromWkt(dst_crs.to_wkt())
+        srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+    out_lyr = out_ds.CreateLayer(lyr.GetName(), srs, _clipped_geom_type(lyr.GetGeomType()))
+    in_layer_defn = lyr.GetLayerDefn()
+    for i in range(in_layer_defn.GetFieldCount()):
+        out_lyr.CreateField(in_layer_defn.GetFieldDefn(i))
+    return out_ds, out_lyr
+
+def _clip_features(features, in_layer_defn, out_lyr, cut_geom, transformer=None):
+    # Per-feature spans would cost more than the work they measure, so with tracing on,
+    # read/clip/write times are summed over the loop and recorded once.
+    timed = tracing_enabled()
+    clock = time.perf_counter
+    read_s = clip_s = write_s = 0.0
+    count = 0
+    # From the input layer: the shapefile driver reports its Multi* layers as single types
+    geom_type = _clipped_geom_type(in_layer_defn.GetGeomType())
+    t = clock() if timed else 0.0
+    for feat in features:
+        geom = shape(feat.GetGeometryRef().__geo_interface__)
+        if timed:
+            now = clock()
+            read_s += now - t
+            t = now
+        clipped = geom.intersection(cut_geom)
+        if timed:
+            now = clock()
+            clip_s += now - t
+            t = now
+        if not clipped.is_empty:
+            if transformer is not None:
+                clipped = transform_geometry(clipped, transformer)
+            out_geom = _conform_geometry(clipped, geom_type)
+            if out_geom is not None:
+                out_feat = ogr.Feature(out_lyr.GetLayerDefn())
+                for i in range(in_layer_defn.GetFieldCount()):
+                    out_feat.SetField(in_layer_defn.GetFieldDefn(i).GetNameRef(), feat.GetField(i))
+                out_feat.SetGeometry(out_geom)
+                # Without gdal.UseExceptions() (the GUI), a rejected feature only shows in the return code
+                if out_lyr.CreateFeature(out_feat) != ogr.OGRERR_NONE:
+                    raise RuntimeError(f"Could not write feature {feat.GetFID()}: {gdal.GetLastErrorMsg()}")
+                out_feat = None
+        if timed:
+            now = clock()
+            write_s += now - t
+            t = now
+            count += 1
+    if timed:
+        add_duration("read features (sum)", read_s, features=count)
+        add_duration("clip features (sum)", clip_s, features=count)
+        add_duration("write features (sum)", write_s, features=count)
+
+def vector_partitions(lyr, workers):
+    """
+    Splits a big layer into about four slices per worker (none smaller than
+    MIN_PARTITION_FEATURES) for parallel clipping, or returns None if the layer is small.
+    Slices are ("index", start, stop) ranges for drivers with fast random access by
+    position (shapefiles), else ("fid", start, stop) FID ranges assuming roughly contiguous
+    FIDs; the first and last slices are open-ended so FIDs outside the estimate are still read.
+    """
+    count = lyr.GetFeatureCount(force=0)
+    if count < 0:
+        count = lyr.GetFeatureCount()
+    if count < PARALLEL_VECTOR_MIN_FEATURES:
+        return None
+    n = max(2, min(workers * 4, count // MIN_PARTITION_FEATURES))
+    step = math.ceil(count / n)
+    if lyr.TestCapability(ogr.OLCFastSetNextByIndex):
+        kind, first = "index", 0
+    else:
+        lyr.ResetReading()
+        feat = lyr.GetNextFeature()
+        lyr.ResetReading()
+        kind, first = "fid", feat.GetFID() if feat is not None else 0
+    bounds = [first + i * step for i in range(1, n)]
+    starts = [0 if kind == "index" else None] + bounds
+    stops = bounds + [None]
+    return [(kind, start, stop) for start, stop in zip(starts, stops)]
+
+def _partition_features(lyr, partition):
+    kind, start, stop = partition
+    if kind == "index":
+        lyr.SetNextByIndex(start)
+        remaining = stop - start if stop is not None else -1
+        while remaining != 0:
+            feat = lyr.GetNextFeature()
+            if feat is None:
+                return
+            yield feat
+            remaining -= 1
+    else:
+        clauses = ([f"FID >= {start}"] if start is not None else []) + ([f"FID < {stop}"] if stop is not None else [])
+        lyr.SetAttributeFilter(" AND ".join(clauses))
+        yield from lyr
+
+_worker_cut_geom = None
+_worker_dst_crs = None
+
+def _init_vector_worker(cut_wkb, dst_crs_wkt):
+    global _worker_cut_geom, _worker_dst_crs
+    import shapely
+    gdal.UseExceptions()
+    _worker_cut_geom = shapely.from_wkb(cut_wkb)
+    _worker_dst_crs = CRS.from_wkt(dst_crs_wkt) if dst_crs_wkt else None
+
+def _clip_partition(in_file, partition, part_file):
+    # Runs in a worker process: clips one slice of the layer into its own part file
+    lyr = open_vector(in_file).GetLayer(0)
+    out_ds, out_lyr = _create_vector_output(part_file, lyr, _worker_dst_crs)
+    transformer = None
+    if _worker_dst_crs is not None:
+        transformer = get_transformer(CRS.from_wkt(lyr.GetSpatialRef().ExportToWkt()), _worker_dst_crs)
+    _clip_features(_partition_features(lyr, partition), lyr.GetLayerDefn(), out_lyr, _worker_cut_geom, transformer)
+    out_ds = None
+    return part_file
+
+def _cut_vector_parallel(in_file, out_file, lyr, cut_geom, partitions, workers, dst_crs=None):
+    import multiprocessing
+    import shutil
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+
+    out_ds, out_lyr = _create_vector_output(out_file, lyr, dst_crs)
+    layer_name = out_lyr.GetName()
+    out_lyr = out_ds = None
+    # Parts in the output's own format, so field names and types survive the merge unchanged
+    ext = os.path.splitext(out_file)[1].lower()
+    # Parts next to the output, so merging doesn't copy across disks
+    part_dir = tempfile.mkdtemp(prefix=".parts_", dir=os.path.dirname(os.path.abspath(out_file)))
+    try:
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                 initializer=_init_vector_worker, initargs=(cut_geom.wkb, dst_crs.to_wkt() if dst_crs else None)) as pool:
+            futures = [
+                pool.submit(run_in_worker, tracing_enabled(), "clip partition",
+                            _clip_partition, in_file, partition, os.path.join(part_dir, f"part_{i:04d}{ext}"))
+                for i, partition in enumerate(partitions)
+            ]
+            parts = [merge_worker_spans(f.result()) for f in futures]
+        # Appended in slice order, so features keep the input's order
+        with span("merge parts", parts=len(parts)):
+            for part in parts:
+                result = gdal.VectorTranslate(out_file, part, accessMode="append", layerName=layer_name)
+                if result is None:
+                    raise RuntimeError(gdal.GetLastErrorMsg() or f"Could not append {os.path.basename(part)}")
+                result = None
+    finally:
+        shutil.rmtree(part_dir, ignore_errors=True)
+
+def cut_file(in_file, out_file, cut_geom, cut_crs, mask_cache=None, target=None, workers=1, simplification=None,
+             vector_engine="python", progress_callback=None, cancel_event=None):
+    """
+    Cuts one raster or vector file. Returns a warning message if it wasn't cut as asked, else None.
+    progress_callback/cancel_event are passed to cut_raster.
+    """
+    with span("cut file", file=display_name(in_file)):
+        # A pooled handle on an earlier output would keep it open (and locked on Windows)
+        release(out_file)
+        if is_raster(in_file):
+            if simplification is not None:
+                cut_geom = simplification.raster_geometry(cut_geom)
+            cut_raster(in_file, out_file, cut_geom, cut_crs, mask_cache, target, workers, simplification,
+                       progress_callback, cancel_event)
+            return None
+        else:
+            if simplification is not None:
+                cut_geom = simplification.vector_geometry(cut_geom)
+            # Vectors follow the target CRS too; pixel size and resampling don't apply
+            dst_crs = target.crs if target is not None else None
+            return cut_vector(in_file, out_file, cut_geom, cut_crs, workers, vector_engine, dst_crs)
+
+def _grid_key(path):
+    # Sort key that puts rasters sharing a grid next to each other (vectors and unreadable files last)
+    ds = open_raster(path)
+    return (0, repr(grid_signature(ds))) if ds is not None else (1, "")
+
+def cut_files(jobs, cut_geom, cut_crs, progress_callback=None, target=None, workers=1, simplification=None,
+              vector_engine="python", warnings=None, cancel_event=None):
+    """
+    Cuts (in_file, out_file) pairs. Rasters are grouped by grid signature so each group
+    rasterizes the cut once. progress_callback(done, total) is called after each file, and
+    with a fractional done while a large raster is warped in chunks. Setting cancel_event
+    stops the chunked warp in progress and skips the remaining files.
+    Returns a list of (in_file, error message) for files that failed; (in_file, message) for
+    files that were cut, but not as asked, are appended to the warnings list if one is given.
+    """
+    with span("group by grid"):
+        ordered = sorted(jobs, key=lambda job: _grid_key(job[0]))
+    raster_geom = simplification.raster_geometry(cut_geom) if simplification is not None else cut_geom
+    mask_cache = CutMaskCache(raster_geom, cut_crs, simplification=simplification)
+    failed = []
+    for i, (in_file, out_file) in enumerate(ordered):
+        if cancel_event is not None and cancel_event.is_set():
+            break
+        file_progress = None
+        if progress_callback:
+            file_progress = lambda done, total: progress_callback(i + done / total, len(ordered))
+        try:
+            warning = cut_file(in_file, out_file, cut_geom, cut_crs, mask_cache, target, workers, simplification,
+                               vector_engine, file_progress, cancel_event)
+            if warning and warnings is not None:
+                warnings.append((in_file, warning))
+        except Exception as e:
+            failed.append((in_file, str(e)))
+        if progress_callback:
+            progress_callback(i + 1, len(ordered))
+    return failed
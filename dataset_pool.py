@@ -0,0 +1,163 @@
+"""
+Process-wide pool of open GDAL/OGR datasets.
+
+Opening a dataset re-parses its headers, which is slow for big VRTs, NetCDF and GeoPackages,
+and the same file is typically opened several times in a row (is it a raster? what's its
+grid? cut it; show it; inspect it). open_raster()/open_vector() hand out cached read-only
+handles instead:
+
+- Handles are per thread (GDAL datasets must not be used from two threads at once), so each
+  thread gets its own handle for a path and never sees another thread's.
+- A thread's handles are dropped when the thread ends (Python or Qt thread alike: its
+  thread-local storage is cleared), or earlier when it calls release_thread().
+- A handle is reopened when the file's size or mtime changed since it was opened.
+- At most MAX_OPEN_HANDLES are kept; the least recently used are dropped first. A dropped
+  handle closes once its last user lets go of it.
+- Failed opens are remembered as well, so probing a vector file as a raster is done once.
+
+Handles are shared, so callers must not modify them. Call release(path) before overwriting
+or deleting a file that may have been opened through the pool.
+"""
+from collections import OrderedDict
+import itertools
+import os
+import threading
+import weakref
+
+from archive_inputs import local_path
+
+MAX_OPEN_HANDLES = 64
+
+def _signature(path):
+    # Archive members change when their archive does; remote/virtual paths are never revalidated
+    try:
+        st = os.stat(local_path(path))
+    except OSError:
+        return None if not path.startswith("/vsi") else ("virtual",)
+    return st.st_size, st.st_mtime_ns
+
+def _open(path, kind):
+    from osgeo import gdal, ogr
+    try:
+        return gdal.Open(path) if kind == "raster" else ogr.Open(path)
+    except RuntimeError:  # With gdal.UseExceptions()
+        return None
+
+def _reset_layers(ds):
+    # A previous user may have left a layer half-read or filtered
+    for i in range(ds.GetLayerCount()):
+        lyr = ds.GetLayer(i)
+        lyr.SetSpatialFilter(None)
+        lyr.SetAttributeFilter(None)
+        lyr.ResetReading()
+
+
+class _ThreadToken:
+    # Kept in a thread's threading.local storage, so it is collected when the thread ends
+    __slots__ = ("owner", "__weakref__")
+
+    def __init__(self, owner):
+        self.owner = owner
+
+
+class DatasetPool:
+    def __init__(self, max_open=MAX_OPEN_HANDLES):
+        self.max_open = max_open
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._handles = OrderedDict()  # (owner, kind, path) -> (signature, dataset or None)
+        self._local = threading.local()
+        # Owners are never reused, unlike thread idents
+        self._owners = itertools.count()
+        self._ended = []  # Owners of threads that ended, pruned on the next insert
+
+    def _owner(self):
+        token = getattr(self._local, "token", None)
+        if token is None:
+            token = self._local.token = _ThreadToken(next(self._owners))
+            # Runs in whichever thread drops the token, possibly while it holds the lock, so it
+            # only queues the owner (list.append is atomic)
+            weakref.finalize(token, self._ended.append, token.owner).atexit = False
+        return token.owner
+
+    def open(self, path, kind="raster"):
+        """Returns a read-only dataset for path ("raster": gdal.Open, "vector": ogr.Open), or None."""
+        key = (self._owner(), kind, path)
+        signature = _signature(path)
+        with self._lock:
+            entry = self._handles.get(key)
+            if entry is not None and entry[0] == signature:
+                self._handles.move_to_end(key)
+                self.hits += 1
+                ds = entry[1]
+            else:
+                self.misses += 1
+                entry = None
+        if entry is not None:
+            if ds is not None and kind == "vector":
+                _reset_layers(ds)
+            return ds
+        ds = _open(path, kind)
+        if signature is None:
+            return ds  # Missing file: nothing to validate a cached entry against
+        with self._lock:
+            self._prune_ended()
+            self._handles[key] = (signature, ds)
+            self._handles.move_to_end(key)
+            while len(self._handles) > self.max_open:
+                self._handles.popitem(last=False)
+        return ds
+
+    def _prune_ended(self):
+        if not self._ended:
+            return
+        ended = set()
+        while self._ended:
+            ended.add(self._ended.pop())
+        for key in [k for k in self._handles if k[0] in ended]:
+            del self._handles[key]
+
+    def release_thread(self):
+        """Drops the calling thread's handles, e.g. when a task on a long-lived worker thread ends."""
+        token = getattr(self._local, "token", None)
+        if token is None:
+            return
+        with self._lock:
+            for key in [k for k in self._handles if k[0] == token.owner]:
+                del self._handles[key]
+
+    def release(self, path):
+        """Drops every thread's handle for path."""
+        with self._lock:
+            for key in [k for k in self._handles if k[2] == path]:
+                del self._handles[key]
+
+    def clear(self):
+        with self._lock:
+            self._handles.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"open": len(self._handles), "hits": self.hits, "misses": self.misses}
+
+
+_pool = DatasetPool()
+
+def open_raster(path):
+    return _pool.open(path, "raster")
+
+def open_vector(path):
+    return _pool.open(path, "vector")
+
+def release(path):
+    _pool.release(path)
+
+def release_thread():
+    _pool.release_thread()
+
+def clear():
+    _pool.clear()
+
+def stats():
+    return _pool.stats()
@@ -0,0 +1,156 @@
+"""
+Streaming polygon writers (KML, KMZ, Shapefile, GeoPackage) in WGS84.
+
+Features are written chunk by chunk as they are produced, so the full document is never
+held in memory. All writers share one interface:
+
+    with open_feature_writer(path, fields=[('NAME', 'str'), ('ZONE', 'int')]) as w:
+        w.write_polygons(rings, {'NAME': names, 'ZONE': zones})
+
+rings is an (n, k, 2) array of closed lon/lat rings; attribute arrays have length n.
+"""
+import os
+import zipfile
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+FEATURE_EXTS = {".kml": "KML", ".kmz": "KMZ", ".shp": "ESRI Shapefile", ".gpkg": "GPKG"}
+FEATURE_FILTER = "KML (*.kml);;KMZ (*.kmz);;Shapefile (*.shp);;GeoPackage (*.gpkg)"
+# Features per OGR transaction; GeoPackage inserts are far faster in large transactions
+OGR_TRANSACTION_SIZE = 50_000
+
+KML_HEADER = """<?xml version="1.0" encoding="UTF-8"?>
+<kml xmlns="http://www.opengis.net/kml/2.2">
+<Document>
+"""
+KML_FOOTER = """</Document>
+</kml>
+"""
+
+def close_rings(rings):
+    # Appends the first vertex when rings are not closed yet: (n, k, 2) -> (n, k + 1, 2)
+    rings = np.asarray(rings, dtype=float)
+    if rings.shape[1] and np.array_equal(rings[:, 0], rings[:, -1]):
+        return rings
+    return np.concatenate([rings, rings[:, :1]], axis=1)
+
+class KMLFeatureWriter:
+    def __init__(self, path, fields, kmz=False):
+        self.fields = [name for name, _ in fields]
+        self.name_field = next((f for f in self.fields if f.lower() == 'name'), None)
+        if kmz:
+            self._zip = zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED)
+            self._raw = self._zip.open('doc.kml', 'w', force_zip64=True)
+            self._write = lambda text: self._raw.write(text.encode('utf-8'))
+        else:
+            self._zip = None
+            self._raw = open(path, 'w', encoding='utf-8')
+            self._write = self._raw.write
+        self._write(KML_HEADER)
+
+    def write_polygons(self, rings, attributes=None):
+        rings = close_rings(rings)
+        attributes = attributes or {}
+        parts = []
+        for i, ring in enumerate(rings):
+            coords_str = " ".join(f"{lon},{lat},0" for lon, lat in ring)
+            name = escape(str(attributes[self.name_field][i])) if self.name_field in attributes else ""
+            extra = "".join(
+                f'<Data name="{escape(f)}"><value>{escape(str(attributes[f][i]))}</value></Data>'
+                for f in self.fields if f != self.name_field and f in attributes
+            )
+            parts.append(
+                f"  <Placemark>\n"
+                f"    <name>{name}</name>\n"
+                + (f"    <ExtendedData>{extra}</ExtendedData>\n" if extra else "")
+                + f"    <Polygon><outerBoundaryIs><LinearRing><coordinates>{coords_str}</coordinates></LinearRing></outerBoundaryIs></Polygon>\n"
+                f"  </Placemark>\n"
+            )
+        self._write("".join(parts))
+
+    def close(self):
+        if self._raw is None:
+            return
+        self._write(KML_FOOTER)
+        self._raw.close()
+        if self._zip is not None:
+            self._zip.close()
+        self._raw = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class OGRFeatureWriter:
+    def __init__(self, path, fields, driver_name):
+        from osgeo import ogr, osr
+        self._ogr = ogr
+        driver = ogr.GetDriverByName(driver_name)
+        if os.path.exists(path):
+            driver.DeleteDataSource(path)
+        self.ds = driver.CreateDataSource(path)
+        if self.ds is None:
+            raise RuntimeError(f"Could not create {path}")
+        srs = osr.SpatialReference()
+        srs.ImportFromEPSG(4326)
+        srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+        layer_name = os.path.splitext(os.path.basename(path))[0]
+        self.layer = self.ds.CreateLayer(layer_name, srs, ogr.wkbPolygon)
+        ogr_types = {'str': ogr.OFTString, 'int': ogr.OFTInteger64, 'float': ogr.OFTReal}
+        for name, kind in fields:
+            self.layer.CreateField(ogr.FieldDefn(name, ogr_types[kind]))
+        self.fields = [name for name, _ in fields]
+        self.defn = self.layer.GetLayerDefn()
+        self._in_transaction = 0
+        self.layer.StartTransaction()
+
+    def write_polygons(self, rings, attributes=None):
+        import shapely
+        attributes = attributes or {}
+        ogr = self._ogr
+        # One vectorized call builds all WKB blobs for the chunk
+        wkbs = shapely.to_wkb(shapely.polygons(close_rings(rings)))
+        # Fields were created in order, so their position is their index (shapefiles may truncate names)
+        columns = [
+            (field_index, np.asarray(attributes[f]).tolist())
+            for field_index, f in enumerate(self.fields) if f in attributes
+        ]
+        for i, wkb in enumerate(wkbs):
+            feat = ogr.Feature(self.defn)
+            for field_index, values in columns:
+                feat.SetField(field_index, values[i])
+            feat.SetGeometryDirectly(ogr.CreateGeometryFromWkb(wkb))
+            self.layer.CreateFeature(feat)
+            self._in_transaction += 1
+            if self._in_transaction >= OGR_TRANSACTION_SIZE:
+                self.layer.CommitTransaction()
+                self.layer.StartTransaction()
+                self._in_transaction = 0
+
+    def close(self):
+        if self.ds is None:
+            return
+        self.layer.CommitTransaction()
+        self.layer = None
+        self.ds = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def open_feature_writer(path, fields):
+    """
+    Picks a writer from the file extension (.kml, .kmz, .shp, .gpkg).
+    fields: list of (name, kind) with kind in 'str', 'int', 'float'.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FEATURE_EXTS:
+        raise ValueError(f"Unsupported output format '{ext}' (use {', '.join(FEATURE_EXTS)})")
+    if ext in (".kml", ".kmz"):
+        return KMLFeatureWriter(path, fields, kmz=ext == ".kmz")
+    return OGRFeatureWriter(path, fields, FEATURE_EXTS[ext])
@@ -2,24 +2,110 @@
 GIS utility functions: coordinate transforms, bbox, city lookup, etc.
 """
 
+from functools import lru_cache
+import threading
+
+import numpy as np
 from pyproj import Transformer
-from shapely.geometry import Point
-from resources.cities import CITIES
-import math
+from resources.city_index import get_city_index
+
+# Max number of cached transformers (each UTM zone/hemisphere pair is one entry per thread)
+TRANSFORMER_CACHE_SIZE = 256
+
+def utm_crs(zone, is_north):
+    return f"epsg:326{zone:02d}" if is_north else f"epsg:327{zone:02d}"
+
+@lru_cache(maxsize=TRANSFORMER_CACHE_SIZE)
+def _cached_transformer(src_crs, dst_crs, thread_id):
+    return Transformer.from_crs(src_crs, dst_crs, always_xy=True)
+
+def get_transformer(src_crs, dst_crs):
+    # Building a Transformer takes milliseconds, so reuse them. pyproj transformers are not
+    # safe to share between threads, hence the thread id in the cache key.
+    return _cached_transformer(src_crs, dst_crs, threading.get_ident())
+
+def transform_geometry(geom, transformer):
+    # Transforms all coordinates of a shapely geometry in one vectorized call
+    import shapely
+    def _transform(coords):
+        x, y = transformer.transform(coords[:, 0], coords[:, 1])
+        return np.column_stack([x, y])
+    return shapely.transform(geom, _transform)
+
+def utm_zone(lon):
+    # Works for scalars and NumPy arrays; lon=180 belongs to zone 60
+    if np.ndim(lon):
+        return np.clip(np.floor((np.asarray(lon, dtype=float) + 180) / 6).astype(int) + 1, 1, 60)
+    return min(int((lon + 180) / 6) + 1, 60)
 
 def latlon_to_utm(lat, lon):
-    zone = int((lon + 180) / 6) + 1
+    zone = utm_zone(lon)
     is_north = lat >= 0
-    transformer = Transformer.from_crs("epsg:4326", f"epsg:326{zone:02d}" if is_north else f"epsg:327{zone:02d}", always_xy=True)
+    transformer = get_transformer("epsg:4326", utm_crs(zone, is_north))
     easting, northing = transformer.transform(lon, lat)
     return easting, northing, zone, is_north
 
 def utm_to_latlon(easting, northing, zone, is_north):
-    transformer = Transformer.from_crs(f"epsg:326{zone:02d}" if is_north else f"epsg:327{zone:02d}", "epsg:4326", always_xy=True)
+    transformer = get_transformer(utm_crs(zone, is_north), "epsg:4326")
     lon, lat = transformer.transform(easting, northing)
     return lat, lon
 
+def _zone_groups(zone, is_north):
+    # Yields (zone, is_north, index array) for each distinct zone/hemisphere pair
+    keys = np.asarray(zone, dtype=int) * 2 + np.asarray(is_north, dtype=bool)
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    if unique_keys.size == 1:
+        yield int(unique_keys[0]) // 2, bool(unique_keys[0] % 2), slice(None)
+        return
+    order = np.argsort(inverse, kind='stable')
+    bounds = np.searchsorted(inverse[order], np.arange(unique_keys.size + 1))
+    for i, key in enumerate(unique_keys):
+        yield int(key) // 2, bool(key % 2), order[bounds[i]:bounds[i + 1]]
+
+def latlon_to_utm_array(lat, lon, zone=None):
+    """
+    Vectorized latlon_to_utm for NumPy arrays of points. Points are grouped by UTM zone and
+    hemisphere (auto-detected per point unless zone is given) and each group is converted
+    with a single transformer call. Returns (easting, northing, zone, is_north) arrays.
+    """
+    lat = np.asarray(lat, dtype=float).ravel()
+    lon = np.asarray(lon, dtype=float).ravel()
+    if zone is None:
+        zones = utm_zone(lon)
+    else:
+        zones = np.broadcast_to(np.asarray(zone, dtype=int), lat.shape)
+    is_north = lat >= 0
+    easting = np.empty_like(lat)
+    northing = np.empty_like(lat)
+    if lat.size == 0:
+        return easting, northing, np.asarray(zones, dtype=int), is_north
+    for z, north, idx in _zone_groups(zones, is_north):
+        transformer = get_transformer("epsg:4326", utm_crs(z, north))
+        easting[idx], northing[idx] = transformer.transform(lon[idx], lat[idx])
+    return easting, northing, np.asarray(zones, dtype=int), is_north
+
+def utm_to_latlon_array(easting, northing, zone, is_north):
+    """
+    Vectorized utm_to_latlon. zone and is_north may be scalars or per-point arrays.
+    Returns (lat, lon) arrays.
+    """
+    easting = np.asarray(easting, dtype=float).ravel()
+    northing = np.asarray(northing, dtype=float).ravel()
+    zones = np.broadcast_to(np.asarray(zone, dtype=int), easting.shape)
+    norths = np.broadcast_to(np.asarray(is_north, dtype=bool), easting.shape)
+    lat = np.empty_like(easting)
+    lon = np.empty_like(easting)
+    if easting.size == 0:
+        return lat, lon
+    for z, north, idx in _zone_groups(zones, norths):
+        transformer = get_transformer(utm_crs(z, north), "epsg:4326")
+        lon[idx], lat[idx] = transformer.transform(easting[idx], northing[idx])
+    return lat, lon
+
 def round_to_nearest(value, nearest):
+    # Works for scalars and NumPy arrays (both round half to even)
+    if isinstance(value, np.ndarray):
+        return np.round(value / nearest) * nearest
     return round(value / nearest) * nearest
 
 def get_bbox_from_centroid(easting, northing, width, height):
@@ -39,12 +125,6 @@ def meters_to_miles(m):
     return m * 0.000621371
 
 def get_nearest_city(centroid):
-    # centroid: (lat, lon)
-    min_dist = float('inf')
-    nearest = None
-    for city in CITIES:
-        dist = math.hypot(city['lat'] - centroid[0], city['lon'] - centroid[1])
-        if dist < min_dist:
-            min_dist = dist
-            nearest = city['name']
-    return nearest
+    # centroid: (lat, lon); None when the city index is empty
+    place = get_city_index().nearest(centroid[0], centroid[1])
+    return place[0] if place else None
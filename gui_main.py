@@ -1,15 +1,29 @@
 """
 Main GUI window and tab management for Python GIS Data Swiss Army Knife
 """
-from PySide6.QtWidgets import QMainWindow, QTabWidget
-from tabs.tab_kml_bbox import KMLBoundingBoxTab
-from tabs.tab_gdal_info import GDALInfoTab
-from tabs.tab_geotiff_display import RasterDisplayTab
-from tabs.tab_batch_cut import BatchCutTab
+import importlib
+from PySide6.QtWidgets import QMainWindow, QTabWidget, QWidget, QVBoxLayout
+from PySide6.QtCore import QTimer
+import startup_timing
+
+# (tab label, module, class). Tabs are imported and built the first time they are shown,
+# so startup only pays for the one that is visible.
+TABS = [
+    ("Create KML Bounding Box", "tabs.tab_kml_bbox", "KMLBoundingBoxTab"),
+    ("GDAL Info on File", "tabs.tab_gdal_info", "GDALInfoTab"),
+    ("Display Raster File (GeoTiff/IMG)", "tabs.tab_geotiff_display", "RasterDisplayTab"),
+    ("Batch Cut", "tabs.tab_batch_cut", "BatchCutTab"),
+    ("Bulk Convert Points", "tabs.tab_bulk_convert", "BulkConvertTab"),
+    ("UTM Tiling Grid", "tabs.tab_utm_grid", "UTMGridTab"),
+]
 
 def launch_gui(app):
-    window = MainWindow()
-    window.show()
+    with startup_timing.phase("main window"):
+        window = MainWindow()
+    with startup_timing.phase("show window"):
+        window.show()
+    # Report once the event loop is running, i.e. after the first paint has been queued
+    QTimer.singleShot(0, startup_timing.report)
     app.exec()
 
 class MainWindow(QMainWindow):
@@ -19,7 +33,25 @@ class MainWindow(QMainWindow):
         self.resize(900, 700)
         self.tabs = QTabWidget()
         self.setCentralWidget(self.tabs)
-        self.tabs.addTab(KMLBoundingBoxTab(self), "Create KML Bounding Box")
-        self.tabs.addTab(GDALInfoTab(self), "GDAL Info on File")
-        self.tabs.addTab(RasterDisplayTab(self), "Display Raster File (GeoTiff/IMG)")
-        self.tabs.addTab(BatchCutTab(self), "Batch Cut")
\ No newline at end of file
+        self.tab_widgets = {}
+        for label, _, _ in TABS:
+            # Placeholder page; the real tab is built into it on first show
+            page = QWidget()
+            page_layout = QVBoxLayout(page)
+            page_layout.setContentsMargins(0, 0, 0, 0)
+            self.tabs.addTab(page, label)
+        self.tabs.currentChanged.connect(self.ensure_tab)
+        self.ensure_tab(self.tabs.currentIndex())
+
+    def ensure_tab(self, index):
+        """Imports and builds the tab at index if it hasn't been yet. Returns the tab widget."""
+        if index < 0 or index in self.tab_widgets:
+            return self.tab_widgets.get(index)
+        label, module_name, class_name = TABS[index]
+        with startup_timing.phase(f"tab: {label}"):
+            tab_class = getattr(importlib.import_module(module_name), class_name)
+            page = self.tabs.widget(index)
+            tab = tab_class(self)
+            page.layout().addWidget(tab)
+        self.tab_widgets[index] = tab
+        return tab
@@ -2,9 +2,11 @@
 Python GIS Data Swiss Army Knife
 Entry point. Checks dependencies and launches the main GUI.
 """
+import startup_timing
 import sys
-import importlib
-from PySide6.QtWidgets import QApplication, QMessageBox
+import importlib.util
+with startup_timing.phase("import PySide6"):
+    from PySide6.QtWidgets import QApplication, QMessageBox
 
 REQUIRED_MODULES = [
     ("PySide6", "pip install PySide6"),
@@ -15,11 +17,14 @@ REQUIRED_MODULES = [
 ]
 
 def check_dependencies():
+    # Spec lookup only: finds the modules without paying for importing them
     missing = []
     for mod, install in REQUIRED_MODULES:
         try:
-            importlib.import_module(mod)
-        except ImportError:
+            found = importlib.util.find_spec(mod) is not None
+        except (ImportError, ValueError):
+            found = False
+        if not found:
             missing.append((mod, install))
     return missing
 
@@ -35,12 +40,15 @@ def show_missing_dialog(missing):
     msg.exec()
 
 def main():
-    app = QApplication(sys.argv)
-    missing = check_dependencies()
+    with startup_timing.phase("QApplication"):
+        app = QApplication(sys.argv)
+    with startup_timing.phase("dependency check"):
+        missing = check_dependencies()
     if missing:
         show_missing_dialog(missing)
         sys.exit(1)
-    from gui_main import launch_gui
+    with startup_timing.phase("import gui_main"):
+        from gui_main import launch_gui
     launch_gui(app)
 
 if __name__ == "__main__":
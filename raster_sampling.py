@@ -0,0 +1,358 @@
+"""
+Raster values at point locations, for millions of points from a CSV/Parquet table or a point layer.
+
+Points are handled in chunks. A chunk's coordinates are transformed to the raster CRS in one
+vectorized pyproj call and turned into pixel indices with the inverse geotransform. The points
+are then sorted by the raster block they fall in, each touched block is read once (per band)
+and its values are gathered with NumPy fancy indexing: one read per touched block and a few
+array operations per point, instead of one read per point. Blocks touched again by a later
+chunk usually come from GDAL's block cache. Chunks are sampled on a few threads (each with its
+own raster handle) and written in input order.
+
+Sampling is nearest pixel or bilinear (between the four surrounding pixel centres, weighting
+only the neighbours that have data). Points outside the raster or on nodata/masked pixels get
+NaN. The output table has all input columns plus one band_<n> column per sampled band.
+
+    python raster_sampling.py dem.tif points.csv elevation.parquet --method bilinear
+    python raster_sampling.py landcover.tif wells.gpkg wells_landcover.csv --bands 1
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import tracing
+from table_io import DEFAULT_CHUNK_ROWS, PARQUET_EXTS, TableWriter, count_rows, iter_table_chunks, numeric_column, read_header
+
+SAMPLING_METHODS = ("nearest", "bilinear")
+TABLE_EXTS = (".csv", ".txt") + PARQUET_EXTS
+# Tried in order when the coordinate columns aren't given: (x column, y column, CRS of the
+# values, None meaning the raster's own CRS). Matched case-insensitively.
+XY_COLUMN_GUESSES = (
+    ("lon", "lat", "EPSG:4326"),
+    ("longitude", "latitude", "EPSG:4326"),
+    ("lng", "lat", "EPSG:4326"),
+    ("x", "y", None),
+    ("easting", "northing", None),
+)
+DEFAULT_WORKERS = 4
+
+def is_table(path):
+    return os.path.splitext(path)[1].lower() in TABLE_EXTS
+
+def guess_xy_columns(names):
+    """(x column, y column, CRS or None) of the first XY_COLUMN_GUESSES pair found in names, else None."""
+    by_lower = {name.lower(): name for name in names}
+    for x_name, y_name, crs in XY_COLUMN_GUESSES:
+        if x_name in by_lower and y_name in by_lower:
+            return by_lower[x_name], by_lower[y_name], crs
+    return None
+
+def invert_geotransform(gt):
+    det = gt[1] * gt[5] - gt[2] * gt[4]
+    if det == 0:
+        raise ValueError("The raster's geotransform is not invertible")
+    inv1, inv2 = gt[5] / det, -gt[2] / det
+    inv4, inv5 = -gt[4] / det, gt[1] / det
+    return -(inv1 * gt[0] + inv2 * gt[3]), inv1, inv2, -(inv4 * gt[0] + inv5 * gt[3]), inv4, inv5
+
+def pixel_coordinates(x, y, inv_gt):
+    """Fractional (column, row) of map coordinates; pixel (i, j) covers columns [i, i + 1) and rows [j, j + 1)."""
+    return inv_gt[0] + inv_gt[1] * x + inv_gt[2] * y, inv_gt[3] + inv_gt[4] * x + inv_gt[5] * y
+
+def block_groups(block_ids):
+    """Groups equal ids: (sort order, group ids, start, stop); order[start:stop] indexes one group."""
+    order = np.argsort(block_ids, kind="stable")
+    sorted_ids = block_ids[order]
+    starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]]) if len(sorted_ids) else np.empty(0, dtype=np.int64)
+    stops = np.r_[starts[1:], len(sorted_ids)].astype(np.int64)
+    return order, sorted_ids[starts], starts, stops
+
+def format_throughput(points, seconds):
+    return f"{points / max(seconds, 1e-9) / 1e6:.2f} M points/s"
+
+
+class RasterSampler:
+    """
+    Samples bands of an open raster at map coordinates. Holds a GDAL handle, so use one per thread.
+    """
+
+    def __init__(self, ds, bands=None, method="nearest"):
+        from osgeo import gdal
+        if method not in SAMPLING_METHODS:
+            raise ValueError(f"Unknown sampling method {method} (use one of {', '.join(SAMPLING_METHODS)})")
+        self.ds = ds
+        self.bands = list(bands or range(1, ds.RasterCount + 1))
+        for b in self.bands:
+            if not 1 <= b <= ds.RasterCount:
+                raise ValueError(f"Band {b} does not exist (the raster has {ds.RasterCount})")
+        self.method = method
+        self.width, self.height = ds.RasterXSize, ds.RasterYSize
+        self.inv_gt = invert_geotransform(ds.GetGeoTransform())
+        self.block_w, self.block_h = ds.GetRasterBand(self.bands[0]).GetBlockSize()
+        self.blocks_x = (self.width + self.block_w - 1) // self.block_w
+        self.nodata = []
+        self.masks = []
+        for b in self.bands:
+            band = ds.GetRasterBand(b)
+            flags = band.GetMaskFlags()
+            self.nodata.append(band.GetNoDataValue() if flags == gdal.GMF_NODATA else None)
+            # Per-dataset masks and alpha bands are read alongside the data
+            self.masks.append(band.GetMaskBand() if not flags & (gdal.GMF_ALL_VALID | gdal.GMF_NODATA) else None)
+        self.blocks_read = 0
+
+    def sample(self, x, y):
+        """Values (n, bands) as float64 at x/y in the raster CRS; NaN outside the raster or without data."""
+        out = np.full((len(x), len(self.bands)), np.nan)
+        col, row = pixel_coordinates(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64), self.inv_gt)
+        # NaN coordinates fail every comparison, so they count as outside
+        inside = np.flatnonzero((col >= 0) & (col < self.width) & (row >= 0) & (row < self.height))
+        if inside.size == 0:
+            return out
+        col, row = col[inside], row[inside]
+        if self.method == "bilinear":
+            self._sample_bilinear(col, row, inside, out)
+        else:
+            self._sample_nearest(col.astype(np.int64), row.astype(np.int64), inside, out)
+        return out
+
+    def _windows(self, cols, rows, margin=0):
+        # Yields (window, point indexes) per touched block; margin extends windows right/down
+        block_ids = (rows // self.block_h) * self.blocks_x + cols // self.block_w
+        order, ids, starts, stops = block_groups(block_ids)
+        for block, start, stop in zip(ids.tolist(), starts.tolist(), stops.tolist()):
+            by, bx = divmod(block, self.blocks_x)
+            xoff, yoff = bx * self.block_w, by * self.block_h
+            yield (xoff, yoff, min(self.block_w + margin, self.width - xoff),
+                   min(self.block_h + margin, self.height - yoff)), order[start:stop]
+
+    def _read(self, window):
+        # [(data, mask or None)] per band
+        self.blocks_read += 1
+        blocks = []
+        for b, mask in zip(self.bands, self.masks):
+            data = self.ds.GetRasterBand(b).ReadAsArray(*window)
+            blocks.append((data, mask.ReadAsArray(*window) if mask is not None else None))
+        return blocks
+
+    def _values(self, block, j, rows, cols):
+        # Gathers in the band's own type, then float64 with NaN where there is no data
+        data, mask = block
+        raw = data[rows, cols]
+        values = raw.astype(np.float64)
+        if self.nodata[j] is not None:
+            values[raw == self.nodata[j]] = np.nan
+        if mask is not None:
+            values[mask[rows, cols] == 0] = np.nan
+        return values
+
+    def _sample_nearest(self, cols, rows, inside, out):
+        for window, sel in self._windows(cols, rows):
+            r, c = rows[sel] - window[1], cols[sel] - window[0]
+            dest = inside[sel]
+            for j, block in enumerate(self._read(window)):
+                out[dest, j] = self._values(block, j, r, c)
+
+    def _sample_bilinear(self, col, row, inside, out):
+        # Between pixel centres (i + 0.5, j + 0.5); at the raster edge the edge pixels are repeated
+        fx, fy = col - 0.5, row - 0.5
+        x0, y0 = np.floor(fx), np.floor(fy)
+        dx, dy = fx - x0, fy - y0
+        x0, y0 = x0.astype(np.int64), y0.astype(np.int64)
+        x1, y1 = np.minimum(x0 + 1, self.width - 1), np.minimum(y0 + 1, self.height - 1)
+        x0, y0 = np.maximum(x0, 0), np.maximum(y0, 0)
+        # Grouped by the upper-left neighbour; a one-pixel margin brings in the other three
+        for window, sel in self._windows(x0, y0, margin=1):
+            xoff, yoff = window[:2]
+            c0, c1, r0, r1 = x0[sel] - xoff, x1[sel] - xoff, y0[sel] - yoff, y1[sel] - yoff
+            wx, wy = dx[sel], dy[sel]
+            weights = ((1 - wx) * (1 - wy), wx * (1 - wy), (1 - wx) * wy, wx * wy)
+            dest = inside[sel]
+            for j, block in enumerate(self._read(window)):
+                total = np.zeros(len(sel))
+                weight_sum = np.zeros(len(sel))
+                for (r, c), weight in zip(((r0, c0), (r0, c1), (r1, c0), (r1, c1)), weights):
+                    values = self._values(block, j, r, c)
+                    valid = ~np.isnan(values)
+                    total += np.where(valid, values, 0.0) * weight
+                    weight_sum += np.where(valid, weight, 0.0)
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    out[dest, j] = np.where(weight_sum > 0, total / weight_sum, np.nan)
+
+
+def _layer_chunks(lyr, chunk_rows):
+    # Point layer as table chunks: fid, attributes, x, y (centroids for non-point geometries)
+    from osgeo import ogr
+    defn = lyr.GetLayerDefn()
+    names = [defn.GetFieldDefn(i).GetName() for i in range(defn.GetFieldCount())]
+    lyr.ResetReading()
+    while True:
+        fids, xs, ys = [], [], []
+        fields = [[] for _ in names]
+        # GetNextFeature rather than iterating the layer, which would restart it every chunk
+        while len(fids) < chunk_rows:
+            feat = lyr.GetNextFeature()
+            if feat is None:
+                break
+            geom = feat.GetGeometryRef()
+            if geom is not None and not geom.IsEmpty():
+                if ogr.GT_Flatten(geom.GetGeometryType()) != ogr.wkbPoint:
+                    geom = geom.Centroid()
+                xs.append(geom.GetX())
+                ys.append(geom.GetY())
+            else:
+                xs.append(np.nan)
+                ys.append(np.nan)
+            fids.append(feat.GetFID())
+            for i, values in enumerate(fields):
+                values.append(feat.GetField(i))
+        if not fids:
+            return
+        chunk = {"fid": np.asarray(fids, dtype=np.int64)}
+        for name, values in zip(names, fields):
+            chunk[name] = np.array(values, dtype=object)
+        yield chunk, np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64)
+
+def open_points(path, x_col=None, y_col=None, points_crs=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Point source as (CRS or None, total points or None, chunks), where chunks yields
+    (columns, x, y). Tables use x_col/y_col (guessed from the header if not given) in
+    points_crs (None: the raster's CRS); vector layers use their geometries and their own CRS.
+    """
+    if is_table(path):
+        if not x_col or not y_col:
+            guess = guess_xy_columns(read_header(path))
+            if guess is None:
+                raise ValueError(f"No coordinate columns found in {os.path.basename(path)}; name them with x_col/y_col")
+            x_col, y_col, guessed_crs = guess
+            points_crs = points_crs or guessed_crs
+        chunks = (
+            (chunk, numeric_column(chunk, x_col), numeric_column(chunk, y_col))
+            for chunk in iter_table_chunks(path, chunk_rows, numeric_columns=(x_col, y_col))
+        )
+        return points_crs, count_rows(path), chunks
+
+    from dataset_pool import open_vector
+    ds = open_vector(path)
+    if ds is None or not ds.GetLayerCount():
+        raise RuntimeError(f"Could not open {path} as a table or vector layer")
+    lyr = ds.GetLayer(0)
+    srs = lyr.GetSpatialRef()
+
+    def chunks():
+        # Keeps the dataset alive while its layer is read
+        _ = ds
+        yield from _layer_chunks(lyr, chunk_rows)
+    return (srs.ExportToWkt() if srs is not None else None), lyr.GetFeatureCount(), chunks()
+
+def sample_file(raster_path, points_path, out_path, bands=None, method="nearest", x_col=None, y_col=None,
+                points_crs=None, chunk_rows=DEFAULT_CHUNK_ROWS, workers=DEFAULT_WORKERS,
+                progress_callback=None, cancel_event=None):
+    """
+    Samples raster_path at every point of points_path (see open_points) and writes the input
+    columns plus band_<n> columns to out_path (CSV or Parquet by extension).
+    progress_callback(points_done, total_points_or_None, seconds) is called after each chunk is written.
+    Returns (points written, seconds).
+    """
+    from pyproj import CRS
+    from dataset_pool import open_raster
+    from gis_utils import get_transformer
+
+    start = time.perf_counter()
+    ds = open_raster(raster_path)
+    if ds is None:
+        raise RuntimeError(f"Could not open {raster_path}")
+    band_list = list(bands or range(1, ds.RasterCount + 1))
+    RasterSampler(ds, band_list, method)  # Validates bands, method and geotransform up front
+    raster_wkt = ds.GetProjection()
+    ds = None
+
+    src_crs, total, chunks = open_points(points_path, x_col, y_col, points_crs, chunk_rows)
+    if src_crs and raster_wkt and CRS.from_user_input(src_crs) == CRS.from_wkt(raster_wkt):
+        src_crs = None
+    if src_crs and not raster_wkt:
+        raise ValueError(f"{os.path.basename(raster_path)} has no CRS to transform the points to")
+    local = threading.local()
+
+    def sample_chunk(x, y):
+        # Worker thread: its own raster handle (from the pool) and transformer
+        sampler = getattr(local, "sampler", None)
+        if sampler is None:
+            sampler = local.sampler = RasterSampler(open_raster(raster_path), band_list, method)
+        with tracing.span("sample chunk", points=len(x)):
+            if src_crs:
+                x, y = get_transformer(src_crs, raster_wkt).transform(x, y)
+            return sampler.sample(x, y)
+
+    def attach(chunk, values):
+        out = dict(chunk)
+        for j, b in enumerate(band_list):
+            out[f"band_{b}"] = values[:, j]
+        return out
+
+    workers = max(1, workers or 1)
+    with TableWriter(out_path) as writer, ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+
+        def write_next():
+            chunk, future = pending.popleft()
+            writer.write(attach(chunk, future.result()))
+            if progress_callback:
+                progress_callback(writer.rows_written, total, time.perf_counter() - start)
+
+        # At most 2 chunks per worker in flight, so memory is bounded by the chunk size
+        for chunk, x, y in chunks:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            pending.append((chunk, pool.submit(sample_chunk, x, y)))
+            while len(pending) >= workers * 2:
+                write_next()
+        while pending:
+            if cancel_event is not None and cancel_event.is_set():
+                for _, future in pending:
+                    future.cancel()
+                break
+            write_next()
+        return writer.rows_written, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sample raster values at point locations.")
+    parser.add_argument("raster", help="Input raster")
+    parser.add_argument("points", help="Points: CSV/Parquet table or vector layer (any OGR format)")
+    parser.add_argument("output", help="Output CSV or Parquet table")
+    parser.add_argument("--bands", type=int, nargs="*", help="Bands to sample (default: all)")
+    parser.add_argument("--method", choices=SAMPLING_METHODS, default="nearest")
+    parser.add_argument("--x-col", help="X/longitude column of a table (default: guessed from the header)")
+    parser.add_argument("--y-col", help="Y/latitude column of a table (default: guessed from the header)")
+    parser.add_argument("--points-crs", help="CRS of the table coordinates (default: EPSG:4326 for lon/lat "
+                                             "columns, otherwise the raster's CRS)")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Worker threads")
+    args = parser.parse_args(argv)
+    if (args.x_col is None) != (args.y_col is None):
+        parser.error("--x-col and --y-col go together")
+    points_crs = args.points_crs
+    if args.x_col and not points_crs:
+        guess = guess_xy_columns([args.x_col, args.y_col])
+        points_crs = guess[2] if guess else None
+
+    def report(done, total, seconds):
+        of_total = f" / {total:,}" if total else ""
+        print(f"\r{done:,}{of_total} points, {format_throughput(done, seconds)}", end="", file=sys.stderr, flush=True)
+
+    points, seconds = sample_file(
+        args.raster, args.points, args.output, bands=args.bands, method=args.method,
+        x_col=args.x_col, y_col=args.y_col, points_crs=points_crs, chunk_rows=args.chunk_rows,
+        workers=args.workers, progress_callback=report
+    )
+    print(f"\nWrote {points:,} points to {args.output} in {seconds:.1f} s ({format_throughput(points, seconds)})",
+          file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
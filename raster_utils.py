@@ -0,0 +1,388 @@
+"""
+Raster utility functions: per-band deep inspection (checksums, statistics, histograms) and display reads.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+from osgeo import gdal
+
+from dataset_pool import open_raster
+from tracing import span
+
+# Same primes and 16-bit wrap-around as GDALChecksumImage, so results match `gdalinfo -checksum`
+CHECKSUM_PRIMES = np.array([7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43], dtype=np.int64)
+HISTOGRAM_BUCKETS = 256
+# Rough size of one strip of rows read per band at a time
+READ_CHUNK_BYTES = 16 * 1024 * 1024
+# Pixels converted to float64 at a time for sums and histograms, so temporaries stay small
+SCRATCH_PIXELS = 1024 * 1024
+# Longest side of the array read for display; larger bands are read decimated (from overviews if any)
+DISPLAY_MAX_SIZE = 4096
+
+
+def valid_mask(band, data, window=None, out=None):
+    """
+    Which pixels of data (read from window=(xoff, yoff, xsize, ysize) of band, possibly
+    decimated) have data, from the band's mask flags: its nodata value, or its per-dataset mask
+    or alpha band, read at the same size. NaN/Inf are invalid in float bands. Returns None when
+    every pixel is valid; otherwise a bool array, written into out if given.
+    """
+    flags = band.GetMaskFlags()
+    floating = np.issubdtype(data.dtype, np.floating)
+    if flags & gdal.GMF_ALL_VALID and not floating:
+        return None
+    if out is None:
+        out = np.empty(data.shape, dtype=bool)
+    if flags == gdal.GMF_NODATA:
+        np.not_equal(data, band.GetNoDataValue(), out=out)
+    elif not flags & gdal.GMF_ALL_VALID:
+        xoff, yoff, xsize, ysize = window or (0, 0, band.XSize, band.YSize)
+        mask = band.GetMaskBand().ReadAsArray(
+            xoff, yoff, xsize, ysize, buf_xsize=data.shape[1], buf_ysize=data.shape[0]
+        )
+        np.not_equal(mask, 0, out=out)
+    else:
+        out.fill(True)
+    if floating:
+        np.logical_and(out, np.isfinite(data), out=out)
+    return out
+
+
+def _slices(data, valid):
+    # Flat views of data (and validity) of at most SCRATCH_PIXELS pixels
+    size = SCRATCH_PIXELS
+    flat = data.reshape(-1)
+    flat_valid = None if valid is None else valid.reshape(-1)
+    for start in range(0, flat.size, size):
+        yield flat[start:start + size], None if flat_valid is None else flat_valid[start:start + size]
+
+
+@lru_cache(maxsize=1)
+def _primes_tile(size):
+    # CHECKSUM_PRIMES repeated to cover size pixels starting at any phase of the pattern
+    return np.resize(CHECKSUM_PRIMES, size + CHECKSUM_PRIMES.size)
+
+
+class BandStatistics:
+    """
+    Min, max, mean and std of the valid pixels of a band, accumulated strip by strip. The data
+    stays in its own type: nothing is copied to drop invalid pixels or converted to float64 as a whole.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.min = None
+        self.max = None
+        self._scratch = np.empty(0)
+
+    def add(self, data, valid=None):
+        if np.iscomplexobj(data):
+            data = np.abs(data)
+        count = data.size if valid is None else int(np.count_nonzero(valid))
+        if count == 0:
+            return
+        if valid is None:
+            vmin, vmax = data.min(), data.max()
+        else:
+            info = np.finfo(data.dtype) if np.issubdtype(data.dtype, np.floating) else np.iinfo(data.dtype)
+            vmin = data.min(where=valid, initial=info.max)
+            vmax = data.max(where=valid, initial=info.min)
+        self.min = vmin if self.min is None else min(self.min, vmin)
+        self.max = vmax if self.max is None else max(self.max, vmax)
+        self.count += count
+        if self._scratch.size < min(data.size, SCRATCH_PIXELS):
+            self._scratch = np.empty(min(data.size, SCRATCH_PIXELS))
+        for values, ok in _slices(data, valid):
+            squares = self._scratch[:values.size]
+            np.multiply(values, values, out=squares, dtype=np.float64)
+            if ok is None:
+                self.total += float(values.sum(dtype=np.float64))
+                self.total_sq += float(squares.sum())
+            else:
+                self.total += float(values.sum(dtype=np.float64, where=ok))
+                self.total_sq += float(squares.sum(where=ok))
+
+    def add_masked(self, arr):
+        """Adds a masked array (e.g. from load_display_band)."""
+        mask = np.ma.getmask(arr)
+        if mask is np.ma.nomask:
+            self.add(np.ma.getdata(arr))
+            return
+        # Inverted in place and back, rather than allocating a second mask
+        np.logical_not(mask, out=mask)
+        try:
+            self.add(np.ma.getdata(arr), mask)
+        finally:
+            np.logical_not(mask, out=mask)
+
+    def result(self):
+        mean = std = None
+        if self.count:
+            mean = self.total / self.count
+            std = max(self.total_sq / self.count - mean * mean, 0.0) ** 0.5
+        return {
+            'min': None if self.min is None else float(self.min),
+            'max': None if self.max is None else float(self.max),
+            'mean': mean,
+            'std': std,
+            'valid_count': self.count,
+        }
+
+
+class BandInspector:
+    """
+    Accumulates checksum, statistics and histogram for one band from a single pass
+    over strips of rows, so the band data is read once for all three metrics.
+    """
+
+    def __init__(self, nodata=None, hist_min=None, hist_max=None, buckets=HISTOGRAM_BUCKETS):
+        self.nodata = nodata
+        self.checksum = 0
+        self.pixels_seen = 0
+        self.stats = BandStatistics()
+        self.hist_min = hist_min
+        self.hist_max = hist_max
+        self.buckets = buckets
+        self.hist = np.zeros(buckets, dtype=np.int64)
+        self._scratch = np.empty(0)
+        self._bins = np.empty(0, dtype=np.int64)
+
+    def add(self, arr, valid=None):
+        """valid: which pixels of arr have data (see valid_mask); None when all of them do."""
+        self._add_checksum(arr)
+        if np.iscomplexobj(arr):
+            arr = np.abs(arr)
+        self.stats.add(arr, valid)
+        self._add_histogram(arr, valid)
+
+    def _reserve_scratch(self, size):
+        size = min(size, SCRATCH_PIXELS)
+        if self._scratch.size < size:
+            self._scratch = np.empty(size)
+            self._bins = np.empty(size, dtype=np.int64)
+
+    def _add_checksum(self, arr):
+        if np.iscomplexobj(arr):
+            # Interleaved real/imaginary parts, as GDAL checksums them
+            vals = np.ascontiguousarray(arr).reshape(-1).view(arr.real.dtype)
+        else:
+            vals = arr.reshape(-1)
+        floating = np.issubdtype(vals.dtype, np.floating)
+        self._reserve_scratch(vals.size)
+        primes = _primes_tile(SCRATCH_PIXELS)
+        for values, _ in _slices(vals, None):
+            ints = self._bins[:values.size]
+            if floating:
+                # GDAL rounds floats to Int32 and maps NaN/Inf to INT_MIN before the modulo
+                finite = np.isfinite(values)
+                rounded = values + 0.5
+                np.clip(rounded, -2147483647.0, 2147483647.0, out=rounded)
+                np.floor(rounded, out=rounded)
+                with np.errstate(invalid="ignore"):
+                    np.copyto(ints, rounded, casting="unsafe")
+                ints[~finite] = -2147483648
+            else:
+                np.copyto(ints, values, casting="unsafe")
+                np.clip(ints, -2147483648, 2147483647, out=ints)
+            phase = self.pixels_seen % CHECKSUM_PRIMES.size
+            # np.fmod keeps the sign of the dividend like C's %, which GDAL relies on
+            np.fmod(ints, primes[phase:phase + ints.size], out=ints)
+            self.checksum = int((self.checksum + int(ints.sum())) & 0xFFFF)
+            self.pixels_seen += ints.size
+
+    def _add_histogram(self, arr, valid):
+        if self.hist_min is None or self.hist_max is None or self.hist_max <= self.hist_min:
+            return
+        scale = self.buckets / (self.hist_max - self.hist_min)
+        self._reserve_scratch(arr.size)
+        for values, ok in _slices(arr, valid):
+            scaled, bins = self._scratch[:values.size], self._bins[:values.size]
+            np.subtract(values, self.hist_min, out=scaled, dtype=np.float64)
+            scaled *= scale
+            with np.errstate(invalid="ignore"):
+                np.copyto(bins, scaled, casting="unsafe")  # Truncates like astype(int64)
+            np.clip(bins, 0, self.buckets - 1, out=bins)
+            if ok is not None:
+                # Invalid pixels go to an extra bucket that is dropped
+                bins[~ok] = self.buckets
+            self.hist += np.bincount(bins, minlength=self.buckets + 1)[:self.buckets]
+
+    def result(self):
+        result = self.stats.result()
+        result.update({
+            'checksum': self.checksum,
+            'nodata': self.nodata,
+            'hist_min': self.hist_min,
+            'hist_max': self.hist_max,
+            'histogram': self.hist.tolist(),
+        })
+        return result
+
+
+def histogram_range(band):
+    # Bucket layout follows gdalinfo -hist: fixed -0.5..255.5 for Byte, otherwise the
+    # (overview-based, approximate) min/max so the range is known before the single pass
+    if band.DataType == gdal.GDT_Byte:
+        return -0.5, 255.5
+    try:
+        vmin, vmax = band.ComputeRasterMinMax(True)
+    except RuntimeError:
+        return None, None
+    return vmin, vmax
+
+
+def rows_per_chunk(band, width):
+    block_h = band.GetBlockSize()[1] or 1
+    bytes_per_row = max(width * gdal.GetDataTypeSize(band.DataType) // 8, 1)
+    rows = max(READ_CHUNK_BYTES // bytes_per_row, 1)
+    # Keep strips aligned to the block height so each block is decoded exactly once
+    return max(rows // block_h, 1) * block_h
+
+
+def iter_strips(band, width, height, band_index=None):
+    """
+    Reads a band in block-aligned strips of rows: yields (yoff, data, valid), data in the band's
+    own type and valid from valid_mask() (None when all pixels are valid). The same two buffers
+    are reused for every strip, so each must be used up before the next one is read.
+    """
+    step = rows_per_chunk(band, width)
+    buf = valid_buf = None
+    for yoff in range(0, height, step):
+        nrows = min(step, height - yoff)
+        window = (0, yoff, width, nrows)
+        with span("read rows", band=band_index, rows=nrows):
+            if buf is None:
+                buf = band.ReadAsArray(*window)
+                valid_buf = np.empty(buf.shape, dtype=bool)
+            else:
+                band.ReadAsArray(*window, buf_obj=buf[:nrows])
+            data = buf[:nrows]
+            valid = valid_mask(band, data, window, out=valid_buf[:nrows])
+        yield yoff, data, valid
+
+
+def inspect_band(path, band_index, on_rows=None, cancel_event=None):
+    # The pool gives each worker thread its own handle: GDAL datasets must not be shared across threads
+    ds = open_raster(path)
+    if ds is None:
+        raise RuntimeError(f"Could not open {path}")
+    band = ds.GetRasterBand(band_index)
+    width, height = ds.RasterXSize, ds.RasterYSize
+    hist_min, hist_max = histogram_range(band)
+    inspector = BandInspector(band.GetNoDataValue(), hist_min, hist_max)
+    for _, data, valid in iter_strips(band, width, height, band_index):
+        if cancel_event is not None and cancel_event.is_set():
+            return None
+        with span("checksum/stats/histogram", band=band_index, rows=data.shape[0]):
+            inspector.add(data, valid)
+        if on_rows:
+            on_rows(data.shape[0])
+    result = inspector.result()
+    result['band'] = band_index
+    result['data_type'] = gdal.GetDataTypeName(band.DataType)
+    return result
+
+
+def inspect_bands(path, progress_callback=None, max_workers=None, cancel_event=None):
+    """
+    Computes checksum, statistics and histogram for every band of a raster, one band per
+    worker thread. progress_callback(fraction) may be called from worker threads.
+    Returns a list of per-band result dicts, or None if cancelled.
+    """
+    ds = open_raster(path)
+    if ds is None:
+        raise RuntimeError(f"Could not open {path}")
+    band_count = ds.RasterCount
+    total_rows = band_count * ds.RasterYSize
+    ds = None
+    if band_count == 0:
+        return []
+
+    lock = threading.Lock()
+    done_rows = [0]
+
+    def on_rows(n):
+        with lock:
+            done_rows[0] += n
+            fraction = done_rows[0] / total_rows if total_rows else 1.0
+        if progress_callback:
+            progress_callback(fraction)
+
+    workers = max_workers or min(band_count, os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(inspect_band, path, i, on_rows, cancel_event) for i in range(1, band_count + 1)]
+        results = [f.result() for f in futures]
+    if any(r is None for r in results):
+        return None
+    return results
+
+
+def load_display_band(path, band_index=1, max_size=DISPLAY_MAX_SIZE):
+    """
+    Opens a raster and reads one band for display, in the band's own data type and at most
+    max_size pixels on the longest side. Returns (dataset, masked array); the mask comes from
+    valid_mask() and is nomask when every pixel is valid.
+    """
+    with span("gdal.Open"):
+        ds = open_raster(path)
+    if ds is None:
+        raise RuntimeError(f"Could not open {path}")
+    band = ds.GetRasterBand(band_index)
+    width, height = ds.RasterXSize, ds.RasterYSize
+    scale = min(1.0, max_size / max(width, height, 1)) if max_size else 1.0
+    buf_w, buf_h = max(1, round(width * scale)), max(1, round(height * scale))
+    with span("read band", band=band_index, pixels=buf_w * buf_h):
+        # A smaller buffer makes GDAL read decimated, from the best overview when there is one
+        data = band.ReadAsArray(0, 0, width, height, buf_xsize=buf_w, buf_ysize=buf_h)
+    with span("validity mask"):
+        valid = valid_mask(band, data, (0, 0, width, height))
+        if valid is None:
+            return ds, np.ma.MaskedArray(data)
+        # The validity buffer becomes the mask, inverted in place
+        return ds, np.ma.MaskedArray(data, mask=np.logical_not(valid, out=valid))
+
+
+def band_statistics(path, band_index=1, cancel_event=None):
+    """Min, max, mean, std and valid pixel count of a band at full resolution, or None if cancelled."""
+    ds = open_raster(path)
+    if ds is None:
+        raise RuntimeError(f"Could not open {path}")
+    stats = BandStatistics()
+    for _, data, valid in iter_strips(ds.GetRasterBand(band_index), ds.RasterXSize, ds.RasterYSize, band_index):
+        if cancel_event is not None and cancel_event.is_set():
+            return None
+        stats.add(data, valid)
+    return stats.result()
+
+
+def display_statistics(path, arr, band_index=1):
+    """Statistics for a band shown with load_display_band: from arr if it is the full band, else from a strip pass."""
+    ds = open_raster(path)
+    if ds is not None and arr.shape == (ds.RasterYSize, ds.RasterXSize):
+        stats = BandStatistics()
+        stats.add_masked(arr)
+        return stats.result()
+    return band_statistics(path, band_index)
+
+
+def format_band_report(results):
+    lines = []
+    for r in results:
+        lines.append(f"Band {r['band']} Type={r['data_type']}, Checksum={r['checksum']}")
+        if r['valid_count']:
+            lines.append(
+                f"  Minimum={r['min']:.3f}, Maximum={r['max']:.3f}, "
+                f"Mean={r['mean']:.3f}, StdDev={r['std']:.3f}"
+            )
+        else:
+            lines.append("  No valid pixels")
+        lines.append(f"  Valid pixels: {r['valid_count']}" + (f" (NoData={r['nodata']})" if r['nodata'] is not None else ""))
+        if r['hist_min'] is not None and r['hist_max'] is not None:
+            lines.append(f"  {len(r['histogram'])} buckets from {r['hist_min']:g} to {r['hist_max']:g}:")
+            lines.append("  " + " ".join(str(c) for c in r['histogram']))
+    return "\n".join(lines)
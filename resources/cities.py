@@ -67,15 +67,11 @@ CITIES = [
 ]
 
 def get_nearest_city(centroid, return_coords=False):
-    # centroid: (lat, lon)
-    min_dist = float('inf')
-    nearest = None
-    for city in CITIES:
-        dist = (city['lat'] - centroid[0]) ** 2 + (city['lon'] - centroid[1]) ** 2
-        if dist < min_dist:
-            min_dist = dist
-            nearest = city
+    # centroid: (lat, lon); great-circle nearest via the shared spatial index
+    from resources.city_index import get_city_index
+    place = get_city_index().nearest(centroid[0], centroid[1])
+    name, lat, lon, _ = place if place else (None, None, None, None)
     if return_coords:
-        return nearest['name'], nearest['lat'], nearest['lon']
+        return name, lat, lon
     else:
-        return nearest['name']
+        return name
@@ -0,0 +1,169 @@
+"""
+Spatial index for nearest-city lookups.
+
+Cities are stored as unit vectors on the sphere, so a KD-tree over 3D chord distance
+gives true great-circle nearest neighbours (no antimeridian or high-latitude distortion).
+Large gazetteers (e.g. a GeoNames dump) are parsed once and kept in a binary .npz cache.
+"""
+import math
+import os
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+# Set to a GeoNames dump (e.g. cities500.txt or allCountries.txt) to use it instead of CITIES
+GAZETTEER_ENV_VAR = "GISTOOLBOX_GAZETTEER"
+CACHE_VERSION = 1
+# Below this many places a brute-force search is as fast as a KD-tree, and skips importing scipy
+KDTREE_MIN_POINTS = 1000
+# GeoNames dump columns
+GEONAMES_NAME, GEONAMES_LAT, GEONAMES_LON, GEONAMES_POPULATION = 1, 4, 5, 14
+
+def latlon_to_unit_xyz(lat, lon):
+    lat = np.radians(np.asarray(lat, dtype=float))
+    lon = np.radians(np.asarray(lon, dtype=float))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+def chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.asarray(chord) / 2, 0, 1))
+
+def _build_tree(xyz):
+    try:
+        from scipy.spatial import cKDTree
+    except ImportError:  # scipy is optional; fall back to a vectorized brute-force search
+        return None
+    return cKDTree(xyz)
+
+class CityIndex:
+    def __init__(self, names, lats, lons):
+        self.names = list(names)
+        self.lats = np.asarray(lats, dtype=float)
+        self.lons = np.asarray(lons, dtype=float)
+        self.xyz = latlon_to_unit_xyz(self.lats, self.lons)
+        self._tree = _build_tree(self.xyz) if len(self.names) >= KDTREE_MIN_POINTS else None
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_cities(cls, cities):
+        return cls([c['name'] for c in cities], [c['lat'] for c in cities], [c['lon'] for c in cities])
+
+    @classmethod
+    def from_geonames(cls, path, min_population=0, cache_path=None):
+        """
+        Loads a GeoNames tab-separated dump. The parsed table is cached next to the source
+        (or at cache_path) and reused while the source file's size and mtime are unchanged.
+        """
+        cache_path = cache_path or f"{path}.{min_population}.idx.npz"
+        stat = os.stat(path)
+        signature = np.array([CACHE_VERSION, stat.st_size, int(stat.st_mtime)], dtype=np.int64)
+        if os.path.exists(cache_path):
+            try:
+                with np.load(cache_path) as cached:
+                    if np.array_equal(cached['signature'], signature):
+                        names = bytes(cached['names']).decode('utf-8').split('\n') if cached['lats'].size else []
+                        return cls(names, cached['lats'], cached['lons'])
+            except (OSError, KeyError, ValueError):
+                pass  # Corrupt or outdated cache, rebuild it
+
+        names, lats, lons = [], [], []
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                cols = line.rstrip('\n').split('\t')
+                if len(cols) <= GEONAMES_POPULATION:
+                    continue
+                if min_population and int(cols[GEONAMES_POPULATION] or 0) < min_population:
+                    continue
+                names.append(cols[GEONAMES_NAME].replace('\n', ' '))
+                lats.append(float(cols[GEONAMES_LAT]))
+                lons.append(float(cols[GEONAMES_LON]))
+        try:
+            np.savez(
+                cache_path,
+                signature=signature,
+                names=np.frombuffer('\n'.join(names).encode('utf-8'), dtype=np.uint8),
+                lats=np.asarray(lats, dtype=np.float64),
+                lons=np.asarray(lons, dtype=np.float64),
+            )
+        except OSError:
+            pass  # Read-only location, just skip the cache
+        return cls(names, lats, lons)
+
+    def query_many(self, lats, lons, k=1):
+        """
+        Bulk k-nearest lookup. Returns (indices, distances_km), each shaped (n, k); k is capped
+        at the number of places, so both are (n, 0) for an empty index.
+        """
+        xyz = latlon_to_unit_xyz(np.atleast_1d(lats), np.atleast_1d(lons)).reshape(-1, 3)
+        k = min(k, len(self.names))
+        if k == 0:
+            return np.empty((len(xyz), 0), dtype=np.int64), np.empty((len(xyz), 0))
+        if self._tree is not None:
+            chord, idx = self._tree.query(xyz, k=k)
+            chord, idx = chord.reshape(len(xyz), k), idx.reshape(len(xyz), k)
+        else:
+            # Largest dot product == smallest chord; chunk to bound memory for big batches
+            idx = np.empty((len(xyz), k), dtype=np.int64)
+            chord = np.empty((len(xyz), k))
+            for start in range(0, len(xyz), 1024):
+                dots = xyz[start:start + 1024] @ self.xyz.T
+                part = np.argpartition(-dots, k - 1, axis=1)[:, :k]
+                part_dots = np.take_along_axis(dots, part, axis=1)
+                order = np.argsort(-part_dots, axis=1)
+                idx[start:start + 1024] = np.take_along_axis(part, order, axis=1)
+                chord[start:start + 1024] = np.sqrt(np.clip(2 - 2 * np.take_along_axis(part_dots, order, axis=1), 0, 4))
+        return idx, chord_to_km(chord)
+
+    def query(self, lat, lon, k=1):
+        """
+        Returns the k nearest places to (lat, lon) as a list of (name, lat, lon, distance_km),
+        empty when the index is.
+        """
+        if not len(self.names) or k < 1:
+            return []
+        if k == 1:
+            # Scalar fast path, skips the array plumbing of query_many
+            lat_r, lon_r = math.radians(lat), math.radians(lon)
+            cos_lat = math.cos(lat_r)
+            point = (cos_lat * math.cos(lon_r), cos_lat * math.sin(lon_r), math.sin(lat_r))
+            if self._tree is not None:
+                chord, i = self._tree.query(point)
+            else:
+                dots = self.xyz @ point
+                i = int(dots.argmax())
+                chord = math.sqrt(max(2 - 2 * float(dots[i]), 0.0))
+            dist = 2 * EARTH_RADIUS_KM * math.asin(min(chord / 2, 1.0))
+            return [(self.names[i], float(self.lats[i]), float(self.lons[i]), dist)]
+        idx, dist = self.query_many(lat, lon, k)
+        return [
+            (self.names[i], float(self.lats[i]), float(self.lons[i]), float(d))
+            for i, d in zip(idx[0], dist[0])
+        ]
+
+    def nearest(self, lat, lon):
+        """(name, lat, lon, distance_km) of the nearest place, or None if the index is empty."""
+        places = self.query(lat, lon, 1)
+        return places[0] if places else None
+
+_default_index = None
+
+def get_city_index():
+    # Built once on first use: the GeoNames file named by GISTOOLBOX_GAZETTEER if set and it has
+    # any places, else CITIES
+    global _default_index
+    if _default_index is None:
+        gazetteer = os.environ.get(GAZETTEER_ENV_VAR)
+        index = None
+        if gazetteer and os.path.exists(gazetteer):
+            index = CityIndex.from_geonames(gazetteer)
+        if not index:
+            from resources.cities import CITIES
+            index = CityIndex.from_cities(CITIES)
+        _default_index = index
+    return _default_index
+
+def set_city_index(index):
+    global _default_index
+    _default_index = index
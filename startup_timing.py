@@ -0,0 +1,40 @@
+"""
+Startup phase timing. Enabled with `python main.py --startup-report` or GISTOOLBOX_STARTUP_REPORT=1;
+phases are printed to stderr once the window is up, and tabs built later print as they load.
+"""
+from contextlib import contextmanager
+import os
+import sys
+import time
+
+PROCESS_START = time.perf_counter()
+_phases = []
+_reported = False
+
+def enabled():
+    return "--startup-report" in sys.argv or bool(os.environ.get("GISTOOLBOX_STARTUP_REPORT"))
+
+@contextmanager
+def phase(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        _phases.append((name, elapsed))
+        if _reported and enabled():
+            print(f"[startup] {name}: {elapsed * 1000:.1f} ms", file=sys.stderr)
+
+def phases():
+    return list(_phases)
+
+def report():
+    """Prints the phases recorded so far and the total time since the process started."""
+    global _reported
+    _reported = True
+    if not enabled():
+        return
+    width = max((len(name) for name, _ in _phases), default=0)
+    lines = [f"  {name:<{width}}  {elapsed * 1000:8.1f} ms" for name, elapsed in _phases]
+    lines.append(f"  {'total (process start to first event loop)':<{width}}  {(time.perf_counter() - PROCESS_START) * 1000:8.1f} ms")
+    print("Startup report:\n" + "\n".join(lines), file=sys.stderr)
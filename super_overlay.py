@@ -0,0 +1,264 @@
+"""
+KMZ super-overlay export for rasters.
+
+The raster is warped (virtually, through a VRT) to WGS84 and cut into a quadtree pyramid of
+PNG/JPEG tiles of up to 256x256 pixels. Tiles are square in source pixels at every level (a
+long strip gets many columns and few rows), and edge tiles are clipped to the raster, so
+nothing is stretched. Each tile gets a small KML with a Region and NetworkLinks to its (up
+to four) children, so Google Earth only fetches the tiles needed for the current view.
+
+Tiles are rendered in a process pool into a staging directory next to the output. Tiles
+without data are only recorded (a marker file) and left out of the KMZ. A tile that already
+exists there is not rendered again, so an interrupted export resumes where it stopped; the
+staging directory is removed once the KMZ has been written.
+"""
+import math
+import multiprocessing
+import os
+import shutil
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape
+
+from osgeo import gdal
+
+from dataset_pool import open_raster
+
+TILE_SIZE = 256
+# Tiles handed to a worker per task (amortizes inter-process overhead)
+TILES_PER_TASK = 32
+# Region level-of-detail thresholds (pixels on screen) for showing a tile
+MIN_LOD_PIXELS = 128
+TILE_FORMATS = {"PNG": ".png", "JPEG": ".jpg"}
+# Suffix of the marker left in the staging directory for a tile without data
+EMPTY_SUFFIX = ".empty"
+
+def pyramid_levels(width, height, tile_size=TILE_SIZE):
+    # Deepest level reaches (about) native resolution
+    size = max(width, height)
+    return int(math.ceil(math.log2(size / tile_size))) if size > tile_size else 0
+
+def level_grid(width, height, level, levels, tile_size=TILE_SIZE):
+    """Source pixels per tile side, and the number of tile columns and rows, of a pyramid level."""
+    tile_pixels = tile_size * 2 ** (levels - level)
+    return tile_pixels, math.ceil(width / tile_pixels), math.ceil(height / tile_pixels)
+
+def tile_window(width, height, tile_pixels, x, y, tile_size=TILE_SIZE):
+    """
+    Source window (xoff, yoff, xsize, ysize) of tile (x, y), clipped to the raster, and the
+    (width, height) of its image. Tile (0, 0) of each level is the north-west one.
+    """
+    xoff, yoff = x * tile_pixels, y * tile_pixels
+    xsize, ysize = min(tile_pixels, width - xoff), min(tile_pixels, height - yoff)
+    scale = tile_size / tile_pixels
+    return (xoff, yoff, xsize, ysize), (max(1, round(xsize * scale)), max(1, round(ysize * scale)))
+
+def tile_bounds(gt, window):
+    # (west, south, east, north) of a source window of the (north-up) warped raster
+    xoff, yoff, xsize, ysize = window
+    west, north = gt[0] + xoff * gt[1], gt[3] + yoff * gt[5]
+    return west, north + ysize * gt[5], west + xsize * gt[1], north
+
+def prepare_source(src_path, work_dir):
+    """
+    Writes work_dir/source.vrt: the raster warped to EPSG:4326 with an alpha band.
+    Returns (vrt_path, geotransform, (width, height), levels, band_list, scale_params).
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    src = open_raster(src_path)
+    if src is None:
+        raise RuntimeError(f"Could not open {src_path}")
+    band_list = [1, 2, 3] if src.RasterCount >= 3 else [1]
+    source = src_path
+    if src.RasterCount < 3 and src.GetRasterBand(1).GetColorTable() is not None:
+        # Paletted rasters are expanded to RGB before warping
+        source = os.path.join(work_dir, "expanded.vrt")
+        gdal.Translate(source, src, format="VRT", rgbExpand="rgb")
+        band_list = [1, 2, 3]
+    vrt_path = os.path.join(work_dir, "source.vrt")
+    warped = gdal.Warp(vrt_path, source, format="VRT", dstSRS="EPSG:4326", dstAlpha=True, resampleAlg="bilinear")
+    if warped is None:
+        raise RuntimeError("Could not warp raster to EPSG:4326.")
+
+    # Non-Byte bands are stretched to 0..255 using (overview-based) min/max
+    scale_params = []
+    for b in band_list:
+        band = warped.GetRasterBand(b)
+        if band.DataType == gdal.GDT_Byte:
+            scale_params.append([0, 255, 0, 255])
+        else:
+            vmin, vmax = band.ComputeRasterMinMax(True)
+            scale_params.append([vmin, vmax if vmax > vmin else vmin + 1, 0, 255])
+    band_list.append(warped.RasterCount)  # Alpha band
+    scale_params.append([0, 255, 0, 255])
+
+    width, height = warped.RasterXSize, warped.RasterYSize
+    return vrt_path, warped.GetGeoTransform(), (width, height), pyramid_levels(width, height), band_list, scale_params
+
+_worker_ds = None
+
+def _init_worker(vrt_path):
+    # One open VRT per worker process, reused for all its tiles
+    global _worker_ds
+    gdal.UseExceptions()
+    _worker_ds = gdal.Open(vrt_path)
+
+def render_tiles(jobs, tile_format, band_list, scale_params):
+    """
+    Renders (window, size, path) jobs and returns, per job, whether the tile has data. Tiles
+    are written to a temp name then renamed; tiles without data only get an EMPTY_SUFFIX marker.
+    """
+    results = []
+    for window, (width, height), path in jobs:
+        if os.path.exists(path) or os.path.exists(path + EMPTY_SUFFIX):
+            results.append(os.path.exists(path))
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tile = gdal.Translate(
+            "", _worker_ds, format="MEM", srcWin=list(window), width=width, height=height,
+            bandList=band_list, outputType=gdal.GDT_Byte, scaleParams=scale_params, resampleAlg="average"
+        )
+        if not tile.GetRasterBand(tile.RasterCount).ReadAsArray().any():
+            open(path + EMPTY_SUFFIX, "w").close()
+            results.append(False)
+            continue
+        tmp_path = path + ".part" + TILE_FORMATS[tile_format]
+        bands = list(range(1, tile.RasterCount + (1 if tile_format == "PNG" else 0)))  # JPEG has no alpha
+        gdal.Translate(tmp_path, tile, format=tile_format, bandList=bands)
+        if os.path.exists(tmp_path + ".aux.xml"):
+            os.remove(tmp_path + ".aux.xml")
+        os.replace(tmp_path, path)
+        results.append(True)
+    return results
+
+def _latlonaltbox(bounds):
+    west, south, east, north = bounds
+    return (f"<LatLonAltBox><north>{north}</north><south>{south}</south>"
+            f"<east>{east}</east><west>{west}</west></LatLonAltBox>")
+
+def _lod_region(bounds):
+    return (f"<Region>{_latlonaltbox(bounds)}<Lod><minLodPixels>{MIN_LOD_PIXELS}</minLodPixels>"
+            "<maxLodPixels>-1</maxLodPixels></Lod></Region>")
+
+def tile_kml(level, bounds, children, image_href=None):
+    """
+    KML of one tile: its Region, NetworkLinks to children [((level, x, y), bounds)] and, when
+    the tile has data, its image as a GroundOverlay.
+    """
+    west, south, east, north = bounds
+    links = [
+        f"<NetworkLink><name>{cl}/{cx}/{cy}</name>{_lod_region(child_bounds)}"
+        f"<Link><href>../../{cl}/{cx}/{cy}.kml</href><viewRefreshMode>onRegion</viewRefreshMode></Link></NetworkLink>\n"
+        for (cl, cx, cy), child_bounds in children
+    ]
+    overlay = ""
+    if image_href:
+        overlay = (
+            f"<GroundOverlay><drawOrder>{level}</drawOrder><Icon><href>{image_href}</href></Icon>"
+            f"<LatLonBox><north>{north}</north><south>{south}</south><east>{east}</east><west>{west}</west></LatLonBox></GroundOverlay>\n"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<kml xmlns="http://www.opengis.net/kml/2.2">\n<Document>\n'
+        f"{_lod_region(bounds)}\n" + "".join(links) + overlay +
+        "</Document>\n</kml>\n"
+    )
+
+def root_kml(name, extent):
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<kml xmlns="http://www.opengis.net/kml/2.2">\n<Document>\n'
+        f"<name>{name}</name>\n"
+        f"<NetworkLink><name>{name}</name>{_lod_region(extent)}"
+        "<Link><href>tiles/0/0/0.kml</href><viewRefreshMode>onRegion</viewRefreshMode></Link></NetworkLink>\n"
+        "</Document>\n</kml>\n"
+    )
+
+def export_super_overlay(src_path, out_kmz, tile_format="PNG", workers=None,
+                         progress_callback=None, cancel_event=None, keep_tiles=False):
+    """
+    Exports src_path as a KMZ super-overlay. progress_callback(fraction) is called as tiles
+    finish. Returns the number of tiles with data, or None if cancelled (rendered tiles are
+    kept for resuming).
+    """
+    if tile_format not in TILE_FORMATS:
+        raise ValueError(f"Unsupported tile format {tile_format}")
+    ext = TILE_FORMATS[tile_format]
+    work_dir = out_kmz + ".tiles"
+    vrt_path, gt, (width, height), levels, band_list, scale_params = prepare_source(src_path, work_dir)
+    tiles_dir = os.path.join(work_dir, "tiles")
+
+    # (level, x, y) -> (source window, image size, path)
+    jobs = {}
+    for level in range(levels + 1):
+        tile_pixels, columns, rows = level_grid(width, height, level, levels)
+        for x in range(columns):
+            for y in range(rows):
+                window, size = tile_window(width, height, tile_pixels, x, y)
+                jobs[(level, x, y)] = (window, size, os.path.join(tiles_dir, str(level), str(x), f"{y}{ext}"))
+    total = len(jobs)
+    has_data = {}
+    todo = []
+    for key, (_, _, path) in jobs.items():
+        if os.path.exists(path) or os.path.exists(path + EMPTY_SUFFIX):
+            has_data[key] = os.path.exists(path)
+        else:
+            todo.append(key)
+    done = total - len(todo)
+    if progress_callback:
+        progress_callback(done / total)
+
+    if todo:
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, mp_context=ctx,
+                                 initializer=_init_worker, initargs=(vrt_path,)) as pool:
+            batches = [todo[i:i + TILES_PER_TASK] for i in range(0, len(todo), TILES_PER_TASK)]
+            futures = [
+                pool.submit(render_tiles, [jobs[key] for key in batch], tile_format, band_list, scale_params)
+                for batch in batches
+            ]
+            for batch, future in zip(batches, futures):
+                if cancel_event is not None and cancel_event.is_set():
+                    for f in futures:
+                        f.cancel()
+                    return None
+                has_data.update(zip(batch, future.result()))
+                done += len(batch)
+                if progress_callback:
+                    progress_callback(done / total)
+
+    # A tile is linked if it or any descendant has data (an averaged coarse tile of a sparse
+    # raster can come out empty while its children don't)
+    children = {}
+    linked = set()
+    for key in sorted(jobs, reverse=True):
+        level, x, y = key
+        children[key] = [
+            child for child in ((level + 1, cx, cy) for cy in (2 * y, 2 * y + 1) for cx in (2 * x, 2 * x + 1))
+            if child in linked
+        ]
+        if has_data[key] or children[key]:
+            linked.add(key)
+    if (0, 0, 0) not in linked:
+        raise RuntimeError("The raster has no data to export.")
+
+    # KML per linked tile, then everything into the KMZ (images stored, KML deflated)
+    name = escape(os.path.splitext(os.path.basename(src_path))[0])
+    extent = tile_bounds(gt, (0, 0, width, height))
+    tmp_kmz = out_kmz + ".part"
+    with zipfile.ZipFile(tmp_kmz, "w") as kmz:
+        kmz.writestr("doc.kml", root_kml(name, extent), compress_type=zipfile.ZIP_DEFLATED)
+        for key in sorted(linked):
+            level, x, y = key
+            window, _, path = jobs[key]
+            arc_dir = f"tiles/{level}/{x}"
+            child_links = [(child, tile_bounds(gt, jobs[child][0])) for child in children[key]]
+            image_href = f"{y}{ext}" if has_data[key] else None
+            kmz.writestr(f"{arc_dir}/{y}.kml", tile_kml(level, tile_bounds(gt, window), child_links, image_href),
+                         compress_type=zipfile.ZIP_DEFLATED)
+            if image_href:
+                kmz.write(path, f"{arc_dir}/{y}{ext}", compress_type=zipfile.ZIP_STORED)
+    os.replace(tmp_kmz, out_kmz)
+    if not keep_tiles:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return sum(1 for key in linked if has_data[key])
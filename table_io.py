@@ -0,0 +1,154 @@
+"""
+Chunked, streaming readers and writers for point tables (CSV and Parquet).
+
+A chunk is a dict of column name -> array. With pyarrow installed, columns stay Arrow arrays
+(passthrough columns are never converted) and Parquet is supported; without it, CSV is
+read with the csv module into NumPy object arrays.
+"""
+import csv
+import os
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional, needed for Parquet
+    pa = None
+
+DEFAULT_CHUNK_ROWS = 250_000
+PARQUET_EXTS = (".parquet", ".pq")
+# Rough bytes per CSV row, used to size pyarrow's CSV read blocks from a row count
+CSV_BYTES_PER_ROW = 64
+
+def is_parquet(path):
+    return os.path.splitext(path)[1].lower() in PARQUET_EXTS
+
+def _require_pyarrow(path):
+    if pa is None:
+        raise RuntimeError(f"Reading/writing {os.path.basename(path)} requires pyarrow (pip install pyarrow)")
+
+def read_header(path):
+    if is_parquet(path):
+        _require_pyarrow(path)
+        return pq.ParquetFile(path).schema_arrow.names
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        return next(csv.reader(f), [])
+
+def count_rows(path):
+    # Only cheap for Parquet (footer metadata); CSV row counts are unknown until read
+    if is_parquet(path) and pa is not None:
+        return pq.ParquetFile(path).metadata.num_rows
+    return None
+
+def iter_table_chunks(path, chunk_rows=DEFAULT_CHUNK_ROWS, numeric_columns=()):
+    """
+    Yields the table as successive chunks of about chunk_rows rows. numeric_columns are parsed
+    as float64; other CSV columns are kept as text so passthrough values round-trip unchanged.
+    """
+    if is_parquet(path):
+        _require_pyarrow(path)
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield dict(zip(batch.schema.names, batch.columns))
+    elif pa is not None:
+        names = read_header(path)
+        column_types = {name: (pa.float64() if name in numeric_columns else pa.string()) for name in names}
+        reader = pa_csv.open_csv(
+            path,
+            read_options=pa_csv.ReadOptions(block_size=max(chunk_rows * CSV_BYTES_PER_ROW, 1 << 20)),
+            convert_options=pa_csv.ConvertOptions(column_types=column_types, strings_can_be_null=False)
+        )
+        for batch in reader:
+            yield dict(zip(batch.schema.names, batch.columns))
+    else:
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            names = next(reader, [])
+            rows = []
+            for row in reader:
+                rows.append(row)
+                if len(rows) >= chunk_rows:
+                    yield _rows_to_chunk(names, rows)
+                    rows = []
+            if rows:
+                yield _rows_to_chunk(names, rows)
+
+def _rows_to_chunk(names, rows):
+    columns = list(zip(*rows)) if rows else [()] * len(names)
+    return {name: np.array(col, dtype=object) for name, col in zip(names, columns)}
+
+def chunk_length(chunk):
+    return len(next(iter(chunk.values()))) if chunk else 0
+
+def numeric_column(chunk, name):
+    """Column as a float64 NumPy array; blanks and nulls become NaN."""
+    if name not in chunk:
+        raise KeyError(f"Column '{name}' not found (available: {', '.join(chunk)})")
+    col = chunk[name]
+    if pa is not None and isinstance(col, (pa.Array, pa.ChunkedArray)):
+        if pa.types.is_string(col.type) or pa.types.is_large_string(col.type):
+            return _parse_floats(col.to_numpy(zero_copy_only=False))
+        return col.cast(pa.float64(), safe=False).to_numpy(zero_copy_only=False)
+    try:
+        return np.asarray(col, dtype=np.float64)
+    except ValueError:
+        return _parse_floats(col)
+
+def _parse_floats(values):
+    out = np.empty(len(values), dtype=np.float64)
+    for i, v in enumerate(values):
+        try:
+            out[i] = float(v)
+        except (TypeError, ValueError):
+            out[i] = np.nan
+    return out
+
+class TableWriter:
+    """
+    Incremental CSV/Parquet writer; the output schema is taken from the first chunk written.
+    Use as a context manager so the file is finalized.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = is_parquet(path)
+        if self.parquet:
+            _require_pyarrow(path)
+        self._writer = None
+        self._file = None
+        self.rows_written = 0
+
+    def write(self, chunk):
+        if pa is not None:
+            batch = pa.RecordBatch.from_arrays(
+                [col if isinstance(col, (pa.Array, pa.ChunkedArray)) else pa.array(col) for col in chunk.values()],
+                names=list(chunk)
+            )
+            if self._writer is None:
+                if self.parquet:
+                    self._writer = pq.ParquetWriter(self.path, batch.schema)
+                else:
+                    self._writer = pa_csv.CSVWriter(self.path, batch.schema)
+            self._writer.write_batch(batch)
+        else:
+            if self._writer is None:
+                self._file = open(self.path, 'w', newline='', encoding='utf-8')
+                self._writer = csv.writer(self._file)
+                self._writer.writerow(list(chunk))
+            self._writer.writerows(zip(*chunk.values()))
+        self.rows_written += chunk_length(chunk)
+
+    def close(self):
+        if self._writer is not None and pa is not None:
+            self._writer.close()
+        if self._file is not None:
+            self._file.close()
+        self._writer = None
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
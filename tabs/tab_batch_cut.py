@@ -3,17 +3,33 @@ Tab: Batch Cut by Extent
 """
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QListWidget, QFileDialog,
-    QLabel, QLineEdit, QMessageBox, QListWidgetItem, QAbstractItemView, QSizePolicy
+    QLabel, QLineEdit, QMessageBox, QListWidgetItem, QAbstractItemView, QSizePolicy, QProgressBar,
+    QGroupBox, QFormLayout, QDoubleSpinBox, QComboBox, QCheckBox
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QSize
+from PySide6.QtGui import QIcon
 from datetime import datetime
 import os
 
 from widgets.info_box import InfoBox
-from osgeo import gdal, ogr, osr
-from shapely.geometry import box, shape, mapping
-from shapely.ops import unary_union
-from pyproj import CRS, Transformer
+from widgets.trace_panel import TracePanel
+from widgets.background_task import start_background_task
+from widgets.archive_picker import choose_archive_member
+from widgets.thumbnail_loader import ThumbnailLoader
+from osgeo import osr
+import archive_inputs
+import cut_engine
+import tracing
+from dataset_pool import open_raster
+
+# Vector output format choices: (label, extension or None to keep the input's)
+VECTOR_OUTPUT_FORMATS = [
+    ("Same as input", None),
+    ("GeoPackage (.gpkg)", ".gpkg"),
+    ("Shapefile (.shp)", ".shp"),
+    ("FlatGeobuf (.fgb)", ".fgb"),
+    ("GeoJSON (.geojson)", ".geojson"),
+]
 
 class BatchCutTab(QWidget):
     def __init__(self, parent=None):
@@ -23,6 +39,10 @@ class BatchCutTab(QWidget):
         # Input files list
         self.input_list = QListWidget()
         self.input_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        # Quicklooks next to each file, drawn in the background from a disk cache
+        self.input_list.setIconSize(QSize(48, 48))
+        self.thumbnails = ThumbnailLoader(self)
+        self.thumbnails.ready.connect(self.set_thumbnail)
         layout.addWidget(QLabel("Input Raster/Vector Files:"))
         layout.addWidget(self.input_list)
 
@@ -67,10 +87,89 @@ class BatchCutTab(QWidget):
         postfix_layout.addWidget(self.postfix_edit)
         layout.addLayout(postfix_layout)
 
+        # Vector clipping engine and output format
+        vector_layout = QHBoxLayout()
+        self.vector_engine_combo = QComboBox()
+        self.vector_engine_combo.addItem("Native OGR (fast)", "ogr")
+        self.vector_engine_combo.addItem("Python/shapely", "python")
+        vector_layout.addWidget(QLabel("Vector Clipping:"))
+        vector_layout.addWidget(self.vector_engine_combo)
+        self.vector_format_combo = QComboBox()
+        for label, ext in VECTOR_OUTPUT_FORMATS:
+            self.vector_format_combo.addItem(label, ext)
+        vector_layout.addWidget(QLabel("Vector Output:"))
+        vector_layout.addWidget(self.vector_format_combo)
+        layout.addLayout(vector_layout)
+
+        # Optional common output grid, applied in the same warp as the cut (vectors follow its CRS)
+        self.grid_box = QGroupBox("Reproject/Resample to Output Grid")
+        self.grid_box.setCheckable(True)
+        self.grid_box.setChecked(False)
+        grid_form = QFormLayout(self.grid_box)
+        self.target_crs_edit = QLineEdit()
+        self.target_crs_edit.setPlaceholderText("Keep input CRS (or e.g. EPSG:32633)")
+        grid_form.addRow("Target CRS:", self.target_crs_edit)
+        self.resolution_spin = QDoubleSpinBox()
+        self.resolution_spin.setRange(0, 1e6)
+        self.resolution_spin.setDecimals(6)
+        self.resolution_spin.setSpecialValueText("Keep input resolution")
+        grid_form.addRow("Pixel size (target CRS units):", self.resolution_spin)
+        self.align_check = QCheckBox("Align pixels to multiples of the pixel size (outputs mosaic without resampling)")
+        grid_form.addRow(self.align_check)
+        self.resampling_combo = QComboBox()
+        self.resampling_combo.addItems(cut_engine.RESAMPLING_METHODS)
+        grid_form.addRow("Resampling:", self.resampling_combo)
+        self.error_spin = QDoubleSpinBox()
+        self.error_spin.setRange(0, 10)
+        self.error_spin.setDecimals(3)
+        self.error_spin.setSingleStep(0.125)
+        self.error_spin.setValue(cut_engine.DEFAULT_ERROR_THRESHOLD)
+        self.error_spin.setToolTip("Max error in pixels of the approximate reprojection; 0 is exact but slower")
+        grid_form.addRow("Transform error (pixels):", self.error_spin)
+        layout.addWidget(self.grid_box)
+
+        # Optional simplification of detailed cut geometries (coastlines, parcel unions)
+        self.simplify_box = QGroupBox("Simplify Cut Geometry")
+        self.simplify_box.setCheckable(True)
+        self.simplify_box.setChecked(False)
+        simplify_form = QFormLayout(self.simplify_box)
+        self.simplify_spin = QDoubleSpinBox()
+        self.simplify_spin.setRange(0, 1e6)
+        self.simplify_spin.setDecimals(6)
+        self.simplify_spin.setSpecialValueText("Auto (from each raster's pixel size)")
+        simplify_form.addRow("Tolerance (cut file CRS units):", self.simplify_spin)
+        self.exact_vectors_check = QCheckBox("Clip vectors with the original geometry")
+        self.exact_vectors_check.setChecked(True)
+        simplify_form.addRow(self.exact_vectors_check)
+        layout.addWidget(self.simplify_box)
+
         # Process button
         self.process_btn = QPushButton("Process Batch Cut")
         layout.addWidget(self.process_btn)
         self.process_btn.clicked.connect(self.process_batch_cut)
+        self.cut_progress = QProgressBar()
+        self.cut_progress.setVisible(False)
+        layout.addWidget(self.cut_progress)
+        self.cut_status = QLabel("")
+        layout.addWidget(self.cut_status)
+        self.cut_task = None
+        self.cut_trace_run = None
+
+        # Per-polygon statistics of the input rasters, zones taken from the cut file
+        self.zonal_btn = QPushButton("Zonal Statistics")
+        self.zonal_btn.setToolTip("Write a table of per-polygon statistics (cut file polygons) for each input raster")
+        layout.addWidget(self.zonal_btn)
+        self.zonal_btn.clicked.connect(self.run_zonal_statistics)
+        self.zonal_progress = QProgressBar()
+        self.zonal_progress.setVisible(False)
+        layout.addWidget(self.zonal_progress)
+        self.zonal_status = QLabel("")
+        layout.addWidget(self.zonal_status)
+        self.zonal_task = None
+
+        # Per-stage timings of the last batch (when tracing is on)
+        self.trace_panel = TracePanel()
+        layout.addWidget(self.trace_panel)
 
         layout.addStretch()
 
@@ -83,9 +182,25 @@ class BatchCutTab(QWidget):
 
     def add_files(self):
         files, _ = QFileDialog.getOpenFileNames(self, "Select Input Files", "", "All Files (*.*)")
+        # Archives are not unpacked: their datasets are listed and cut through /vsizip/ etc.
+        try:
+            files = archive_inputs.expand_inputs(files, cut_engine.RASTER_EXTS + cut_engine.VECTOR_EXTS)
+        except (OSError, RuntimeError) as e:
+            QMessageBox.warning(self, "Add Files", f"Could not read archive:\n{e}")
+            return
+        existing = {self.input_list.item(i).text() for i in range(self.input_list.count())}
+        added = []
         for f in files:
-            if f and not any(self.input_list.item(i).text() == f for i in range(self.input_list.count())):
+            if f and f not in existing:
+                existing.add(f)
+                added.append(f)
                 self.input_list.addItem(QListWidgetItem(f))
+        self.thumbnails.request(added)
+
+    def set_thumbnail(self, path, thumb_path):
+        # The item may have been removed while its thumbnail was loading
+        for item in self.input_list.findItems(path, Qt.MatchExactly):
+            item.setIcon(QIcon(thumb_path))
 
     def remove_selected_files(self):
         for item in self.input_list.selectedItems():
@@ -93,6 +208,8 @@ class BatchCutTab(QWidget):
 
     def select_cut_file(self):
         file, _ = QFileDialog.getOpenFileName(self, "Select Cut File", "", "All Files (*.*)")
+        if file:
+            file = choose_archive_member(self, file, cut_engine.RASTER_EXTS + cut_engine.VECTOR_EXTS)
         if file:
             self.cut_file_edit.setText(file)
             self.update_cut_info_box(file)
@@ -103,6 +220,11 @@ class BatchCutTab(QWidget):
             self.out_dir_edit.setText(dir)
 
     def process_batch_cut(self):
+        if self.cut_task is not None:
+            # Second click cancels: the chunked warp in progress stops and remaining files are skipped
+            self.cut_task.cancel()
+            self.cut_status.setText("Cancelling...")
+            return
         input_files = [self.input_list.item(i).text() for i in range(self.input_list.count())]
         cut_file = self.cut_file_edit.text()
         out_dir = self.out_dir_edit.text()
@@ -112,158 +234,180 @@ class BatchCutTab(QWidget):
             QMessageBox.warning(self, "Missing Info", "Please select input files, a cut file, and an output directory.")
             return
 
-        # Get cut geometry and CRS
-        cut_geom, cut_crs = self.get_cut_geometry_and_crs(cut_file)
-        if cut_geom is None or cut_crs is None:
-            QMessageBox.warning(self, "Error", "Could not determine geometry or CRS of cut file.")
+        try:
+            target = self.target_grid()
+        except ValueError as e:
+            QMessageBox.warning(self, "Output Grid", str(e))
             return
 
-        failed = []
-        for in_file in input_files:
-            base = os.path.splitext(os.path.basename(in_file))[0]
-            ext = os.path.splitext(in_file)[1]
-            out_file = os.path.join(out_dir, f"{base}{postfix}{ext}")
-
-            try:
-                if self.is_raster(in_file):
-                    self.cut_raster(in_file, out_file, cut_geom, cut_crs)
-                else:
-                    self.cut_vector(in_file, out_file, cut_geom, cut_crs)
-            except Exception as e:
-                failed.append((in_file, str(e)))
+        # Rasters sharing a pixel grid are cut through one shared rasterized mask
+        jobs = [(in_file, self.output_path(in_file, out_dir, postfix)) for in_file in input_files]
+        # Files are cut one after another, so a huge raster or vector layer may use every core
+        simplification = None
+        if self.simplify_box.isChecked():
+            simplification = cut_engine.CutSimplification(
+                tolerance=self.simplify_spin.value() or None, exact_vectors=self.exact_vectors_check.isChecked()
+            )
+        vector_engine = self.vector_engine_combo.currentData()
+
+        def cut(task):
+            # Get cut geometry and CRS
+            cut_geom, cut_crs = cut_engine.get_cut_geometry_and_crs(cut_file)
+            if cut_geom is None or cut_crs is None:
+                raise ValueError("Could not determine geometry or CRS of cut file.")
+            warnings = []
+            failed = cut_engine.cut_files(
+                jobs, cut_geom, cut_crs, target=target, workers=os.cpu_count() or 1, simplification=simplification,
+                vector_engine=vector_engine, warnings=warnings, cancel_event=task.cancel_event,
+                progress_callback=lambda done, total: task.report_progress(
+                    done / total, f"{int(done)} of {total} files cut"
+                )
+            )
+            return failed, warnings
+
+        self.cut_progress.setRange(0, 100)
+        self.cut_progress.setValue(0)
+        self.cut_progress.setVisible(True)
+        self.cut_status.setText("Cutting...")
+        self.process_btn.setText("Cancel Batch Cut")
+        self.cut_trace_run = tracing.run("Batch Cut").start()
+        self.cut_task = start_background_task(self, cut, self.batch_cut_finished, self.cut_progress_changed)
+
+    def cut_progress_changed(self, fraction, text):
+        self.cut_progress.setValue(int(fraction * 100))
+        self.cut_status.setText(text)
+
+    def batch_cut_finished(self, result, error):
+        cancelled = self.cut_task.is_cancelled()
+        self.cut_task = None
+        self.trace_panel.show_run(self.cut_trace_run.finish())
+        self.cut_trace_run = None
+        self.cut_progress.setVisible(False)
+        self.process_btn.setText("Process Batch Cut")
+        if error:
+            self.cut_status.setText("Batch cut failed.")
+            QMessageBox.warning(self, "Batch Cut", f"Batch cut failed:\n{error}")
+            return
+        failed, warnings = result
+        self.cut_status.setText("Batch cut cancelled." if cancelled else "")
 
+        notes = ""
+        if warnings:
+            notes = "\n\nCut with warnings:\n" + "".join(f"{os.path.basename(f)}: {msg}\n" for f, msg in warnings)
         if failed:
             msg = "Some files failed to process:\n"
             for f, err in failed:
                 msg += f"{os.path.basename(f)}: {err}\n"
-            QMessageBox.warning(self, "Batch Cut", msg)
-        else:
+            QMessageBox.warning(self, "Batch Cut", msg + notes)
+        elif warnings:
+            QMessageBox.warning(self, "Batch Cut", "Batch cut operation completed." + notes)
+        elif not cancelled:
             QMessageBox.information(self, "Batch Cut", "Batch cut operation completed successfully.")
 
-    def is_raster(self, filename):
-        raster_exts = (".tif", ".tiff", ".img", ".vrt", ".asc", ".bil", ".nc")
-        ext = os.path.splitext(filename)[1].lower()
-        if ext in raster_exts:
-            return True
-        try:
-            ds = gdal.Open(filename)
-            if ds:
-                return True
-        except Exception:
-            pass
-        return False
-
-    def get_cut_geometry_and_crs(self, cut_file):
-        # Try raster first
-        ds = gdal.Open(cut_file)
-        if ds:
-            gt = ds.GetGeoTransform()
-            width = ds.RasterXSize
-            height = ds.RasterYSize
-            proj = ds.GetProjection()
-            # Four corners
-            x0, y0 = gt[0], gt[3]
-            x1, y1 = gt[0] + width * gt[1], gt[3] + width * gt[4]
-            x2, y2 = gt[0] + width * gt[1] + height * gt[2], gt[3] + width * gt[4] + height * gt[5]
-            x3, y3 = gt[0] + height * gt[2], gt[3] + height * gt[5]
-            geom = box(min(x0, x1, x2, x3), min(y0, y1, y2, y3), max(x0, x1, x2, x3), max(y0, y1, y2, y3))
-            crs = CRS.from_wkt(proj) if proj else None
-            return geom, crs
-
-        # Try vector
-        ds = ogr.Open(cut_file)
-        if ds:
-            lyr = ds.GetLayer(0)
-            srs = lyr.GetSpatialRef()
-            crs = CRS.from_wkt(srs.ExportToWkt()) if srs else None
-            geoms = []
-            for feat in lyr:
-                geom = shape(feat.GetGeometryRef().__geo_interface__)
-                geoms.append(geom)
-            if geoms:
-                union = unary_union(geoms)
-                return union, crs
-        return None, None
-
-    def cut_raster(self, in_file, out_file, cut_geom, cut_crs):
-        # Open input raster
-        ds = gdal.Open(in_file)
-        if ds is None:
-            raise Exception("Could not open raster.")
-        proj = ds.GetProjection()
-        in_crs = CRS.from_wkt(proj) if proj else None
-
-        # Transform cut_geom to raster CRS if needed
-        if in_crs and cut_crs and in_crs != cut_crs:
-            transformer = Transformer.from_crs(cut_crs, in_crs, always_xy=True)
-            cut_geom = self.transform_geom(cut_geom, transformer)
-
-        # Get bbox of cut_geom in raster CRS
-        minx, miny, maxx, maxy = cut_geom.bounds
-
-        # Use gdal.Warp for cropping
-        warp_opts = gdal.WarpOptions(
-            outputBounds=(minx, miny, maxx, maxy),
-            cropToCutline=True,
-            cutlineDSName=None,
-            cutlineLayer=None,
-            cutlineWkt=cut_geom.wkt
+    def output_path(self, in_file, out_dir, postfix):
+        out_path = cut_engine.output_path(in_file, out_dir, postfix)
+        vector_ext = self.vector_format_combo.currentData()
+        if vector_ext and not cut_engine.is_raster(in_file):
+            out_path = os.path.splitext(out_path)[0] + vector_ext
+        return out_path
+
+    def target_grid(self):
+        """The output grid options as a cut_engine.TargetGrid, or None when not enabled."""
+        if not self.grid_box.isChecked():
+            return None
+        crs = None
+        crs_text = self.target_crs_edit.text().strip()
+        if crs_text:
+            from pyproj import CRS
+            from pyproj.exceptions import CRSError
+            try:
+                crs = CRS.from_user_input(crs_text)
+            except CRSError as e:
+                raise ValueError(f"Invalid target CRS: {e}")
+        return cut_engine.TargetGrid(
+            crs=crs,
+            resolution=self.resolution_spin.value() or None,
+            align=self.align_check.isChecked(),
+            resampling=self.resampling_combo.currentText(),
+            error_threshold=self.error_spin.value(),
         )
-        result = gdal.Warp(out_file, in_file, options=warp_opts)
-        if result is None:
-            raise Exception("gdal.Warp failed.")
-
-    def cut_vector(self, in_file, out_file, cut_geom, cut_crs):
-        # Open input vector
-        ds = ogr.Open(in_file)
-        if ds is None:
-            raise Exception("Could not open vector.")
-        lyr = ds.GetLayer(0)
-        srs = lyr.GetSpatialRef()
-        in_crs = CRS.from_wkt(srs.ExportToWkt()) if srs else None
-
-        # Transform cut_geom to vector CRS if needed
-        if in_crs and cut_crs and in_crs != cut_crs:
-            transformer = Transformer.from_crs(cut_crs, in_crs, always_xy=True)
-            cut_geom = self.transform_geom(cut_geom, transformer)
-
-        # Create output datasource
-        driver = ogr.GetDriverByName("ESRI Shapefile")
-        if os.path.exists(out_file):
-            driver.DeleteDataSource(out_file)
-        out_ds = driver.CreateDataSource(out_file)
-        out_lyr = out_ds.CreateLayer(lyr.GetName(), srs, lyr.GetGeomType())
-
-        # Copy fields
-        in_layer_defn = lyr.GetLayerDefn()
-        for i in range(in_layer_defn.GetFieldCount()):
-            field_defn = in_layer_defn.GetFieldDefn(i)
-            out_lyr.CreateField(field_defn)
-
-        # Clip features
-        for feat in lyr:
-            geom = shape(feat.GetGeometryRef().__geo_interface__)
-            clipped = geom.intersection(cut_geom)
-            if not clipped.is_empty:
-                out_feat = ogr.Feature(out_lyr.GetLayerDefn())
-                for i in range(in_layer_defn.GetFieldCount()):
-                    out_feat.SetField(in_layer_defn.GetFieldDefn(i).GetNameRef(), feat.GetField(i))
-                out_feat.SetGeometry(ogr.CreateGeometryFromWkb(clipped.wkb))
-                out_lyr.CreateFeature(out_feat)
-                out_feat = None
-        out_ds = None
-
-    def transform_geom(self, geom, transformer):
-        # Transform a shapely geometry using a pyproj Transformer
-        def _transform(x, y, z=None):
-            return transformer.transform(x, y)
-        return shapely.ops.transform(_transform, geom)
+
+    def run_zonal_statistics(self):
+        if self.zonal_task is not None:
+            # Second click cancels the running job
+            self.zonal_task.cancel()
+            self.zonal_status.setText("Cancelling...")
+            return
+        selected = [item.text() for item in self.input_list.selectedItems()]
+        candidates = selected or [self.input_list.item(i).text() for i in range(self.input_list.count())]
+        rasters = [f for f in candidates if cut_engine.is_raster(f)]
+        cut_file = self.cut_file_edit.text()
+        out_dir = self.out_dir_edit.text()
+        postfix = self.postfix_edit.text()
+        if not rasters or not cut_file or not out_dir:
+            QMessageBox.warning(self, "Missing Info", "Please select input rasters, a polygon cut file, and an output directory.")
+            return
+        if cut_engine.is_raster(cut_file):
+            QMessageBox.warning(self, "Zonal Statistics", "The cut file must be a polygon layer to use it as zones.")
+            return
+        jobs = [
+            (path, os.path.join(out_dir, archive_inputs.split_name(path)[0] + postfix + "_zonal.csv"))
+            for path in rasters
+        ]
+        self.zonal_progress.setRange(0, 100)
+        self.zonal_progress.setValue(0)
+        self.zonal_progress.setVisible(True)
+        self.zonal_btn.setText("Cancel Zonal Statistics")
+
+        def compute(task):
+            from zonal_stats import zonal_statistics
+            written, failed = [], []
+            for i, (raster, out_path) in enumerate(jobs):
+                name = archive_inputs.display_name(raster)
+                try:
+                    zones = zonal_statistics(
+                        raster, cut_file, out_path, cancel_event=task.cancel_event,
+                        progress_callback=lambda done, total: task.report_progress(
+                            (i + done / total) / len(jobs), f"{name}: block {done} of {total}"
+                        )
+                    )
+                except Exception as e:
+                    failed.append((raster, str(e) or type(e).__name__))
+                    continue
+                if zones is None:
+                    break
+                written.append(out_path)
+            return written, failed
+
+        self.zonal_task = start_background_task(self, compute, self.zonal_finished, self.zonal_progress_changed)
+
+    def zonal_progress_changed(self, fraction, text):
+        self.zonal_progress.setValue(int(fraction * 100))
+        self.zonal_status.setText(text)
+
+    def zonal_finished(self, result, error):
+        cancelled = self.zonal_task.is_cancelled()
+        self.zonal_task = None
+        self.zonal_progress.setVisible(False)
+        self.zonal_btn.setText("Zonal Statistics")
+        if error:
+            self.zonal_status.setText("Zonal statistics failed.")
+            QMessageBox.warning(self, "Zonal Statistics", f"Zonal statistics failed:\n{error}")
+            return
+        written, failed = result
+        status = f"Wrote {len(written)} statistics table(s)" + (" before cancelling." if cancelled else ".")
+        self.zonal_status.setText(status)
+        if failed:
+            msg = "Some files failed to process:\n"
+            for f, err in failed:
+                msg += f"{os.path.basename(f)}: {err}\n"
+            QMessageBox.warning(self, "Zonal Statistics", msg)
 
     def update_cut_info_box(self, file_path):
         # Try to open as raster with GDAL
         info = None
         try:
-            ds = gdal.Open(file_path)
+            ds = open_raster(file_path)
             if ds:
                 gt = ds.GetGeoTransform()
                 proj = ds.GetProjection()
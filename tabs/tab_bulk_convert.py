@@ -0,0 +1,156 @@
+"""
+Tab: Bulk Point Coordinate Conversion (CSV/Parquet)
+"""
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QFormLayout, QPushButton, QLabel, QLineEdit,
+    QComboBox, QSpinBox, QFileDialog, QMessageBox, QProgressBar
+)
+from widgets.background_task import start_background_task
+import os
+
+TABLE_FILTER = "Tables (*.csv *.parquet *.pq);;All Files (*)"
+
+
+class BulkConvertTab(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+
+        # Input / output files
+        in_layout = QHBoxLayout()
+        self.in_edit = QLineEdit()
+        self.in_btn = QPushButton("Select Input Table")
+        in_layout.addWidget(self.in_edit)
+        in_layout.addWidget(self.in_btn)
+        form.addRow("Input CSV/Parquet:", in_layout)
+        self.in_btn.clicked.connect(self.select_input)
+
+        out_layout = QHBoxLayout()
+        self.out_edit = QLineEdit()
+        self.out_btn = QPushButton("Select Output Table")
+        out_layout.addWidget(self.out_edit)
+        out_layout.addWidget(self.out_btn)
+        form.addRow("Output CSV/Parquet:", out_layout)
+        self.out_btn.clicked.connect(self.select_output)
+
+        # Direction
+        self.direction_combo = QComboBox()
+        self.direction_combo.addItems(["Lat/Long -> UTM", "UTM -> Lat/Long"])
+        form.addRow("Conversion:", self.direction_combo)
+
+        # Column names
+        self.lat_col = QLineEdit("lat")
+        self.lon_col = QLineEdit("lon")
+        self.easting_col = QLineEdit("easting")
+        self.northing_col = QLineEdit("northing")
+        self.zone_col = QLineEdit("utm_zone")
+        self.hemisphere_col = QLineEdit("hemisphere")
+        form.addRow("Latitude Column:", self.lat_col)
+        form.addRow("Longitude Column:", self.lon_col)
+        form.addRow("Easting Column:", self.easting_col)
+        form.addRow("Northing Column:", self.northing_col)
+        form.addRow("UTM Zone Column:", self.zone_col)
+        form.addRow("Hemisphere Column:", self.hemisphere_col)
+
+        # Fixed zone/hemisphere overrides
+        self.zone_spin = QSpinBox()
+        self.zone_spin.setRange(0, 60)
+        self.zone_spin.setSpecialValueText("Auto / from column")
+        form.addRow("Force UTM Zone:", self.zone_spin)
+        self.hemisphere_combo = QComboBox()
+        self.hemisphere_combo.addItems(["From column", "North", "South"])
+        form.addRow("Force Hemisphere (UTM input):", self.hemisphere_combo)
+
+        # Workers
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, 256)
+        self.workers_spin.setValue(os.cpu_count() or 1)
+        form.addRow("Worker Processes:", self.workers_spin)
+        layout.addLayout(form)
+
+        # Run / progress
+        self.run_btn = QPushButton("Convert")
+        self.run_btn.clicked.connect(self.run_conversion)
+        layout.addWidget(self.run_btn)
+        self.progress = QProgressBar()
+        self.progress.setVisible(False)
+        layout.addWidget(self.progress)
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+        layout.addStretch()
+
+        self.task = None
+
+    def select_input(self):
+        file, _ = QFileDialog.getOpenFileName(self, "Select Input Table", "", TABLE_FILTER)
+        if file:
+            self.in_edit.setText(file)
+            if not self.out_edit.text():
+                base, ext = os.path.splitext(file)
+                self.out_edit.setText(f"{base}_converted{ext}")
+
+    def select_output(self):
+        file, _ = QFileDialog.getSaveFileName(self, "Select Output Table", "", TABLE_FILTER)
+        if file:
+            self.out_edit.setText(file)
+
+    def run_conversion(self):
+        if self.task is not None:
+            # Second click cancels the running conversion
+            self.task.cancel()
+            self.status_label.setText("Cancelling...")
+            return
+        in_path = self.in_edit.text()
+        out_path = self.out_edit.text()
+        if not in_path or not out_path:
+            QMessageBox.warning(self, "Missing Info", "Please select an input and an output table.")
+            return
+        if os.path.abspath(in_path) == os.path.abspath(out_path):
+            QMessageBox.warning(self, "Bulk Convert", "Output must be different from the input table.")
+            return
+        hemisphere = {1: "N", 2: "S"}.get(self.hemisphere_combo.currentIndex())
+        kwargs = dict(
+            in_path=in_path, out_path=out_path,
+            to_utm=self.direction_combo.currentIndex() == 0,
+            lat_col=self.lat_col.text(), lon_col=self.lon_col.text(),
+            easting_col=self.easting_col.text(), northing_col=self.northing_col.text(),
+            zone_col=self.zone_col.text(), hemisphere_col=self.hemisphere_col.text(),
+            zone=self.zone_spin.value() or None, hemisphere=hemisphere,
+            workers=self.workers_spin.value()
+        )
+        self.progress.setRange(0, 0)  # Busy indicator until the row total is known
+        self.progress.setVisible(True)
+        self.run_btn.setText("Cancel")
+        self.status_label.setText("Converting...")
+
+        def convert(task):
+            from bulk_convert import convert_file
+            return convert_file(
+                progress_callback=lambda done, total: task.report_progress(
+                    done / total if total else -1, f"{done:,} rows converted" + (f" of {total:,}" if total else "")
+                ),
+                cancel_event=task.cancel_event,
+                **kwargs
+            )
+
+        self.task = start_background_task(self, convert, self.conversion_finished, self.show_progress)
+
+    def show_progress(self, fraction, text):
+        if fraction >= 0:
+            self.progress.setRange(0, 100)
+            self.progress.setValue(int(fraction * 100))
+        self.status_label.setText(text)
+
+    def conversion_finished(self, rows, error):
+        cancelled = self.task.is_cancelled()
+        self.task = None
+        self.progress.setVisible(False)
+        self.run_btn.setText("Convert")
+        if error:
+            self.status_label.setText("Conversion failed.")
+            QMessageBox.warning(self, "Bulk Convert", f"Conversion failed:\n{error}")
+        elif cancelled:
+            self.status_label.setText(f"Cancelled after {rows:,} rows.")
+        else:
+            self.status_label.setText(f"Wrote {rows:,} rows to {os.path.basename(self.out_edit.text())}.")
@@ -2,9 +2,15 @@
 Tab 2: GDAL Info on a File
 """
 from PySide6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTextEdit, QFileDialog, QLabel
+    QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTextEdit, QFileDialog, QLabel,
+    QCheckBox, QProgressBar
 )
 from widgets.info_box import InfoBox
+from widgets.background_task import start_background_task
+from widgets.trace_panel import TracePanel
+from widgets.archive_picker import ARCHIVE_FILTER, choose_archive_member
+import archive_inputs
+import tracing
 import subprocess
 import os
 import re
@@ -21,6 +27,16 @@ class GDALInfoTab(QWidget):
         file_layout.addWidget(self.file_label)
         file_layout.addWidget(self.choose_btn)
         self.layout().addLayout(file_layout)
+        # Deep inspection (per-band checksum/stats/histogram in parallel workers)
+        deep_layout = QHBoxLayout()
+        self.deep_check = QCheckBox("Deep inspection (per-band checksums, stats, histograms)")
+        self.deep_progress = QProgressBar()
+        self.deep_progress.setRange(0, 100)
+        self.deep_progress.setVisible(False)
+        deep_layout.addWidget(self.deep_check)
+        deep_layout.addWidget(self.deep_progress)
+        self.layout().addLayout(deep_layout)
+        self.deep_task = None
         # Output area
         self.output = QTextEdit()
         self.output.setReadOnly(True)
@@ -28,6 +44,10 @@ class GDALInfoTab(QWidget):
         # Info box
         self.info_box = InfoBox()
         self.layout().addWidget(self.info_box)
+        # Per-stage timings of the last info/inspection run (when tracing is on)
+        self.trace_panel = TracePanel()
+        self.layout().addWidget(self.trace_panel)
+        self.deep_trace = None
         self.selected_file = None
 
     def choose_file(self):
@@ -35,12 +55,17 @@ class GDALInfoTab(QWidget):
             self,
             "Select GIS Raster File",
             "",
-            "Raster Files (*.tif *.tiff *.img *.vrt *.asc *.bil *.nc);;All Files (*)"
+            f"Raster Files (*.tif *.tiff *.img *.vrt *.asc *.bil *.nc);;{ARCHIVE_FILTER};;All Files (*)"
         )
+        if file:
+            # Archives are read in place through /vsizip/, /vsitar/ or /vsigzip/
+            file = choose_archive_member(self, file, (".tif", ".tiff", ".img", ".vrt", ".asc", ".bil", ".nc"))
         if file:
             self.selected_file = file
-            self.file_label.setText(os.path.basename(file))
-            self.process_file()
+            self.file_label.setText(archive_inputs.display_name(file))
+            with tracing.run("GDAL Info") as trace_run:
+                self.process_file()
+            self.trace_panel.show_run(trace_run.summary)
         else:
             self.selected_file = None
             self.file_label.setText("No file selected.")
@@ -56,9 +81,12 @@ class GDALInfoTab(QWidget):
         info = None
         try:
             from osgeo import gdal, osr
-            ds = gdal.Open(self.selected_file)
+            from dataset_pool import open_raster
+            with tracing.span("gdal.Open", file=archive_inputs.display_name(self.selected_file)):
+                ds = open_raster(self.selected_file)
             if ds:
-                info = gdal.Info(ds)
+                with tracing.span("gdal.Info"):
+                    info = gdal.Info(ds)
                 gt = ds.GetGeoTransform()
                 proj = ds.GetProjection()
                 width = ds.RasterXSize
@@ -82,8 +110,9 @@ class GDALInfoTab(QWidget):
                 if proj:
                     srs = osr.SpatialReference()
                     try:
-                        srs.ImportFromWkt(proj)
-                        native_crs_str = srs.ExportToPrettyWkt()  # Or use srs.GetAttrValue("PROJCS")/("GEOGCS") for a short name
+                        with tracing.span("parse CRS"):
+                            srs.ImportFromWkt(proj)
+                            native_crs_str = srs.ExportToPrettyWkt()  # Or use srs.GetAttrValue("PROJCS")/("GEOGCS") for a short name
                         if srs.IsProjected():
                             utm_zone = srs.GetUTMZone()
                             is_north = srs.IsNorth()
@@ -115,7 +144,8 @@ class GDALInfoTab(QWidget):
                     input_crs = 'wgs84'
                     native_crs_str = None
 
-                self.info_box.update_info(bbox_corners_for_info, input_crs=input_crs, native_crs=native_crs_str)
+                with tracing.span("info box"):
+                    self.info_box.update_info(bbox_corners_for_info, input_crs=input_crs, native_crs=native_crs_str)
             else:
                 info = "Could not open raster file."
                 self.info_box.update_info([], input_crs='wgs84')
@@ -124,12 +154,13 @@ class GDALInfoTab(QWidget):
             # If osgeo fails, try subprocess
             print(f"osgeo failed: {e}. Falling back to subprocess.")
             try:
-                result = subprocess.run(
-                    ["gdalinfo", self.selected_file],
-                    capture_output=True,
-                    text=True,
-                    shell=True
-                )
+                with tracing.span("gdalinfo subprocess"):
+                    result = subprocess.run(
+                        ["gdalinfo", self.selected_file],
+                        capture_output=True,
+                        text=True,
+                        shell=True
+                    )
                 info = result.stdout if result.returncode == 0 else result.stderr
 
                 if result.returncode == 0:
@@ -183,3 +214,50 @@ class GDALInfoTab(QWidget):
             self.output.setText(info)
         else:
             self.output.setText("Could not retrieve GDAL info.")
+        self.start_deep_inspection()
+
+    def start_deep_inspection(self):
+        self.cancel_deep_inspection()
+        if not self.selected_file or not self.deep_check.isChecked():
+            return
+        path = self.selected_file
+
+        def inspect(task):
+            from raster_utils import inspect_bands, format_band_report
+            results = inspect_bands(
+                path,
+                progress_callback=lambda fraction: task.report_progress(fraction),
+                cancel_event=task.cancel_event
+            )
+            return None if results is None else format_band_report(results)
+
+        self.deep_progress.setValue(0)
+        self.deep_progress.setVisible(True)
+        self.deep_trace = tracing.run("Deep Inspection").start()
+        self.deep_task = start_background_task(self, inspect, self.show_deep_report, self.show_deep_progress)
+
+    def cancel_deep_inspection(self):
+        # Stop a running inspection (e.g. a new file was chosen); its workers exit at the next strip
+        if self.deep_task is not None:
+            self.deep_task.cancel()
+            self.deep_task.progress.disconnect(self.show_deep_progress)
+            self.deep_task.finished.disconnect(self.show_deep_report)
+        if self.deep_trace is not None:
+            # show_deep_report won't run, so stop the run here or it keeps collecting spans
+            self.deep_trace.discard()
+        self.deep_trace = None
+        self.deep_task = None
+        self.deep_progress.setVisible(False)
+
+    def show_deep_progress(self, fraction, text):
+        self.deep_progress.setValue(int(fraction * 100))
+
+    def show_deep_report(self, report, error):
+        self.deep_task = None
+        self.deep_progress.setVisible(False)
+        self.trace_panel.show_run(self.deep_trace.finish())
+        self.deep_trace = None
+        if error:
+            self.output.append(f"\nDeep inspection failed: {error}")
+        elif report is not None:
+            self.output.append("\nDeep inspection:\n" + report)
@@ -1,12 +1,17 @@
 """
 Tab 3: Display Raster File (GeoTiff/IMG)
 """
-from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QFileDialog, QTextEdit)
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QFileDialog, QTextEdit,
+                               QProgressBar, QMessageBox, QInputDialog)
 from PySide6.QtCore import Qt
 from widgets.info_box import InfoBox
-from osgeo import gdal
-import numpy as np
-import matplotlib.pyplot as plt
+from widgets.background_task import start_background_task
+from widgets.trace_panel import TracePanel
+from widgets.archive_picker import ARCHIVE_FILTER, choose_archive_member
+from raster_utils import display_statistics, load_display_band
+import archive_inputs
+import tracing
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 import os
 import re # Import re for UTM zone detection
@@ -22,9 +27,30 @@ class RasterDisplayTab(QWidget):
         self.choose_btn.clicked.connect(self.choose_file)
         file_layout.addWidget(self.file_label)
         file_layout.addWidget(self.choose_btn)
+        # KMZ super-overlay export (tile pyramid for Google Earth)
+        self.kmz_btn = QPushButton("Export KMZ Super-Overlay")
+        self.kmz_btn.clicked.connect(self.export_kmz)
+        file_layout.addWidget(self.kmz_btn)
+        self.kmz_progress = QProgressBar()
+        self.kmz_progress.setRange(0, 100)
+        self.kmz_progress.setVisible(False)
+        file_layout.addWidget(self.kmz_progress)
+        self.kmz_task = None
+        self.kmz_out_path = None
+        # Raster values at point locations (table or point layer) written to a table
+        self.sample_btn = QPushButton("Sample at Points")
+        self.sample_btn.setToolTip("Write the raster's values at every point of a CSV/Parquet table or point layer")
+        self.sample_btn.clicked.connect(self.sample_points)
+        file_layout.addWidget(self.sample_btn)
+        self.sample_progress = QProgressBar()
+        self.sample_progress.setVisible(False)
+        file_layout.addWidget(self.sample_progress)
+        self.sample_task = None
         self.layout().addLayout(file_layout)
         # Map display
-        self.figure, self.ax = plt.subplots()
+        # Plain Figure rather than pyplot: no global figure manager, and it's cheaper to create
+        self.figure = Figure()
+        self.ax = self.figure.add_subplot()
         self.canvas = FigureCanvas(self.figure)
         self.layout().addWidget(self.canvas)
         # Statistics box
@@ -34,13 +60,21 @@ class RasterDisplayTab(QWidget):
         # Info box
         self.info_box = InfoBox()
         self.layout().addWidget(self.info_box)
+        # Per-stage timings of the last display (when tracing is on)
+        self.trace_panel = TracePanel()
+        self.layout().addWidget(self.trace_panel)
         self.selected_file = None
 
     def choose_file(self):
-        file, _ = QFileDialog.getOpenFileName(self, "Select Raster File", "", "Raster Files (*.tif *.tiff *.img);;All Files (*)")
+        file, _ = QFileDialog.getOpenFileName(
+            self, "Select Raster File", "", f"Raster Files (*.tif *.tiff *.img);;{ARCHIVE_FILTER};;All Files (*)"
+        )
+        if file:
+            # Archives are read in place through /vsizip/, /vsitar/ or /vsigzip/
+            file = choose_archive_member(self, file, (".tif", ".tiff", ".img"))
         if file:
             self.selected_file = file
-            self.file_label.setText(os.path.basename(file))
+            self.file_label.setText(archive_inputs.display_name(file))
             self.process_file()  # Automatically display after file selection
         else:
             self.selected_file = None
@@ -57,19 +91,28 @@ class RasterDisplayTab(QWidget):
             self.ax.clear()
             self.canvas.draw()
             return
+        trace_run = tracing.run("Display Raster").start()
         try:
-            ds = gdal.Open(self.selected_file)
-            band = ds.GetRasterBand(1)
-            arr = band.ReadAsArray()
-            arr = np.ma.masked_invalid(arr)
-            vmin, vmax = arr.min(), arr.max()
-            self.ax.clear()
-            im = self.ax.imshow(arr, cmap='rainbow', vmin=vmin, vmax=vmax)
-            self.figure.colorbar(im, ax=self.ax, orientation='vertical')
-            self.ax.set_title("Raster Display")
-            self.canvas.draw()
+            with tracing.span("load band", file=archive_inputs.display_name(self.selected_file)):
+                ds, arr = load_display_band(self.selected_file)
+            # Full-resolution statistics, also when a large band is displayed decimated
+            with tracing.span("statistics"):
+                band_stats = display_statistics(self.selected_file, arr)
+            vmin, vmax = band_stats['min'], band_stats['max']
+            with tracing.span("render"):
+                self.ax.clear()
+                im = self.ax.imshow(arr, cmap='rainbow', vmin=vmin, vmax=vmax)
+                self.figure.colorbar(im, ax=self.ax, orientation='vertical')
+                self.ax.set_title("Raster Display")
+                self.canvas.draw()
             # Stats
-            stats = f"Min: {vmin}\nMax: {vmax}\nMean: {arr.mean()}\nStd: {arr.std()}\nShape: {arr.shape}"
+            shape = (ds.RasterYSize, ds.RasterXSize)
+            stats = (
+                f"Min: {vmin}\nMax: {vmax}\nMean: {band_stats['mean']}\nStd: {band_stats['std']}\n"
+                f"Valid pixels: {band_stats['valid_count']:,}\nShape: {shape}"
+            )
+            if arr.shape != shape:
+                stats += f" (displayed at {arr.shape[1]} x {arr.shape[0]})"
             self.stats_box.setText(stats)
             # Info box: extract bounding box and CRS
             gt = ds.GetGeoTransform()
@@ -107,10 +150,133 @@ class RasterDisplayTab(QWidget):
                     bbox = [(x, y, zone, is_north) for (x, y) in bbox]
                     input_crs = 'utm'
 
-            self.info_box.update_info(bbox, input_crs=input_crs, native_crs=native_crs_str)
+            with tracing.span("info box"):
+                self.info_box.update_info(bbox, input_crs=input_crs, native_crs=native_crs_str)
 
         except Exception as e:
             self.stats_box.setText(f"Error displaying raster: {e}")
             self.info_box.update_info([(0,0),(0,0),(0,0),(0,0)], input_crs='wgs84')
             self.ax.clear()
             self.canvas.draw()
+        self.trace_panel.show_run(trace_run.finish())
+
+    def export_kmz(self):
+        if self.kmz_task is not None:
+            # Second click cancels; rendered tiles are kept so the next export resumes
+            self.kmz_task.cancel()
+            self.kmz_btn.setText("Cancelling...")
+            return
+        if not self.selected_file:
+            QMessageBox.warning(self, "Missing Info", "Please choose a raster file first.")
+            return
+        # Next to the source file (or the archive it came from)
+        default_path = os.path.join(
+            os.path.dirname(archive_inputs.local_path(self.selected_file)),
+            archive_inputs.split_name(self.selected_file)[0] + ".kmz"
+        )
+        out_path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Save KMZ Super-Overlay", default_path,
+            "KMZ, PNG tiles (*.kmz);;KMZ, JPEG tiles (*.kmz)"
+        )
+        if not out_path:
+            return
+        tile_format = "JPEG" if "JPEG" in selected_filter else "PNG"
+        src_path = self.selected_file
+
+        def export(task):
+            from super_overlay import export_super_overlay
+            return export_super_overlay(
+                src_path, out_path, tile_format=tile_format,
+                progress_callback=lambda fraction: task.report_progress(fraction),
+                cancel_event=task.cancel_event
+            )
+
+        self.kmz_progress.setValue(0)
+        self.kmz_progress.setVisible(True)
+        self.kmz_btn.setText("Cancel KMZ Export")
+        self.kmz_out_path = out_path
+        self.kmz_task = start_background_task(self, export, self.kmz_finished, self.kmz_progress_changed)
+
+    def kmz_progress_changed(self, fraction, text):
+        self.kmz_progress.setValue(int(fraction * 100))
+
+    def kmz_finished(self, tiles, error):
+        self.kmz_task = None
+        self.kmz_progress.setVisible(False)
+        self.kmz_btn.setText("Export KMZ Super-Overlay")
+        if error:
+            QMessageBox.warning(self, "KMZ Export", f"Export failed:\n{error}")
+        elif tiles is None:
+            QMessageBox.information(self, "KMZ Export", "Export cancelled. Run it again to resume.")
+        else:
+            QMessageBox.information(self, "KMZ Export", f"Wrote {tiles} tiles to {self.kmz_out_path}.")
+
+    def sample_points(self):
+        if self.sample_task is not None:
+            # Second click cancels; the rows written so far are kept
+            self.sample_task.cancel()
+            self.sample_btn.setText("Cancelling...")
+            return
+        if not self.selected_file:
+            QMessageBox.warning(self, "Missing Info", "Please choose a raster file first.")
+            return
+        points_path, _ = QFileDialog.getOpenFileName(
+            self, "Select Points", "",
+            "Point Tables and Layers (*.csv *.parquet *.pq *.gpkg *.shp *.geojson *.fgb);;All Files (*)"
+        )
+        if not points_path:
+            return
+        base, ext = os.path.splitext(points_path)
+        default_ext = ext if ext.lower() in (".csv", ".parquet", ".pq") else ".csv"
+        out_path, _ = QFileDialog.getSaveFileName(
+            self, "Save Sampled Values", f"{base}_samples{default_ext}", "Tables (*.csv *.parquet *.pq);;All Files (*)"
+        )
+        if not out_path:
+            return
+        if os.path.abspath(out_path) == os.path.abspath(points_path):
+            QMessageBox.warning(self, "Sample at Points", "Output must be different from the points file.")
+            return
+        from raster_sampling import SAMPLING_METHODS
+        method, ok = QInputDialog.getItem(self, "Sample at Points", "Sampling:", list(SAMPLING_METHODS), 0, False)
+        if not ok:
+            return
+        src_path = self.selected_file
+
+        def sample(task):
+            from raster_sampling import format_throughput, sample_file
+
+            def report(done, total, seconds):
+                text = f"{done:,} points, {format_throughput(done, seconds)}"
+                task.report_progress(done / total if total else -1, text)
+            return sample_file(src_path, points_path, out_path, method=method,
+                               progress_callback=report, cancel_event=task.cancel_event)
+
+        self.sample_progress.setRange(0, 0)  # Busy indicator until the point total is known
+        self.sample_progress.setVisible(True)
+        self.sample_btn.setText("Cancel Sampling")
+        self.sample_out_path = out_path
+        self.sample_task = start_background_task(self, sample, self.sample_finished, self.sample_progress_changed)
+
+    def sample_progress_changed(self, fraction, text):
+        if fraction >= 0:
+            self.sample_progress.setRange(0, 100)
+            self.sample_progress.setValue(int(fraction * 100))
+        self.sample_progress.setFormat(text)
+
+    def sample_finished(self, result, error):
+        from raster_sampling import format_throughput
+        cancelled = self.sample_task.is_cancelled()
+        self.sample_task = None
+        self.sample_progress.setVisible(False)
+        self.sample_btn.setText("Sample at Points")
+        if error:
+            QMessageBox.warning(self, "Sample at Points", f"Sampling failed:\n{error}")
+            return
+        points, seconds = result
+        if cancelled:
+            QMessageBox.information(self, "Sample at Points", f"Cancelled after {points:,} points.")
+        else:
+            QMessageBox.information(
+                self, "Sample at Points",
+                f"Wrote {points:,} points to {self.sample_out_path} in {seconds:.1f} s ({format_throughput(points, seconds)})."
+            )
@@ -3,11 +3,20 @@ Tab 1: Create a KML Bounding Box
 """
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QFormLayout, QLabel, QLineEdit, QComboBox,
-    QSpinBox, QDoubleSpinBox, QPushButton, QCheckBox, QGroupBox, QFileDialog, QSizePolicy
+    QSpinBox, QDoubleSpinBox, QPushButton, QCheckBox, QGroupBox, QFileDialog, QSizePolicy,
+    QMessageBox, QProgressBar
 )
+from PySide6.QtCore import QTimer
 from widgets.info_box import InfoBox
+from widgets.background_task import start_background_task
 from gis_utils import latlon_to_utm, utm_to_latlon, round_to_nearest, get_bbox_from_centroid
-import shapefile
+
+# Delay after the last input change before the InfoBox is recomputed
+INFO_UPDATE_DEBOUNCE_MS = 150
+# Default centroid: Washington Monument, as lat/lon and its UTM zone 18N position (precomputed so
+# building the tab doesn't need a pyproj transformer)
+DEFAULT_LATLON = (38.8895, -77.0353)
+DEFAULT_UTM = (323478.06, 4306483.24, 18, True)
 
 class KMLBoundingBoxTab(QWidget):
     def __init__(self, parent=None):
@@ -80,6 +89,20 @@ class KMLBoundingBoxTab(QWidget):
         self.bbox_btn = QPushButton("Create Bounding Box")
         self.bbox_btn.clicked.connect(self.create_bbox_and_select_kml)
         form.addRow(self.bbox_btn)
+        # Batch mode: one box per row of a centroid table, using the settings above as defaults
+        self.batch_btn = QPushButton("Create Bounding Boxes From Centroid Table...")
+        self.batch_btn.setToolTip(
+            "CSV/Parquet with columns name + lat/lon (Lat/Long input) or easting/northing/utm_zone/hemisphere (UTM input;\n"
+            "without a hemisphere column the North/South choice above is used).\n"
+            "Optional width/height columns override the sizes above. Output: KML, KMZ, Shapefile or GeoPackage."
+        )
+        self.batch_btn.clicked.connect(self.create_bboxes_from_table)
+        form.addRow(self.batch_btn)
+        self.batch_progress = QProgressBar()
+        self.batch_progress.setVisible(False)
+        form.addRow(self.batch_progress)
+        self.batch_task = None
+        self.batch_out_path = None
         # Layout
         self.layout().addLayout(form)
         self.layout().addStretch()  # Add stretch to push InfoBox to the bottom
@@ -91,26 +114,32 @@ class KMLBoundingBoxTab(QWidget):
         self.info_box.setSizePolicy(self.info_box.sizePolicy().horizontalPolicy(), QSizePolicy.Fixed)
         self.layout().addWidget(self.info_box)
         # Set default to Washington Monument
-        self.lat.setValue(38.8895)
-        self.lon.setValue(-77.0353)
-        utm_e, utm_n, utm_z, utm_ns = latlon_to_utm(38.8895, -77.0353)
+        self.lat.setValue(DEFAULT_LATLON[0])
+        self.lon.setValue(DEFAULT_LATLON[1])
+        utm_e, utm_n, utm_z, utm_ns = DEFAULT_UTM
         self.utm_easting.setValue(utm_e)
         self.utm_northing.setValue(utm_n)
         self.utm_zone.setValue(utm_z)
         self.utm_ns.setCurrentIndex(0 if utm_ns else 1)
-        # Connect signals for real-time update
-        self.coord_type_combo.currentIndexChanged.connect(self.update_info_box)
-        self.lat.valueChanged.connect(self.update_info_box)
-        self.lon.valueChanged.connect(self.update_info_box)
-        self.utm_easting.valueChanged.connect(self.update_info_box)
-        self.utm_northing.valueChanged.connect(self.update_info_box)
-        self.utm_zone.valueChanged.connect(self.update_info_box)
-        self.utm_ns.currentIndexChanged.connect(self.update_info_box)
-        self.width.valueChanged.connect(self.update_info_box)
-        self.height.valueChanged.connect(self.update_info_box)
-        self.round_utm.valueChanged.connect(self.update_info_box)
+        # Connect signals for real-time update, coalesced through a single-shot timer so that
+        # holding an arrow key or typing quickly triggers one recomputation, not dozens
+        self.info_timer = QTimer(self)
+        self.info_timer.setSingleShot(True)
+        self.info_timer.setInterval(INFO_UPDATE_DEBOUNCE_MS)
+        self.info_timer.timeout.connect(self.update_info_box)
+        self.coord_type_combo.currentIndexChanged.connect(self.schedule_info_update)
+        self.lat.valueChanged.connect(self.schedule_info_update)
+        self.lon.valueChanged.connect(self.schedule_info_update)
+        self.utm_easting.valueChanged.connect(self.schedule_info_update)
+        self.utm_northing.valueChanged.connect(self.schedule_info_update)
+        self.utm_zone.valueChanged.connect(self.schedule_info_update)
+        self.utm_ns.currentIndexChanged.connect(self.schedule_info_update)
+        self.width.valueChanged.connect(self.schedule_info_update)
+        self.height.valueChanged.connect(self.schedule_info_update)
+        self.round_utm.valueChanged.connect(self.schedule_info_update)
         self.toggle_coord_inputs()
-        self.update_info_box()
+        # First info update (city lookup, transforms) runs after the window is shown
+        QTimer.singleShot(0, self.update_info_box)
 
     def toggle_coord_inputs(self):
         utm_enabled = self.coord_type_combo.currentIndex() == 0
@@ -121,6 +150,10 @@ class KMLBoundingBoxTab(QWidget):
         for w in [self.lat, self.lon]:
             w.setEnabled(not utm_enabled)
 
+    def schedule_info_update(self):
+        # (Re)start the debounce timer; update_info_box runs once input settles
+        self.info_timer.start()
+
     def create_bbox_and_select_kml(self):
         # Update info box first
         self.update_info_box()
@@ -136,32 +169,68 @@ class KMLBoundingBoxTab(QWidget):
             if self.save_shp.isChecked():
                 self.generate_shp(file_path)
 
-    def update_info_box(self):
-        # Get centroid in UTM
-        if self.coord_type_combo.currentIndex() == 0:
-            easting = self.utm_easting.value()
-            northing = self.utm_northing.value()
-            zone = self.utm_zone.value()
-            is_north = self.utm_ns.currentIndex() == 0
-        else:
-            lat = self.lat.value()
-            lon = self.lon.value()
-            easting, northing, zone, is_north = latlon_to_utm(lat, lon)
+    def create_bboxes_from_table(self):
+        if self.batch_task is not None:
+            # Second click cancels the running batch
+            self.batch_task.cancel()
+            self.batch_btn.setText("Cancelling...")
+            return
+        in_path, _ = QFileDialog.getOpenFileName(
+            self, "Select Centroid Table", "", "Tables (*.csv *.parquet *.pq);;All Files (*)"
+        )
+        if not in_path:
+            return
+        from feature_writer import FEATURE_FILTER
+        out_path, _ = QFileDialog.getSaveFileName(self, "Save Bounding Boxes", "", FEATURE_FILTER)
+        if not out_path:
+            return
+        kwargs = dict(
+            coord_type='utm' if self.coord_type_combo.currentIndex() == 0 else 'latlon',
+            width=self.width.value(), height=self.height.value(), round_to=self.round_utm.value(),
+            hemisphere='N' if self.utm_ns.currentIndex() == 0 else 'S'
+        )
 
-        # Round UTM centroid
-        easting = round_to_nearest(easting, self.round_utm.value())
-        northing = round_to_nearest(northing, self.round_utm.value())
+        def write(task):
+            from batch_bbox import write_bbox_table
+            return write_bbox_table(
+                in_path, out_path,
+                progress_callback=lambda done, total: task.report_progress(
+                    done / total if total else -1, f"{done:,} rows read" + (f" of {total:,}" if total else "")
+                ),
+                cancel_event=task.cancel_event,
+                **kwargs
+            )
 
-        # Calculate BBox based on rounded UTM centroid and specified width/height
-        bbox = get_bbox_from_centroid(easting, northing, self.width.value(), self.height.value())
+        self.batch_progress.setRange(0, 0)  # Busy indicator until the row total is known
+        self.batch_progress.setVisible(True)
+        self.batch_btn.setText("Cancel")
+        self.batch_out_path = out_path
+        self.batch_task = start_background_task(self, write, self.batch_finished, self.batch_progress_changed)
 
-        # Prepare corners: [top-left, top-right, bottom-right, bottom-left] in UTM
-        utm_corners = [
-            (bbox['west'], bbox['north'], zone, is_north),   # top-left
-            (bbox['east'], bbox['north'], zone, is_north),   # top-right
-            (bbox['east'], bbox['south'], zone, is_north),   # bottom-right
-            (bbox['west'], bbox['south'], zone, is_north),   # bottom-left
-        ]
+    def batch_progress_changed(self, fraction, text):
+        if fraction >= 0:
+            self.batch_progress.setRange(0, 100)
+            self.batch_progress.setValue(int(fraction * 100))
+        self.batch_progress.setFormat(text or "%p%")
+
+    def batch_finished(self, count, error):
+        cancelled = self.batch_task.is_cancelled()
+        self.batch_task = None
+        self.batch_progress.setVisible(False)
+        self.batch_btn.setText("Create Bounding Boxes From Centroid Table...")
+        if error:
+            QMessageBox.warning(self, "Batch Bounding Boxes", f"Failed to create bounding boxes:\n{error}")
+        elif cancelled:
+            QMessageBox.information(self, "Batch Bounding Boxes", f"Cancelled after {count} bounding boxes written to {self.batch_out_path}.")
+        else:
+            QMessageBox.information(self, "Batch Bounding Boxes", f"Wrote {count} bounding boxes to {self.batch_out_path}.")
+
+    def update_info_box(self):
+        # Called directly (e.g. before export) it supersedes any pending debounced update
+        self.info_timer.stop()
+        # Corners are built from the rounded centroid, size and zone, so unchanged boxes hit the
+        # InfoBox memo (compute_info_texts) and are skipped without recomputation
+        utm_corners = self.get_current_utm_corners()
 
         # The info_box will calculate lat/lon corners, min/max extents, and sizes internally.
         # For KML/SHP creation, always WGS84
@@ -208,6 +277,7 @@ class KMLBoundingBoxTab(QWidget):
         if poly_points[0] != poly_points[-1]:
             poly_points.append(poly_points[0])
         # Write shapefile
+        import shapefile
         with shapefile.Writer(shp_path, shapeType=shapefile.POLYGON) as w:
             w.field('NAME', 'C')
             w.poly([poly_points])
@@ -0,0 +1,104 @@
+"""
+Tab: UTM Tiling Grid over an AOI
+"""
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QFormLayout, QPushButton, QLabel, QLineEdit,
+    QSpinBox, QFileDialog, QMessageBox, QProgressBar
+)
+from widgets.background_task import start_background_task
+import os
+
+
+class UTMGridTab(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+
+        # AOI file (vector polygons or a raster, whose extent is used)
+        aoi_layout = QHBoxLayout()
+        self.aoi_edit = QLineEdit()
+        self.aoi_edit.setReadOnly(True)
+        self.aoi_btn = QPushButton("Select AOI File")
+        aoi_layout.addWidget(self.aoi_edit)
+        aoi_layout.addWidget(self.aoi_btn)
+        form.addRow("AOI (vector or raster):", aoi_layout)
+        self.aoi_btn.clicked.connect(self.select_aoi)
+
+        # Tile size
+        self.tile_width = QSpinBox()
+        self.tile_width.setRange(1, 1000000)
+        self.tile_width.setValue(1000)
+        self.tile_height = QSpinBox()
+        self.tile_height.setRange(1, 1000000)
+        self.tile_height.setValue(1000)
+        form.addRow("Tile Width (meters):", self.tile_width)
+        form.addRow("Tile Height (meters):", self.tile_height)
+        layout.addLayout(form)
+
+        self.generate_btn = QPushButton("Generate Grid")
+        self.generate_btn.clicked.connect(self.generate_grid)
+        layout.addWidget(self.generate_btn)
+        self.progress = QProgressBar()
+        self.progress.setVisible(False)
+        layout.addWidget(self.progress)
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+        layout.addStretch()
+
+        self.task = None
+        self.out_path = None
+
+    def select_aoi(self):
+        file, _ = QFileDialog.getOpenFileName(self, "Select AOI File", "", "All Files (*.*)")
+        if file:
+            self.aoi_edit.setText(file)
+
+    def generate_grid(self):
+        if self.task is not None:
+            # Second click cancels the running grid generation
+            self.task.cancel()
+            self.status_label.setText("Cancelling...")
+            return
+        aoi_path = self.aoi_edit.text()
+        if not aoi_path:
+            QMessageBox.warning(self, "Missing Info", "Please select an AOI file.")
+            return
+        from feature_writer import FEATURE_FILTER
+        out_path, _ = QFileDialog.getSaveFileName(self, "Save Grid", "", FEATURE_FILTER)
+        if not out_path:
+            return
+        tile_width, tile_height = self.tile_width.value(), self.tile_height.value()
+
+        def generate(task):
+            from utm_grid import load_aoi, write_utm_grid
+            task.report_progress(-1, "Loading AOI...")
+            aoi = load_aoi(aoi_path)
+            return write_utm_grid(
+                aoi, out_path, tile_width, tile_height,
+                progress_callback=lambda count: task.report_progress(-1, f"{count:,} tiles written"),
+                cancel_event=task.cancel_event
+            )
+
+        self.progress.setRange(0, 0)  # Busy indicator: the tile total isn't known up front
+        self.progress.setVisible(True)
+        self.generate_btn.setText("Cancel")
+        self.status_label.setText("Generating grid...")
+        self.out_path = out_path
+        self.task = start_background_task(self, generate, self.generation_finished, self.show_progress)
+
+    def show_progress(self, fraction, text):
+        self.status_label.setText(text)
+
+    def generation_finished(self, count, error):
+        cancelled = self.task.is_cancelled()
+        self.task = None
+        self.progress.setVisible(False)
+        self.generate_btn.setText("Generate Grid")
+        if error:
+            self.status_label.setText("Grid generation failed.")
+            QMessageBox.warning(self, "UTM Grid", f"Failed to generate grid:\n{error}")
+        elif cancelled:
+            self.status_label.setText(f"Cancelled after {count:,} tiles.")
+        else:
+            self.status_label.setText(f"Wrote {count:,} tiles to {os.path.basename(self.out_path)}.")
@@ -0,0 +1,184 @@
+"""
+Small quicklook images of rasters and vector layers, cached on disk.
+
+Raster thumbnails are decimated reads (GDAL serves them from overviews when the file has
+them) stretched to 2-98 % per band; vector thumbnails rasterize the layer's first
+VECTOR_MAX_FEATURES features. Thumbnails are PNGs in a cache directory, named by a hash of
+the path, size and mtime of the file, so a changed file gets a new thumbnail. The cache is
+capped at CACHE_MAX_BYTES; the least recently used thumbnails are removed first.
+"""
+import hashlib
+import os
+import threading
+
+import numpy as np
+
+from archive_inputs import local_path
+
+THUMBNAIL_SIZE = 64
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+CACHE_DIR_ENV_VAR = "GISTOOLBOX_THUMBNAIL_DIR"
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "gistoolbox", "thumbnails")
+# Larger layers are drawn from their first features only
+VECTOR_MAX_FEATURES = 50_000
+# Bumped when rendering changes, so old thumbnails are not reused
+RENDER_VERSION = 1
+VECTOR_COLOR = (200, 60, 20)
+
+def _fit(width, height, size):
+    scale = size / max(width, height, 1)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+def _stretch(arr, valid):
+    values = arr[valid]
+    if values.size == 0:
+        return np.zeros(arr.shape, dtype=np.uint8)
+    lo, hi = np.percentile(values, (2, 98))
+    if hi <= lo:
+        hi = lo + 1
+    return np.clip((arr.astype(np.float64) - lo) * (255.0 / (hi - lo)), 0, 255).astype(np.uint8)
+
+def render_raster(ds, size=THUMBNAIL_SIZE):
+    """RGBA uint8 array (h, w, 4) of a raster dataset; transparent where there is no data."""
+    w, h = _fit(ds.RasterXSize, ds.RasterYSize, size)
+    band_indexes = [1, 2, 3] if ds.RasterCount >= 3 else [1]
+    rgba = np.zeros((h, w, 4), dtype=np.uint8)
+    valid_all = np.ones((h, w), dtype=bool)
+    channels = []
+    for index in band_indexes:
+        band = ds.GetRasterBand(index)
+        # A buffer smaller than the raster makes GDAL read from the best overview
+        arr = band.ReadAsArray(buf_xsize=w, buf_ysize=h)
+        valid = np.ones(arr.shape, dtype=bool)
+        nodata = band.GetNoDataValue()
+        if nodata is not None:
+            valid &= arr != nodata
+        if np.issubdtype(arr.dtype, np.floating):
+            valid &= np.isfinite(arr)
+        valid_all &= valid
+        channels.append(_stretch(arr, valid))
+    if len(channels) == 1:
+        channels *= 3
+    for i, channel in enumerate(channels):
+        rgba[..., i] = channel
+    rgba[..., 3] = np.where(valid_all, 255, 0)
+    return rgba
+
+def render_vector(ds, size=THUMBNAIL_SIZE):
+    """RGBA uint8 array of a vector layer's geometries on a transparent background."""
+    from osgeo import gdal
+    lyr = ds.GetLayer(0)
+    minx, maxx, miny, maxy = lyr.GetExtent()
+    w, h = _fit(maxx - minx, maxy - miny, size)
+    mem = gdal.GetDriverByName("MEM").Create("", w, h, 1, gdal.GDT_Byte)
+    res_x = (maxx - minx) / w or 1.0
+    res_y = (maxy - miny) / h or 1.0
+    mem.SetGeoTransform((minx, res_x, 0, maxy, 0, -res_y))
+    name = lyr.GetName()
+    gdal.Rasterize(mem, ds, options=gdal.RasterizeOptions(
+        burnValues=[255], allTouched=True,
+        SQLStatement=f'SELECT * FROM "{name}" LIMIT {VECTOR_MAX_FEATURES}'
+    ))
+    drawn = mem.GetRasterBand(1).ReadAsArray() > 0
+    rgba = np.zeros((h, w, 4), dtype=np.uint8)
+    rgba[drawn] = VECTOR_COLOR + (255,)
+    return rgba
+
+def write_png(rgba, out_path):
+    from osgeo import gdal
+    h, w, _ = rgba.shape
+    mem = gdal.GetDriverByName("MEM").Create("", w, h, 4, gdal.GDT_Byte)
+    for i in range(4):
+        mem.GetRasterBand(i + 1).WriteArray(rgba[..., i])
+    gdal.GetDriverByName("PNG").CreateCopy(out_path, mem)
+    if os.path.exists(out_path + ".aux.xml"):
+        os.remove(out_path + ".aux.xml")
+
+
+class ThumbnailCache:
+    """Thread-safe on-disk thumbnail cache. get_or_create() may be called from worker threads."""
+
+    def __init__(self, cache_dir=None, max_bytes=CACHE_MAX_BYTES, size=THUMBNAIL_SIZE):
+        self.cache_dir = cache_dir or os.environ.get(CACHE_DIR_ENV_VAR) or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.size = size
+        self._lock = threading.Lock()
+        self._total_bytes = None
+
+    def cache_path(self, path):
+        """Where the thumbnail of path is cached, or None if the file can't be found."""
+        try:
+            st = os.stat(local_path(path))
+        except OSError:
+            return None
+        key = f"{os.path.abspath(path) if not path.startswith('/vsi') else path}|{st.st_size}|{st.st_mtime_ns}|{self.size}|{RENDER_VERSION}"
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".png")
+
+    def get_or_create(self, path):
+        """Path of the thumbnail PNG for a dataset, rendering it on a cache miss; None if it can't be drawn."""
+        thumb = self.cache_path(path)
+        if thumb is None:
+            return None
+        try:
+            os.utime(thumb)  # Recently used: evicted last
+            return thumb
+        except FileNotFoundError:
+            pass  # Not cached yet, or evicted by another thread
+        rgba = self.render(path)
+        if rgba is None:
+            return None
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Not *.png, so the eviction scan never counts or removes a thumbnail being written
+        tmp = f"{thumb}.{threading.get_ident()}.tmp"
+        write_png(rgba, tmp)
+        nbytes = os.path.getsize(tmp)
+        os.replace(tmp, thumb)
+        self._added(nbytes)
+        return thumb
+
+    def render(self, path):
+        from dataset_pool import open_raster, open_vector
+        try:
+            ds = open_raster(path)
+            if ds is not None and ds.RasterCount:
+                return render_raster(ds, self.size)
+            ds = open_vector(path)
+            if ds is not None and ds.GetLayerCount():
+                return render_vector(ds, self.size)
+        except RuntimeError:
+            pass
+        return None
+
+    def _cached_files(self):
+        # (mtime, size, path) of the cached thumbnails; files removed meanwhile are skipped
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(".png"):
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, entry.path))
+        return files
+
+    def _added(self, nbytes):
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._cached_files())
+            else:
+                self._total_bytes += nbytes
+            if self._total_bytes <= self.max_bytes:
+                return
+            # Drop least recently used down to 80 % of the cap, so eviction doesn't run on every add
+            files = sorted(self._cached_files())
+            total = sum(size for _, size, _ in files)
+            for _, size, path in files:
+                if total <= self.max_bytes * 0.8:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+            self._total_bytes = total
@@ -0,0 +1,243 @@
+"""
+Tile-parallel warping of one large raster.
+
+A single gdal.Warp call runs one warp pipeline however many cores there are. Here the output
+grid (size, geotransform, CRS) is worked out once by a virtual warp to VRT, split into
+block-aligned chunks, and each chunk is warped straight from the source into its own tiled
+GeoTIFF in a process pool. The chunks are then assembled through a VRT (for .vrt outputs) or
+copied into a single Cloud Optimized GeoTIFF.
+
+Chunks are staged in a directory next to the output and written to a temp name then renamed,
+so a failed or interrupted run can simply be restarted: finished chunks are kept and only the
+missing ones are warped again. Chunks that don't touch the cut geometry are not warped at all.
+
+    python tiled_warp.py huge.tif cut.tif --cut aoi.gpkg --t-srs EPSG:3857 --tr 10
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from osgeo import gdal
+
+import tracing
+
+# Output pixels per chunk side; a multiple of the chunk files' block size
+CHUNK_SIZE = 4096
+BLOCK_SIZE = 512
+CHUNK_CREATION_OPTIONS = [
+    "TILED=YES", f"BLOCKXSIZE={BLOCK_SIZE}", f"BLOCKYSIZE={BLOCK_SIZE}", "COMPRESS=DEFLATE", "BIGTIFF=IF_SAFER",
+]
+COG_CREATION_OPTIONS = ["COMPRESS=DEFLATE", "BIGTIFF=IF_SAFER", "NUM_THREADS=ALL_CPUS"]
+# Warp options that define the overall grid; chunks replace them with their own bounds and size
+GRID_OPTIONS = ("outputBounds", "xRes", "yRes", "width", "height", "cropToCutline", "targetAlignedPixels", "dstSRS")
+
+def plan_grid(src_path, warp_kwargs):
+    """Output grid of a warp as {"width", "height", "geotransform", "srs"}, from a virtual VRT warp."""
+    vrt = gdal.Warp("", src_path, options=gdal.WarpOptions(format="VRT", **warp_kwargs))
+    if vrt is None:
+        raise RuntimeError(f"Could not plan the warp of {src_path}")
+    return {
+        "width": vrt.RasterXSize,
+        "height": vrt.RasterYSize,
+        "geotransform": list(vrt.GetGeoTransform()),
+        "srs": vrt.GetProjection(),
+    }
+
+def chunk_windows(width, height, chunk_size=CHUNK_SIZE):
+    return [
+        (x, y, min(chunk_size, width - x), min(chunk_size, height - y))
+        for y in range(0, height, chunk_size) for x in range(0, width, chunk_size)
+    ]
+
+def window_bounds(gt, window):
+    # Warped grids are north-up
+    x, y, w, h = window
+    return gt[0] + x * gt[1], gt[3] + (y + h) * gt[5], gt[0] + (x + w) * gt[1], gt[3] + y * gt[5]
+
+_worker_src = None
+_worker_kwargs = None
+
+def _init_worker(src_path, chunk_kwargs):
+    # One open source per worker process, reused for all its chunks
+    global _worker_src, _worker_kwargs
+    gdal.UseExceptions()
+    _worker_src = gdal.Open(src_path)
+    _worker_kwargs = chunk_kwargs
+
+def warp_chunk(window, bounds, path):
+    """Warps one chunk of the output grid into path (via a temp name)."""
+    if os.path.exists(path):
+        return path
+    tmp_path = path + ".part.tif"
+    result = gdal.Warp(tmp_path, _worker_src, options=gdal.WarpOptions(
+        format="GTiff", outputBounds=bounds, width=window[2], height=window[3],
+        creationOptions=CHUNK_CREATION_OPTIONS, **_worker_kwargs
+    ))
+    if result is None:
+        raise RuntimeError(f"gdal.Warp failed for chunk {os.path.basename(path)}")
+    result = None
+    os.replace(tmp_path, path)
+    return path
+
+def _source_signature(src_path):
+    try:
+        st = os.stat(src_path)
+    except OSError:  # /vsi paths
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+def tiled_warp(src_path, out_path, warp_kwargs, cut_geom=None, workers=None, chunk_size=CHUNK_SIZE,
+               progress_callback=None, cancel_event=None, keep_chunks=False):
+    """
+    Warps src_path to out_path with gdal.WarpOptions(**warp_kwargs), chunk by chunk in parallel.
+    cut_geom (shapely, in the output CRS) lets chunks outside the cut be skipped.
+    progress_callback(done, total) is called as chunks finish. Returns the number of chunks,
+    or None if cancelled (finished chunks are kept, so running again resumes).
+    """
+    grid = plan_grid(src_path, warp_kwargs)
+    gt = grid["geotransform"]
+    chunk_kwargs = {k: v for k, v in warp_kwargs.items() if k not in GRID_OPTIONS}
+    chunk_kwargs["dstSRS"] = grid["srs"]
+
+    # A staging directory from a different job (other source, grid or options) is discarded
+    work_dir = out_path + ".chunks"
+    manifest = {
+        "source": src_path, "source_signature": _source_signature(src_path), "grid": grid,
+        "chunk_size": chunk_size, "warp": {k: repr(v) for k, v in sorted(chunk_kwargs.items())},
+    }
+    manifest_path = os.path.join(work_dir, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            if json.load(f) != json.loads(json.dumps(manifest)):
+                shutil.rmtree(work_dir)
+    os.makedirs(work_dir, exist_ok=True)
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f)
+
+    jobs = []
+    for window in chunk_windows(grid["width"], grid["height"], chunk_size):
+        bounds = window_bounds(gt, window)
+        if cut_geom is not None:
+            from shapely.geometry import box
+            if not cut_geom.intersects(box(*bounds)):
+                continue
+        jobs.append((window, bounds, os.path.join(work_dir, f"chunk_{window[1]}_{window[0]}.tif")))
+    if not jobs:
+        raise RuntimeError("The cut geometry does not overlap the raster.")
+    total = len(jobs)
+    todo = [job for job in jobs if not os.path.exists(job[2])]
+    done = total - len(todo)
+    if progress_callback:
+        progress_callback(done, total)
+
+    failed = []
+    if todo:
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, mp_context=ctx,
+                                 initializer=_init_worker, initargs=(src_path, chunk_kwargs)) as pool:
+            futures = [
+                pool.submit(tracing.run_in_worker, tracing.is_enabled(), "warp chunk", warp_chunk, *job)
+                for job in todo
+            ]
+            for job, future in zip(todo, futures):
+                if cancel_event is not None and cancel_event.is_set():
+                    for f in futures:
+                        f.cancel()
+                    return None
+                try:
+                    tracing.merge_worker_spans(future.result())
+                except Exception as e:
+                    # The other chunks still finish; a rerun only redoes the failed ones
+                    failed.append((job[2], str(e) or type(e).__name__))
+                done += 1
+                if progress_callback:
+                    progress_callback(done, total)
+    if failed:
+        raise RuntimeError(
+            f"{len(failed)} of {total} chunks failed (run again to retry them): "
+            f"{os.path.basename(failed[0][0])}: {failed[0][1]}"
+        )
+
+    # Full grid extent, even where chunks were skipped
+    full_bounds = window_bounds(gt, (0, 0, grid["width"], grid["height"]))
+    is_vrt = os.path.splitext(out_path)[1].lower() == ".vrt"
+    vrt_path = out_path if is_vrt else os.path.join(work_dir, "mosaic.vrt")
+    vrt = gdal.BuildVRT(vrt_path, [job[2] for job in jobs], options=gdal.BuildVRTOptions(
+        outputBounds=full_bounds, xRes=gt[1], yRes=-gt[5]
+    ))
+    if vrt is None:
+        raise RuntimeError("Could not assemble the warped chunks.")
+    vrt = None
+    if is_vrt:
+        # The VRT references the chunks, so they stay
+        return total
+
+    ext = os.path.splitext(out_path)[1].lower()
+    tmp_path = out_path + ".part" + ext
+    if ext in (".tif", ".tiff"):
+        options = gdal.TranslateOptions(format="COG", creationOptions=COG_CREATION_OPTIONS)
+    else:
+        from cut_engine import MASKED_OUTPUT_EXCLUDED_DRIVERS, driver_for_ext
+        driver_name = driver_for_ext(ext.lstrip("."), "DCAP_RASTER", MASKED_OUTPUT_EXCLUDED_DRIVERS)
+        options = gdal.TranslateOptions(format=driver_name or "GTiff")
+    result = gdal.Translate(tmp_path, vrt_path, options=options)
+    if result is None:
+        raise RuntimeError(f"Could not write {out_path}")
+    result = None
+    os.replace(tmp_path, out_path)
+    if not keep_chunks:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cut/reproject one large raster using all cores.")
+    parser.add_argument("input", help="Input raster")
+    parser.add_argument("output", help="Output .tif (written as COG), .vrt (mosaic of chunk files) or other raster")
+    parser.add_argument("--cut", help="Raster or vector file whose extent/geometry the output is cut to")
+    parser.add_argument("--t-srs", help="Target CRS (e.g. EPSG:3857)")
+    parser.add_argument("--tr", type=float, help="Target pixel size in target CRS units")
+    parser.add_argument("--tap", action="store_true", help="Align the output extent to multiples of --tr")
+    parser.add_argument("--resampling", default="near")
+    parser.add_argument("--error-threshold", type=float, default=None)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Chunk side in output pixels")
+    parser.add_argument("--keep-chunks", action="store_true")
+    args = parser.parse_args(argv)
+
+    import cut_engine
+    from pyproj import CRS
+    from shapely.geometry import box
+
+    gdal.UseExceptions()
+    ds = gdal.Open(args.input)
+    target = cut_engine.TargetGrid(
+        crs=CRS.from_user_input(args.t_srs) if args.t_srs else None, resolution=args.tr, align=args.tap,
+        resampling=args.resampling,
+        error_threshold=cut_engine.DEFAULT_ERROR_THRESHOLD if args.error_threshold is None else args.error_threshold,
+    )
+    if args.cut:
+        cut_geom, cut_crs = cut_engine.get_cut_geometry_and_crs(args.cut)
+        if cut_geom is None:
+            parser.error(f"Could not read a geometry from {args.cut}")
+    else:
+        # No cut: the whole raster
+        gt = ds.GetGeoTransform()
+        cut_geom = box(*window_bounds(gt, (0, 0, ds.RasterXSize, ds.RasterYSize)))
+        cut_crs = CRS.from_wkt(ds.GetProjection()) if ds.GetProjection() else None
+    warp_kwargs, out_cut_geom = cut_engine.warp_settings(ds, cut_geom, cut_crs, target if target.changes_grid() else None)
+    ds = None
+
+    def report(done, total):
+        print(f"\r{done} / {total} chunks", end="", file=sys.stderr, flush=True)
+
+    chunks = tiled_warp(args.input, args.output, warp_kwargs, out_cut_geom, workers=args.workers,
+                        chunk_size=args.chunk_size, progress_callback=report, keep_chunks=args.keep_chunks)
+    print(f"\nWrote {args.output} from {chunks} chunks", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+Lightweight tracing: timing spans, per-run summaries and Chrome trace export.
+
+    with tracing.run("Batch Cut") as r:
+        with tracing.span("gdal.Warp", file=path):
+            ...
+    print(tracing.format_summary(r.summary))
+
+Tracing is off unless enabled with set_enabled(True) or GISTOOLBOX_TRACE=1. While off, span()
+returns a shared no-op context manager, so instrumented code pays one function call per span.
+With GISTOOLBOX_TRACE_DIR set, every finished run is also written there as a Chrome trace
+(open it in chrome://tracing or https://ui.perfetto.dev). Work done in spawned worker processes
+is covered when it is submitted through run_in_worker() and its results are passed through
+merge_worker_spans().
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+TRACE_ENV_VAR = "GISTOOLBOX_TRACE"
+TRACE_DIR_ENV_VAR = "GISTOOLBOX_TRACE_DIR"
+# Upper bound on spans stored per run, so one huge run can't eat all memory
+MAX_EVENTS = 1_000_000
+# Spans kept outside of runs (most recent first to go), for export_chrome_trace()
+RECENT_EVENTS = 100_000
+
+_enabled = bool(os.environ.get(TRACE_ENV_VAR) or os.environ.get(TRACE_DIR_ENV_VAR))
+_lock = threading.Lock()
+_recent = deque(maxlen=RECENT_EVENTS)  # (name, start_s, duration_s, thread_id, args)
+_active_runs = []
+_clock_origin = time.perf_counter()
+
+def is_enabled():
+    return _enabled
+
+def set_enabled(enabled):
+    global _enabled
+    _enabled = bool(enabled)
+
+def clear():
+    with _lock:
+        _recent.clear()
+
+def _gdal_cache_used():
+    # Only ask GDAL if it's already loaded; tracing must not import it
+    gdal = sys.modules.get("osgeo.gdal")
+    return gdal.GetCacheUsed() if gdal is not None else 0
+
+def _record(name, start, duration, args, tid=None):
+    cache_used = _gdal_cache_used()
+    event = (name, start, duration, tid if tid is not None else threading.get_ident(), args)
+    with _lock:
+        _recent.append(event)
+        for r in _active_runs:
+            r._add(event, cache_used)
+
+def add_duration(name, seconds, **args):
+    """Records an already-measured duration (e.g. time summed over many small steps) as a span ending now."""
+    if _enabled:
+        _record(name, time.perf_counter() - seconds, seconds, args)
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+_NOOP_SPAN = _NoopSpan()
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.args["error"] = str(exc) or exc_type.__name__
+        _record(self.name, self.start, duration, self.args)
+        return False
+
+    def set(self, **args):
+        # Attach details known only once the span is running (counts, sizes, ...)
+        self.args.update(args)
+
+def span(name, **args):
+    if not _enabled:
+        return _NOOP_SPAN
+    return _Span(name, args)
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where it can't be measured."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / 2 ** 20
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+class Run:
+    """
+    One traced operation (a batch cut, a file display, ...). Use as a context manager, or call
+    start()/finish() when the operation ends in a callback. After finishing, summary holds the
+    per-run statistics (None if tracing was off).
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.start_time = None
+        self.summary = None
+        self.events = []
+        self.dropped = 0
+        self.cache_peak = 0
+
+    def start(self):
+        if _enabled:
+            self.start_time = time.perf_counter()
+            self.events = []
+            self.dropped = 0
+            self.cache_peak = _gdal_cache_used()
+            with _lock:
+                _active_runs.append(self)
+        return self
+
+    def _add(self, event, cache_used):
+        # Called with _lock held, for every span recorded while the run is active
+        if event[1] < self.start_time:
+            return
+        self.cache_peak = max(self.cache_peak, cache_used)
+        if len(self.events) >= MAX_EVENTS:
+            self.dropped += 1
+        else:
+            self.events.append(event)
+
+    def _stop(self):
+        with _lock:
+            if self in _active_runs:
+                _active_runs.remove(self)
+            events, self.events = self.events, []
+        return events
+
+    def discard(self):
+        """Stops an abandoned (e.g. cancelled) run without summarizing it."""
+        self._stop()
+        self.start_time = None
+
+    def finish(self):
+        if self.start_time is None:
+            return None
+        end = time.perf_counter()
+        events = self._stop()
+        self.summary = summarize(self.name, events, end - self.start_time, self.cache_peak, self.dropped)
+        self.summary["events"] = events
+        trace_dir = os.environ.get(TRACE_DIR_ENV_VAR)
+        if trace_dir:
+            os.makedirs(trace_dir, exist_ok=True)
+            stamp = time.strftime("%Y%m%d_%H%M%S")
+            safe_name = "".join(c if c.isalnum() else "_" for c in self.name)
+            export_chrome_trace(os.path.join(trace_dir, f"trace_{safe_name}_{stamp}.json"), events)
+        return self.summary
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.finish()
+        return False
+
+def run(name):
+    return Run(name)
+
+def run_in_worker(enabled, name, fn, *args):
+    """
+    Calls fn(*args) in a spawned worker process, traced as span name, and returns (result, spans)
+    for merge_worker_spans() in the parent. Submit it to the pool in place of fn, with enabled =
+    is_enabled() of the parent: workers don't share the parent's tracing state.
+    """
+    set_enabled(enabled)
+    if not enabled:
+        return fn(*args), None
+    collector = Run(name).start()
+    try:
+        with span(name):
+            result = fn(*args)
+    finally:
+        events = collector._stop()
+    # perf_counter() is per process, so spans travel with wall-clock start times
+    offset = time.time() - time.perf_counter()
+    pid = os.getpid()
+    return result, [(n, start + offset, duration, pid, span_args) for n, start, duration, _, span_args in events]
+
+def merge_worker_spans(outcome):
+    """Records the spans of a run_in_worker() call in this process (and its active runs); returns the result."""
+    result, spans = outcome
+    if spans:
+        offset = time.perf_counter() - time.time()
+        for name, start, duration, pid, args in spans:
+            # The worker's pid stands in for the thread id, so traces show one row per worker
+            _record(name, start + offset, duration, args, tid=pid)
+    return result
+
+def summarize(name, events, wall_s, cache_peak=0, dropped=0):
+    stages = {}
+    for span_name, _, duration, _, _ in events:
+        count, total, longest = stages.get(span_name, (0, 0.0, 0.0))
+        stages[span_name] = (count + 1, total + duration, max(longest, duration))
+    gdal = sys.modules.get("osgeo.gdal")
+    return {
+        "name": name,
+        "wall_s": wall_s,
+        "stages": sorted(((n, c, t, m) for n, (c, t, m) in stages.items()), key=lambda s: -s[2]),
+        "peak_rss_mb": peak_rss_mb(),
+        "gdal_cache_used_mb": gdal.GetCacheUsed() / 2 ** 20 if gdal else None,
+        "gdal_cache_peak_mb": cache_peak / 2 ** 20 if gdal else None,
+        "gdal_cache_max_mb": gdal.GetCacheMax() / 2 ** 20 if gdal else None,
+        "dropped_spans": dropped,
+    }
+
+def format_summary(summary):
+    if summary is None:
+        return "Tracing is off."
+    lines = [f"{summary['name']}: {summary['wall_s']:.3f} s wall"]
+    if summary["stages"]:
+        width = max(len(s[0]) for s in summary["stages"])
+        lines.append(f"  {'stage':<{width}}  {'count':>7}  {'total s':>9}  {'max s':>8}")
+        for stage, count, total, longest in summary["stages"]:
+            lines.append(f"  {stage:<{width}}  {count:>7}  {total:>9.3f}  {longest:>8.3f}")
+    if summary["peak_rss_mb"] is not None:
+        lines.append(f"Peak RSS: {summary['peak_rss_mb']:.1f} MB")
+    if summary["gdal_cache_max_mb"] is not None:
+        lines.append(
+            f"GDAL block cache: {summary['gdal_cache_used_mb']:.1f} MB used at end, "
+            f"{summary['gdal_cache_peak_mb']:.1f} MB peak, {summary['gdal_cache_max_mb']:.0f} MB max"
+        )
+    if summary["dropped_spans"]:
+        lines.append(f"({summary['dropped_spans']:,} spans dropped after the first {MAX_EVENTS:,} of this run)")
+    return "\n".join(lines)
+
+def export_chrome_trace(path, events=None):
+    """Writes spans (default: the RECENT_EVENTS most recent) in the Chrome trace event format."""
+    if events is None:
+        with _lock:
+            events = list(_recent)
+    pid = os.getpid()
+    trace = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "GIS Swiss Army Knife"}}]
+    for name, start, duration, tid, args in events:
+        trace.append({
+            "name": name, "ph": "X", "pid": pid, "tid": tid,
+            "ts": (start - _clock_origin) * 1e6, "dur": duration * 1e6,
+            "args": {k: v if isinstance(v, (int, float, bool)) or v is None else str(v) for k, v in args.items()},
+        })
+    with open(path, "w") as f:
+        json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+    return path
@@ -0,0 +1,122 @@
+"""
+UTM fishnet/tiling grid generator.
+
+Covers an AOI (vector polygons or a raster's extent) with fixed-size tiles aligned to the
+UTM grid of each zone/hemisphere the AOI touches. Tile origins are computed as NumPy arrays,
+tiles are kept only if they intersect the (prepared) AOI, and results are streamed to a
+KML/KMZ/Shapefile/GeoPackage writer. Where an AOI spans several zones, each zone's part gets
+tiles from that zone's own grid, so tiles along a zone boundary overlap slightly.
+"""
+import math
+
+import numpy as np
+import shapely
+from shapely.geometry import box, shape
+from shapely.ops import unary_union
+
+from batch_bbox import utm_box_rings
+from feature_writer import open_feature_writer
+from gis_utils import get_bbox_from_centroid, get_transformer, transform_geometry, utm_crs, utm_zone
+
+GRID_FIELDS = [('NAME', 'str'), ('UTM_ZONE', 'int'), ('HEMI', 'str'), ('EASTING', 'float'), ('NORTHING', 'float')]
+# Rows of tiles handled per batch, which bounds memory for very large grids
+GRID_ROWS_PER_BATCH = 256
+# Max segment length (degrees) when densifying AOI edges before projecting to UTM
+DENSIFY_DEGREES = 0.01
+
+def load_aoi(path):
+    """AOI geometry in WGS84 (lon/lat) from a raster's extent or the union of a vector layer."""
+    from pyproj import CRS
+    from dataset_pool import open_raster, open_vector
+    ds = open_raster(path)
+    if ds is not None and ds.RasterCount:
+        gt = ds.GetGeoTransform()
+        w, h = ds.RasterXSize, ds.RasterYSize
+        xs = [gt[0], gt[0] + w * gt[1], gt[0] + w * gt[1] + h * gt[2], gt[0] + h * gt[2]]
+        ys = [gt[3], gt[3] + w * gt[4], gt[3] + w * gt[4] + h * gt[5], gt[3] + h * gt[5]]
+        geom = shapely.Polygon(list(zip(xs, ys)))
+        wkt = ds.GetProjection()
+    else:
+        ds = open_vector(path)
+        if ds is None:
+            raise RuntimeError(f"Could not open {path}")
+        lyr = ds.GetLayer(0)
+        geoms = [shape(feat.GetGeometryRef().__geo_interface__) for feat in lyr if feat.GetGeometryRef()]
+        if not geoms:
+            raise RuntimeError(f"No geometries in {path}")
+        geom = unary_union(geoms)
+        srs = lyr.GetSpatialRef()
+        wkt = srs.ExportToWkt() if srs else None
+    if wkt:
+        crs = CRS.from_wkt(wkt)
+        if not crs.equals("epsg:4326", ignore_axis_order=True):
+            geom = transform_geometry(shapely.segmentize(geom, _densify_length(crs)), get_transformer(crs, "epsg:4326"))
+    return geom
+
+def _densify_length(crs):
+    # Edge densification step in the source CRS units before reprojecting
+    return DENSIFY_DEGREES if crs.is_geographic else 1000.0
+
+def aoi_zone_parts(aoi):
+    """
+    Splits a WGS84 AOI into (zone, is_north, part_in_utm) for every UTM zone/hemisphere it touches.
+    """
+    minx, miny, maxx, maxy = aoi.bounds
+    parts = []
+    for zone in range(utm_zone(minx), utm_zone(maxx) + 1):
+        west = -180 + (zone - 1) * 6
+        for is_north, (south, north) in ((True, (0, 90)), (False, (-90, 0))):
+            if north <= miny or south >= maxy:
+                continue
+            part = aoi.intersection(box(west, south, west + 6, north))
+            if part.is_empty or part.area == 0:
+                continue
+            part = shapely.segmentize(part, DENSIFY_DEGREES)
+            parts.append((zone, is_north, transform_geometry(part, get_transformer("epsg:4326", utm_crs(zone, is_north)))))
+    return parts
+
+def iter_grid_tiles(aoi, tile_width, tile_height):
+    """
+    Yields batches of tiles as (zone, is_north, west, south) with west/south NumPy arrays
+    of tile origins (UTM metres) for tiles intersecting the AOI.
+    """
+    for zone, is_north, part in aoi_zone_parts(aoi):
+        shapely.prepare(part)
+        minx, miny, maxx, maxy = part.bounds
+        # Tile origins snapped to multiples of the tile size, like round_to_nearest for centroids
+        xs = np.arange(math.floor(minx / tile_width) * tile_width, maxx, tile_width)
+        ys = np.arange(math.floor(miny / tile_height) * tile_height, maxy, tile_height)
+        for start in range(0, len(ys), GRID_ROWS_PER_BATCH):
+            west, south = np.meshgrid(xs, ys[start:start + GRID_ROWS_PER_BATCH])
+            west, south = west.ravel(), south.ravel()
+            bbox = get_bbox_from_centroid(west + tile_width / 2, south + tile_height / 2, tile_width, tile_height)
+            tiles = shapely.box(bbox['west'], bbox['south'], bbox['east'], bbox['north'])
+            keep = shapely.intersects(part, tiles)
+            if keep.any():
+                yield zone, is_north, west[keep], south[keep]
+
+def write_utm_grid(aoi, out_path, tile_width=1000, tile_height=1000, progress_callback=None, cancel_event=None):
+    """
+    Writes the tile grid covering a WGS84 AOI geometry to out_path (.kml/.kmz/.shp/.gpkg).
+    progress_callback(tiles_written) is called after each batch; setting cancel_event stops
+    before the next batch. Returns the number of tiles written.
+    """
+    count = 0
+    with open_feature_writer(out_path, GRID_FIELDS) as writer:
+        for zone, is_north, west, south in iter_grid_tiles(aoi, tile_width, tile_height):
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            rings = utm_box_rings(west + tile_width / 2, south + tile_height / 2, zone, is_north, tile_width, tile_height)
+            hemi = 'N' if is_north else 'S'
+            names = np.char.add(f"{zone}{hemi}_", np.char.add(west.astype(np.int64).astype(str), np.char.add("_", south.astype(np.int64).astype(str))))
+            writer.write_polygons(rings, {
+                'NAME': names,
+                'UTM_ZONE': np.full(len(west), zone),
+                'HEMI': np.full(len(west), hemi),
+                'EASTING': west,
+                'NORTHING': south,
+            })
+            count += len(west)
+            if progress_callback:
+                progress_callback(count)
+    return count
@@ -0,0 +1,295 @@
+"""
+Watch-folder batch cutting: a long-running, Qt-free process that cuts every new or changed
+raster/vector arriving in a drop directory with the same logic as the Batch Cut tab.
+
+    python watch_folder.py incoming/ aoi.gpkg cut_output/ --workers 4
+
+The directory is polled every --interval seconds. A file is picked up once its size and
+modification time (including shapefile sidecars) have not changed for --settle seconds, so
+files still being copied in are left alone. Cuts run in a bounded process pool whose workers
+load the cut geometry once. What was processed (and with which cut file) is recorded in a
+SQLite database in the output directory, so restarts skip finished files and editing the cut
+file reprocesses everything.
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import tracing
+from cut_engine import RASTER_EXTS, VECTOR_EXTS, output_path
+
+STATE_FILE_NAME = ".watch_state.sqlite"
+DEFAULT_INTERVAL_S = 5.0
+DEFAULT_SETTLE_S = 10.0
+# Files that belong to another file, or are still being written by common tools
+SHAPEFILE_SIDECARS = (".shx", ".dbf", ".prj", ".cpg")
+PARTIAL_SUFFIXES = (".part", ".tmp", ".partial", ".crdownload", ".download")
+
+def file_signature(path):
+    """(total size, latest mtime_ns) of a file and, for shapefiles, its sidecars."""
+    st = os.stat(path)
+    size, mtime = st.st_size, st.st_mtime_ns
+    if path.lower().endswith(".shp"):
+        stem = path[:-4]
+        for ext in SHAPEFILE_SIDECARS:
+            for candidate in (stem + ext, stem + ext.upper()):
+                try:
+                    side = os.stat(candidate)
+                except OSError:
+                    continue
+                size += side.st_size
+                mtime = max(mtime, side.st_mtime_ns)
+                break
+    return size, mtime
+
+def is_candidate(name):
+    lower = name.lower()
+    if lower.startswith((".", "~")) or lower.endswith(PARTIAL_SUFFIXES):
+        return False
+    return os.path.splitext(lower)[1] in RASTER_EXTS + VECTOR_EXTS
+
+
+class ProcessedState:
+    """SQLite record of processed files. Only used from the watcher's main thread."""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS processed ("
+            " path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, cut_signature TEXT,"
+            " status TEXT, output TEXT, error TEXT, processed_at REAL, duration_s REAL)"
+        )
+        self.conn.commit()
+        # In-memory copy for the per-scan lookups
+        self.rows = {
+            path: (size, mtime_ns, cut_signature, status)
+            for path, size, mtime_ns, cut_signature, status in self.conn.execute(
+                "SELECT path, size, mtime_ns, cut_signature, status FROM processed"
+            )
+        }
+
+    def needs_processing(self, path, signature, cut_signature, retry_failed=False):
+        row = self.rows.get(path)
+        if row is None or (row[0], row[1]) != signature or row[2] != cut_signature:
+            return True
+        return retry_failed and row[3] == "failed"
+
+    def record(self, path, signature, cut_signature, status, output=None, error=None, duration_s=None):
+        self.rows[path] = (signature[0], signature[1], cut_signature, status)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO processed VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, signature[0], signature[1], cut_signature, status, output, error, time.time(), duration_s)
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+_worker_cut = None
+_worker_masks = None
+
+def _init_worker(cut_file):
+    # The cut geometry is read once per worker process and reused for every file
+    global _worker_cut, _worker_masks
+    from osgeo import gdal
+    from cut_engine import CutMaskCache, get_cut_geometry_and_crs
+    # Ctrl+C reaches the whole process group; the parent stops the watcher and lets running cuts finish
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    gdal.UseExceptions()
+    _worker_cut = get_cut_geometry_and_crs(cut_file)
+    # Drops of the same tile (new acquisitions, other bands) reuse the rasterized cut
+    _worker_masks = CutMaskCache(*_worker_cut)
+
+def _cut_job(in_file, out_file):
+    from cut_engine import cut_raster, cut_vector, is_raster
+    start = time.perf_counter()
+    os.makedirs(os.path.dirname(out_file) or ".", exist_ok=True)
+    cut_geom, cut_crs = _worker_cut
+    if is_raster(in_file):
+        # Written under a temporary name so consumers of the output directory never see partial rasters
+        base, ext = os.path.splitext(out_file)
+        tmp_file = f"{base}.part{ext}"
+        cut_raster(in_file, tmp_file, cut_geom, cut_crs, _worker_masks)
+        os.replace(tmp_file, out_file)
+    else:
+        cut_vector(in_file, out_file, cut_geom, cut_crs)
+    return time.perf_counter() - start
+
+
+def _log(message):
+    print(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {message}", file=sys.stderr, flush=True)
+
+
+class FolderWatcher:
+    def __init__(self, watch_dir, cut_file, out_dir, postfix="_cut", workers=None, interval=DEFAULT_INTERVAL_S,
+                 settle=DEFAULT_SETTLE_S, recursive=False, state_path=None, retry_failed=False, log=_log):
+        self.watch_dir = os.path.abspath(watch_dir)
+        self.cut_file = os.path.abspath(cut_file)
+        self.out_dir = os.path.abspath(out_dir)
+        inside = os.path.commonpath([self.watch_dir, self.out_dir]) == self.watch_dir
+        if self.out_dir == self.watch_dir or (recursive and inside):
+            raise ValueError("The output directory must not be inside the watched directory.")
+        self.postfix = postfix
+        self.workers = workers or os.cpu_count() or 1
+        self.interval = interval
+        self.settle = settle
+        self.recursive = recursive
+        self.retry_failed = retry_failed
+        self.log = log
+        os.makedirs(self.out_dir, exist_ok=True)
+        self.state = ProcessedState(state_path or os.path.join(self.out_dir, STATE_FILE_NAME))
+        self.pending = {}  # path -> (signature, first time seen with that signature)
+        self.in_flight = {}  # future -> (path, signature, output, cut signature)
+        self.stop_event = threading.Event()
+        self.processed = 0
+        self.failed = 0
+
+    def cut_signature(self):
+        # Identifies the cut (and naming) a file was processed with; any change reprocesses everything
+        size, mtime = file_signature(self.cut_file)
+        return f"{self.cut_file}|{size}|{mtime}|{self.out_dir}|{self.postfix}"
+
+    def iter_files(self):
+        stack = [self.watch_dir]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if self.recursive and not entry.name.startswith("."):
+                        stack.append(entry.path)
+                elif is_candidate(entry.name):
+                    yield entry.path
+
+    def output_for(self, path):
+        rel_dir = os.path.relpath(os.path.dirname(path), self.watch_dir)
+        return output_path(path, os.path.normpath(os.path.join(self.out_dir, rel_dir)), self.postfix)
+
+    def scan(self, cut_signature):
+        """Returns the files that are new/changed and have settled, as (path, signature)."""
+        now = time.time()
+        busy = {path for path, _, _, _ in self.in_flight.values()}
+        ready = []
+        seen = set()
+        for path in self.iter_files():
+            seen.add(path)
+            if path in busy:
+                continue
+            try:
+                signature = file_signature(path)
+            except OSError:  # Removed or renamed mid-scan
+                continue
+            if not self.state.needs_processing(path, signature, cut_signature, self.retry_failed):
+                self.pending.pop(path, None)
+                continue
+            previous = self.pending.get(path)
+            if previous is None or previous[0] != signature:
+                self.pending[path] = (signature, now)
+                previous = self.pending[path]
+            # Settled: unchanged for `settle` seconds, or last modified long enough ago
+            if now - previous[1] >= self.settle or now - signature[1] / 1e9 >= self.settle:
+                ready.append((path, signature))
+        for path in list(self.pending):
+            if path not in seen:
+                del self.pending[path]
+        return ready
+
+    def collect(self, futures):
+        for future in futures:
+            path, signature, out_file, cut_signature = self.in_flight.pop(future)
+            try:
+                duration = tracing.merge_worker_spans(future.result())
+            except Exception as e:
+                error = str(e) or type(e).__name__
+                self.state.record(path, signature, cut_signature, "failed", out_file, error)
+                self.failed += 1
+                self.log(f"FAILED {path}: {error}")
+            else:
+                self.state.record(path, signature, cut_signature, "done", out_file, duration_s=duration)
+                self.processed += 1
+                self.log(f"cut {os.path.basename(path)} -> {out_file} ({duration:.1f} s)")
+
+    def run(self, once=False):
+        """
+        Watches until stop() (or SIGINT/SIGTERM when run from the CLI). With once=True, returns
+        when everything currently in the directory has been processed.
+        """
+        from cut_engine import get_cut_geometry_and_crs
+        ctx = multiprocessing.get_context("spawn")
+        max_in_flight = self.workers * 2
+        while not self.stop_event.is_set():
+            # Fail fast (in this process) if the cut file is unusable
+            cut_signature = self.cut_signature()
+            cut_geom, cut_crs = get_cut_geometry_and_crs(self.cut_file)
+            if cut_geom is None or cut_crs is None:
+                raise RuntimeError(f"Could not determine geometry or CRS of {self.cut_file}")
+            self.log(f"Watching {self.watch_dir} (cut: {os.path.basename(self.cut_file)}, {self.workers} workers)")
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx,
+                                     initializer=_init_worker, initargs=(self.cut_file,)) as pool:
+                while not self.stop_event.is_set():
+                    if self.cut_signature() != cut_signature:
+                        self.log("Cut file changed; reloading and reprocessing.")
+                        break
+                    for path, signature in self.scan(cut_signature):
+                        if len(self.in_flight) >= max_in_flight:
+                            break  # The rest stay pending until workers free up
+                        out_file = self.output_for(path)
+                        future = pool.submit(tracing.run_in_worker, tracing.is_enabled(), "cut job", _cut_job, path, out_file)
+                        self.in_flight[future] = (path, signature, out_file, cut_signature)
+                        del self.pending[path]
+                    if once and not self.in_flight and not self.pending:
+                        self.stop_event.set()
+                        break
+                    if self.in_flight:
+                        done, _ = wait(list(self.in_flight), timeout=self.interval, return_when=FIRST_COMPLETED)
+                        self.collect(done)
+                    else:
+                        self.stop_event.wait(self.interval)
+                # Let running cuts finish so they are recorded
+                if self.in_flight:
+                    self.collect(wait(list(self.in_flight)).done)
+        self.log(f"Stopped: {self.processed} cut, {self.failed} failed.")
+        self.state.close()
+
+    def stop(self):
+        self.stop_event.set()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cut new/changed rasters and vectors arriving in a directory.")
+    parser.add_argument("watch_dir", help="Directory to watch")
+    parser.add_argument("cut_file", help="Raster or vector whose extent/geometry is the cut")
+    parser.add_argument("out_dir", help="Where cut files are written (not inside watch_dir)")
+    parser.add_argument("--postfix", default="_cut", help="Appended to output file names (default: _cut)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL_S, help="Seconds between directory scans")
+    parser.add_argument("--settle", type=float, default=DEFAULT_SETTLE_S,
+                        help="Seconds a file must stay unchanged before it is cut")
+    parser.add_argument("--recursive", action="store_true", help="Also watch subdirectories (mirrored in out_dir)")
+    parser.add_argument("--state", help=f"SQLite state file (default: out_dir/{STATE_FILE_NAME})")
+    parser.add_argument("--retry-failed", action="store_true", help="Retry files that failed before even if unchanged")
+    parser.add_argument("--once", action="store_true", help="Process what is there now, then exit")
+    args = parser.parse_args(argv)
+
+    watcher = FolderWatcher(
+        args.watch_dir, args.cut_file, args.out_dir, postfix=args.postfix, workers=args.workers,
+        interval=args.interval, settle=args.settle, recursive=args.recursive, state_path=args.state,
+        retry_failed=args.retry_failed
+    )
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: watcher.stop())
+    watcher.run(once=args.once)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+Lets the user pick a dataset inside a ZIP/TAR/GZ archive chosen in a file dialog.
+"""
+import os
+from PySide6.QtWidgets import QInputDialog, QMessageBox
+
+import archive_inputs
+
+# File dialog filter entry for archives
+ARCHIVE_FILTER = "Archives (*.zip *.tar *.tar.gz *.tgz *.gz)"
+
+def choose_archive_member(parent, path, exts):
+    """
+    Returns path unchanged for ordinary files. For an archive, returns the /vsi path of its only
+    dataset with an extension in exts, or of the one the user picks; None if there is none or
+    the user cancels.
+    """
+    if not archive_inputs.is_archive(path):
+        return path
+    members = archive_inputs.dataset_members(path, exts)
+    if not members:
+        QMessageBox.warning(parent, "Archive", f"{os.path.basename(path)} contains no supported datasets.")
+        return None
+    if len(members) == 1:
+        return members[0]
+    labels = [archive_inputs.display_name(m) for m in members]
+    label, ok = QInputDialog.getItem(
+        parent, "Choose Dataset", f"{os.path.basename(path)} contains {len(members)} datasets:", labels, 0, False
+    )
+    return members[labels.index(label)] if ok else None
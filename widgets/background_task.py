@@ -0,0 +1,58 @@
+"""
+Runs a long function on a QThread and reports progress/results back to the GUI thread.
+"""
+from PySide6.QtCore import QObject, QThread, Signal
+import threading
+
+from dataset_pool import release_thread
+
+
+class BackgroundTask(QObject):
+    """
+    fn(task) runs off the GUI thread. It can call task.report_progress(fraction, text) and
+    should stop early when task.cancel_event is set. Connect progress/finished to QObject
+    slots (e.g. widget methods) so they are delivered on the GUI thread.
+    """
+    progress = Signal(float, str)  # fraction 0..1 (negative if unknown), status text
+    finished = Signal(object, str)  # result, error message ('' on success)
+
+    def __init__(self, fn):
+        super().__init__()
+        self.fn = fn
+        self.cancel_event = threading.Event()
+        self.thread = None
+
+    def report_progress(self, fraction, text=""):
+        self.progress.emit(fraction, text)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def is_cancelled(self):
+        return self.cancel_event.is_set()
+
+    def run(self):
+        try:
+            result, error = self.fn(self), ""
+        except Exception as e:
+            result, error = None, str(e) or type(e).__name__
+        finally:
+            # Pooled handles opened by this task are not needed once it is done
+            release_thread()
+        self.finished.emit(result, error)
+
+
+def start_background_task(parent, fn, on_finished, on_progress=None):
+    task = BackgroundTask(fn)
+    thread = QThread(parent)
+    task.thread = thread
+    task.moveToThread(thread)
+    thread.started.connect(task.run)
+    if on_progress is not None:
+        task.progress.connect(on_progress)
+    task.finished.connect(on_finished)
+    task.finished.connect(thread.quit)
+    thread.finished.connect(task.deleteLater)
+    thread.finished.connect(thread.deleteLater)
+    thread.start()
+    return task
@@ -0,0 +1,44 @@
+"""
+Loads dataset thumbnails (see thumbnails.py) on a small thread pool and hands them back to the GUI thread.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+from PySide6.QtCore import QObject, QCoreApplication, Signal
+
+from dataset_pool import release_thread
+from thumbnails import ThumbnailCache
+
+MAX_WORKERS = 4
+
+
+class ThumbnailLoader(QObject):
+    # Emitted on the GUI thread: dataset path, thumbnail PNG path
+    ready = Signal(str, str)
+
+    def __init__(self, parent=None, cache=None):
+        super().__init__(parent)
+        self.cache = cache or ThumbnailCache()
+        self.pool = ThreadPoolExecutor(max_workers=min(MAX_WORKERS, os.cpu_count() or 1), thread_name_prefix="thumbnails")
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.shutdown)
+
+    def request(self, paths):
+        for path in paths:
+            self.pool.submit(self._load, path)
+
+    def _load(self, path):
+        # Worker thread; the signal is queued to the GUI thread
+        try:
+            thumb = self.cache.get_or_create(path)
+        except Exception:
+            thumb = None
+        finally:
+            # Pool threads outlive the request; don't keep the dataset open for them
+            release_thread()
+        if thumb:
+            self.ready.emit(path, thumb)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
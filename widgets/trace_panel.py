@@ -0,0 +1,67 @@
+"""
+Collapsible panel that turns tracing on/off and shows the last traced run of a tab.
+"""
+from PySide6.QtWidgets import QGroupBox, QVBoxLayout, QHBoxLayout, QPlainTextEdit, QPushButton, QFileDialog, QMessageBox
+from PySide6.QtGui import QFontDatabase
+import tracing
+import weakref
+
+# All live panels, kept in sync since the tracing switch is app-wide
+_panels = weakref.WeakSet()
+
+
+class TracePanel(QGroupBox):
+    def __init__(self, parent=None):
+        super().__init__("Trace timings", parent)
+        # Checking the box enables tracing for the whole app
+        self.setCheckable(True)
+        self.setChecked(tracing.is_enabled())
+        self.toggled.connect(self.set_tracing)
+        layout = QVBoxLayout(self)
+        self.summary_view = QPlainTextEdit()
+        self.summary_view.setReadOnly(True)
+        self.summary_view.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.summary_view.setMaximumHeight(160)
+        self.summary_view.setPlaceholderText("Run an operation to see where the time went.")
+        layout.addWidget(self.summary_view)
+        btn_layout = QHBoxLayout()
+        btn_layout.addStretch()
+        self.export_btn = QPushButton("Export Chrome Trace...")
+        self.export_btn.setEnabled(False)
+        self.export_btn.clicked.connect(self.export_trace)
+        btn_layout.addWidget(self.export_btn)
+        layout.addLayout(btn_layout)
+        self.summary = None
+        self._show_contents(self.isChecked())
+        _panels.add(self)
+
+    def _show_contents(self, visible):
+        self.summary_view.setVisible(visible)
+        self.export_btn.setVisible(visible)
+
+    def set_tracing(self, enabled):
+        tracing.set_enabled(enabled)
+        for panel in list(_panels):
+            if panel is not self and panel.isChecked() != enabled:
+                panel.blockSignals(True)
+                panel.setChecked(enabled)
+                panel.blockSignals(False)
+            panel._show_contents(enabled)
+
+    def show_run(self, summary):
+        if summary is None:
+            return
+        self.summary = summary
+        self.summary_view.setPlainText(tracing.format_summary(summary))
+        self.export_btn.setEnabled(True)
+
+    def export_trace(self):
+        if self.summary is None:
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Export Chrome Trace", "trace.json", "Trace JSON (*.json)")
+        if not path:
+            return
+        try:
+            tracing.export_chrome_trace(path, self.summary["events"])
+        except OSError as e:
+            QMessageBox.warning(self, "Export Trace", f"Could not write trace:\n{e}")
@@ -0,0 +1,326 @@
+"""
+Zonal statistics: per-polygon summaries (count, sum, mean, min, max, std, percentiles) of a
+raster band, written as a CSV/Parquet table with one row per polygon.
+
+The raster is read once, block by block, in a thread pool. For each block, the polygons whose
+envelope touches it are rasterized to zone IDs and the block is reduced per zone with
+sort/reduceat operations; the main thread merges those small per-block results into one set
+of per-zone accumulators, so memory depends on the number of zones, not the raster size.
+Percentiles come from per-zone histograms: exact for 8-bit and small-range integer bands,
+accurate to one bin (interpolated) otherwise. Where polygons overlap, a pixel counts for the
+polygon rasterized last.
+"""
+import argparse
+import os
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+
+import tracing
+
+# Pixels per block handed to a worker (block-aligned; a few MB per block for most types)
+BLOCK_TARGET_PIXELS = 4 * 1024 * 1024
+DEFAULT_PERCENTILES = (10, 50, 90)
+DEFAULT_HIST_BINS = 256
+# Upper bound for the per-zone histograms (uint32 counts); fewer bins are used for many zones
+HIST_MAX_BYTES = 256 * 1024 * 1024
+MIN_HIST_BINS = 16
+# Integer bands spanning at most this many values get one (exact) bin per value
+MAX_EXACT_BINS = 1024
+OUTPUT_CHUNK_ROWS = 100_000
+
+def load_zones(vector_path, raster_wkt, id_field=None):
+    """
+    Reads a polygon layer, reprojected to the raster CRS.
+    Returns (ids, geometries as WKB, id column name).
+    """
+    import shapely
+    from pyproj import CRS
+    from dataset_pool import open_vector
+    from gis_utils import get_transformer, transform_geometry
+
+    ds = open_vector(vector_path)
+    if ds is None:
+        raise RuntimeError(f"Could not open {vector_path}")
+    lyr = ds.GetLayer(0)
+    if id_field and lyr.GetLayerDefn().GetFieldIndex(id_field) < 0:
+        raise ValueError(f"Field {id_field} not found in {os.path.basename(vector_path)}")
+    ids, wkbs = [], []
+    for feat in lyr:
+        geom = feat.GetGeometryRef()
+        if geom is None:
+            continue
+        ids.append(feat.GetField(id_field) if id_field else feat.GetFID())
+        wkbs.append(geom.ExportToWkb())
+    srs = lyr.GetSpatialRef()
+    if srs is not None and raster_wkt:
+        src_crs, dst_crs = CRS.from_wkt(srs.ExportToWkt()), CRS.from_wkt(raster_wkt)
+        if src_crs != dst_crs:
+            geoms = transform_geometry(shapely.from_wkb(wkbs), get_transformer(src_crs, dst_crs))
+            wkbs = list(shapely.to_wkb(geoms))
+    return ids, wkbs, id_field or "fid"
+
+def block_windows(band, xsize, ysize, target_pixels=BLOCK_TARGET_PIXELS):
+    # Windows made of whole native blocks, roughly target_pixels each
+    bw, bh = band.GetBlockSize()
+    bw, bh = max(bw, 1), max(bh, 1)
+    win_w = min(xsize, bw * max(1, int(np.sqrt(target_pixels)) // bw))
+    win_h = min(ysize, bh * max(1, (target_pixels // win_w) // bh))
+    return [
+        (x, y, min(win_w, xsize - x), min(win_h, ysize - y))
+        for y in range(0, ysize, win_h) for x in range(0, xsize, win_w)
+    ]
+
+def histogram_layout(band, zone_count):
+    """Returns (hist_min, bin_width, bins, exact) for the per-zone histograms."""
+    from osgeo import gdal
+    if band.DataType == gdal.GDT_Byte:
+        return -0.5, 1.0, 256, True
+    if band.DataType == getattr(gdal, "GDT_Int8", None):
+        return -128.5, 1.0, 256, True
+    try:
+        vmin, vmax = band.ComputeRasterMinMax(True)  # Overview-based: no extra full read
+    except RuntimeError:
+        vmin, vmax = 0.0, 1.0
+    max_bins = max(MIN_HIST_BINS, HIST_MAX_BYTES // (4 * (zone_count + 1)))
+    is_int = band.DataType not in (gdal.GDT_Float32, gdal.GDT_Float64, gdal.GDT_CFloat32, gdal.GDT_CFloat64)
+    if is_int and int(round(vmax - vmin)) + 1 <= min(MAX_EXACT_BINS, max_bins):
+        # One bin per value only works if no value falls outside them, and the overview-based
+        # range may miss the extremes, so take the exact range (one extra read of the band)
+        try:
+            vmin, vmax = band.ComputeRasterMinMax(False)
+        except RuntimeError:
+            vmin, vmax = 0.0, 1.0  # No valid pixels
+        span_values = int(round(vmax - vmin)) + 1
+        if span_values <= min(MAX_EXACT_BINS, max_bins):
+            return vmin - 0.5, 1.0, span_values, True
+    bins = min(DEFAULT_HIST_BINS, max_bins)
+    width = (vmax - vmin) / bins if vmax > vmin else 1.0
+    return vmin, width, bins, False
+
+
+class ZonalAccumulator:
+    """Per-zone running count/sum/sum of squares/min/max and value histograms (zone 0 is unused)."""
+
+    def __init__(self, zone_count, hist_min, bin_width, bins, exact):
+        n = zone_count + 1
+        self.count = np.zeros(n, dtype=np.int64)
+        self.sum = np.zeros(n)
+        self.sumsq = np.zeros(n)
+        self.min = np.full(n, np.inf)
+        self.max = np.full(n, -np.inf)
+        self.hist = np.zeros((n, bins), dtype=np.uint32)
+        self.hist_min = hist_min
+        self.bin_width = bin_width
+        self.bins = bins
+        self.exact = exact
+
+    def reduce(self, zones, values):
+        """Per-zone partial results of one block; zones and values are the valid pixels only."""
+        if zones.size == 0:
+            return None
+        order = np.argsort(zones, kind="stable")
+        zs = zones[order]
+        vs = values[order].astype(np.float64)
+        starts = np.flatnonzero(np.r_[True, zs[1:] != zs[:-1]])
+        bins = ((vs - self.hist_min) / self.bin_width).astype(np.int64)
+        np.clip(bins, 0, self.bins - 1, out=bins)
+        flat, flat_counts = np.unique(zs.astype(np.int64) * self.bins + bins, return_counts=True)
+        return (
+            zs[starts], np.diff(np.r_[starts, zs.size]),
+            np.add.reduceat(vs, starts), np.add.reduceat(vs * vs, starts),
+            np.minimum.reduceat(vs, starts), np.maximum.reduceat(vs, starts),
+            flat, flat_counts,
+        )
+
+    def merge(self, part):
+        # Zone IDs are unique within a part, so plain fancy-indexed updates are safe
+        zone_ids, counts, sums, sumsqs, mins, maxs, flat, flat_counts = part
+        self.count[zone_ids] += counts
+        self.sum[zone_ids] += sums
+        self.sumsq[zone_ids] += sumsqs
+        self.min[zone_ids] = np.minimum(self.min[zone_ids], mins)
+        self.max[zone_ids] = np.maximum(self.max[zone_ids], maxs)
+        self.hist.reshape(-1)[flat] += flat_counts.astype(np.uint32)
+
+    def percentiles(self, percentiles, start, stop):
+        """Percentiles for zones [start, stop) as an (n, len(percentiles)) array."""
+        hist = self.hist[start:stop]
+        counts = self.count[start:stop]
+        cum = np.cumsum(hist, axis=1, dtype=np.int64)
+        out = np.full((len(counts), len(percentiles)), np.nan)
+        has = counts > 0
+        rows = np.arange(len(counts))
+        for j, p in enumerate(percentiles):
+            target = p / 100.0 * counts
+            idx = np.minimum((cum < target[:, None]).sum(axis=1), self.bins - 1)
+            if self.exact:
+                value = self.hist_min + (idx + 0.5) * self.bin_width
+            else:
+                before = np.where(idx > 0, cum[rows, np.maximum(idx - 1, 0)], 0)
+                in_bin = np.maximum(hist[rows, idx], 1)
+                value = self.hist_min + (idx + np.clip((target - before) / in_bin, 0, 1)) * self.bin_width
+            # Tails beyond the (overview-based) histogram range are bounded by the exact extremes
+            out[has, j] = np.clip(value, self.min[start:stop], self.max[start:stop])[has]
+        return out
+
+
+class _BlockReader:
+    """Per-thread raster handle and zone layer; GDAL/OGR handles must not be shared across threads."""
+
+    def __init__(self, raster_path, band_index, wkbs, all_touched):
+        self.raster_path = raster_path
+        self.band_index = band_index
+        self.wkbs = wkbs
+        self.all_touched = all_touched
+        self.local = threading.local()
+
+    def _handles(self):
+        local = self.local
+        if not hasattr(local, "band"):
+            from osgeo import gdal, ogr
+            local.ds = gdal.Open(self.raster_path)
+            local.band = local.ds.GetRasterBand(self.band_index)
+            local.vec = ogr.GetDriverByName("Memory").CreateDataSource("")
+            local.lyr = local.vec.CreateLayer("zones")
+            local.lyr.CreateField(ogr.FieldDefn("ZONE", ogr.OFTInteger))
+            defn = local.lyr.GetLayerDefn()
+            for zone_id, wkb in enumerate(self.wkbs, start=1):
+                feat = ogr.Feature(defn)
+                feat.SetField(0, zone_id)
+                feat.SetGeometry(ogr.CreateGeometryFromWkb(wkb))
+                local.lyr.CreateFeature(feat)
+        return local
+
+    def read(self, window):
+        """Returns (zone ids, values) of the valid pixels of a window that fall in a zone."""
+        from osgeo import gdal
+        h = self._handles()
+        xoff, yoff, w, hgt = window
+        gt = h.ds.GetGeoTransform()
+        data = h.band.ReadAsArray(xoff, yoff, w, hgt)
+        block_gt = (gt[0] + xoff * gt[1] + yoff * gt[2], gt[1], gt[2], gt[3] + xoff * gt[4] + yoff * gt[5], gt[4], gt[5])
+        xs = [block_gt[0], block_gt[0] + w * gt[1], block_gt[0] + hgt * gt[2], block_gt[0] + w * gt[1] + hgt * gt[2]]
+        ys = [block_gt[3], block_gt[3] + w * gt[4], block_gt[3] + hgt * gt[5], block_gt[3] + w * gt[4] + hgt * gt[5]]
+        # Only polygons whose envelope touches the block are rasterized
+        h.lyr.SetSpatialFilterRect(min(xs), min(ys), max(xs), max(ys))
+        mem = gdal.GetDriverByName("MEM").Create("", w, hgt, 1, gdal.GDT_Int32)
+        mem.SetGeoTransform(block_gt)
+        options = ["ATTRIBUTE=ZONE"] + (["ALL_TOUCHED=TRUE"] if self.all_touched else [])
+        gdal.RasterizeLayer(mem, [1], h.lyr, options=options)
+        zones = mem.GetRasterBand(1).ReadAsArray()
+
+        valid = zones > 0
+        flags = h.band.GetMaskFlags()
+        if flags == gdal.GMF_NODATA:
+            valid &= data != h.band.GetNoDataValue()
+        elif not flags & gdal.GMF_ALL_VALID:
+            # Per-dataset mask or alpha band
+            valid &= h.band.GetMaskBand().ReadAsArray(xoff, yoff, w, hgt) > 0
+        if np.issubdtype(data.dtype, np.floating):
+            valid &= ~np.isnan(data)
+        return zones[valid], data[valid]
+
+
+def zonal_statistics(raster_path, zones_path, out_path, band_index=1, id_field=None,
+                     percentiles=DEFAULT_PERCENTILES, all_touched=False, workers=None,
+                     progress_callback=None, cancel_event=None):
+    """
+    Computes per-polygon statistics of one raster band and writes them to out_path (CSV/Parquet).
+    progress_callback(done_blocks, total_blocks) is called from the calling thread.
+    Returns the number of zones written, or None if cancelled.
+    """
+    from dataset_pool import open_raster
+    from table_io import TableWriter
+
+    ds = open_raster(raster_path)
+    if ds is None:
+        raise RuntimeError(f"Could not open {raster_path}")
+    band = ds.GetRasterBand(band_index)
+    ids, wkbs, id_name = load_zones(zones_path, ds.GetProjection(), id_field)
+    acc = ZonalAccumulator(len(wkbs), *histogram_layout(band, len(wkbs)))
+    windows = block_windows(band, ds.RasterXSize, ds.RasterYSize)
+    ds = None
+
+    reader = _BlockReader(raster_path, band_index, wkbs, all_touched)
+
+    def reduce_block(window):
+        with tracing.span("zonal block", pixels=window[2] * window[3]):
+            return acc.reduce(*reader.read(window))
+
+    workers = workers or os.cpu_count() or 1
+    done = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        queue = iter(windows)
+        while True:
+            # Bounded in-flight blocks keep memory flat
+            for window in queue:
+                pending.add(pool.submit(reduce_block, window))
+                if len(pending) >= workers * 2:
+                    break
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                part = future.result()
+                if part is not None:
+                    acc.merge(part)
+                done += 1
+            if progress_callback:
+                progress_callback(done, len(windows))
+            if cancel_event is not None and cancel_event.is_set():
+                for future in pending:
+                    future.cancel()
+                return None
+
+    with TableWriter(out_path) as writer:
+        for start in range(1, len(wkbs) + 1, OUTPUT_CHUNK_ROWS):
+            stop = min(start + OUTPUT_CHUNK_ROWS, len(wkbs) + 1)
+            count = acc.count[start:stop]
+            has = count > 0
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = np.where(has, acc.sum[start:stop] / count, np.nan)
+                var = np.maximum(acc.sumsq[start:stop] / count - mean * mean, 0.0)
+            chunk = {
+                id_name: np.asarray(ids[start - 1:stop - 1]),
+                "count": count,
+                "sum": acc.sum[start:stop],
+                "mean": mean,
+                "min": np.where(has, acc.min[start:stop], np.nan),
+                "max": np.where(has, acc.max[start:stop], np.nan),
+                "std": np.where(has, np.sqrt(var), np.nan),
+            }
+            pct = acc.percentiles(percentiles, start, stop)
+            for j, p in enumerate(percentiles):
+                chunk[f"p{p:g}"] = pct[:, j]
+            writer.write(chunk)
+    return len(wkbs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-polygon statistics of a raster band.")
+    parser.add_argument("raster", help="Input raster")
+    parser.add_argument("zones", help="Polygon layer (any OGR format)")
+    parser.add_argument("output", help="Output CSV or Parquet table")
+    parser.add_argument("--band", type=int, default=1)
+    parser.add_argument("--id-field", help="Attribute identifying each polygon (default: feature ID)")
+    parser.add_argument("--percentiles", type=float, nargs="*", default=list(DEFAULT_PERCENTILES))
+    parser.add_argument("--all-touched", action="store_true", help="Count every pixel a polygon touches, not just pixel centres")
+    parser.add_argument("--workers", type=int, default=None, help="Worker threads (default: all cores)")
+    args = parser.parse_args(argv)
+
+    def report(done, total):
+        print(f"\r{done} / {total} blocks", end="", file=sys.stderr, flush=True)
+
+    zones = zonal_statistics(
+        args.raster, args.zones, args.output, band_index=args.band, id_field=args.id_field,
+        percentiles=args.percentiles, all_touched=args.all_touched, workers=args.workers,
+        progress_callback=report
+    )
+    print(f"\nWrote statistics for {zones} zones to {args.output}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()